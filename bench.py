@@ -2,31 +2,122 @@ from __future__ import annotations
 
 import argparse
 import json
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
-from run_sim import SimulationConfig, load_trace, simulate
+from memory.placement import PLACEMENTS
+from memory.tiers import parse_tiers
+from result_cache import ResultCache, default_cache, simulate_trace_many
+from run_sim import ALLOCATORS, TIMELINE_MODES, SimulationConfig, load_trace, simulate
 
 DEFAULT_TRACE = Path("traces") / "llm_kvcache_growth.jsonl"
 POLICIES = ("confidence", "lru", "clockpro")
 
 
-def run_benchmark(trace_path: str | Path = DEFAULT_TRACE) -> dict[str, dict[str, float | int]]:
+def run_benchmark(
+    trace_path: str | Path = DEFAULT_TRACE,
+    placement: str = "first_fit",
+    allocator: str = "contiguous",
+    capacity: int = SimulationConfig.capacity,
+    tiers: str = "none",
+    cache: ResultCache | None = None,
+    shards: int = 1,
+) -> dict[str, dict[str, float | int]]:
+    config = SimulationConfig(
+        miss_mode="demand",
+        placement=placement,
+        allocator=allocator,
+        capacity=capacity,
+        tiers=parse_tiers(tiers, capacity),
+        timeline_mode="none",
+    )
+    # Uncached policies share one lockstep pass over the trace.
+    runs = [(policy, config) for policy in POLICIES]
+    results = simulate_trace_many(trace_path, runs, cache, shards)
+    return {policy: result.to_benchmark_row() for policy, result in zip(POLICIES, results)}
+
+
+def _run_variants(
+    trace_path: str | Path,
+    variants: dict[str, dict[str, object]],
+    policy: str = "confidence",
+    repeat: int = 5,
+    capacity: int = SimulationConfig.capacity,
+) -> dict[str, dict[str, float | int]]:
     trace_events = load_trace(trace_path)
     results: dict[str, dict[str, float | int]] = {}
-    for policy in POLICIES:
-        result = simulate(trace_events, policy, SimulationConfig(miss_mode="demand"))
-        results[policy] = result.to_benchmark_row()
+    # Timed runs always simulate; a result cache hit would only time the lookup.
+    for name, overrides in variants.items():
+        # Only the summary is reported, so skip the timeline unless a variant asks for it.
+        settings = {"miss_mode": "demand", "capacity": capacity, "timeline_mode": "none"}
+        config = SimulationConfig(**{**settings, **overrides})
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = simulate(trace_events, policy, config)
+        elapsed = (time.perf_counter() - started) / repeat
+        row = result.to_benchmark_row()
+        row["hbm_alloc_fail"] = result.stats["hbm_alloc_fail"]
+        row["peak_used"] = result.peak_used
+        row["timeline_points"] = result.timeline_points
+        row["events_per_sec"] = len(trace_events) / elapsed if elapsed > 0 else 0.0
+        results[name] = row
     return results
 
 
+def run_placement_comparison(
+    trace_path: str | Path = DEFAULT_TRACE,
+    policy: str = "confidence",
+    repeat: int = 5,
+    capacity: int = SimulationConfig.capacity,
+) -> dict[str, dict[str, float | int]]:
+    variants = {placement: {"placement": placement} for placement in PLACEMENTS}
+    return _run_variants(trace_path, variants, policy, repeat, capacity)
+
+
+def run_allocator_comparison(
+    trace_path: str | Path = DEFAULT_TRACE,
+    policy: str = "confidence",
+    repeat: int = 5,
+    capacity: int = SimulationConfig.capacity,
+) -> dict[str, dict[str, float | int]]:
+    variants = {allocator: {"allocator": allocator} for allocator in ALLOCATORS}
+    return _run_variants(trace_path, variants, policy, repeat, capacity)
+
+
+def run_dedup_comparison(
+    trace_path: str | Path = DEFAULT_TRACE,
+    policy: str = "confidence",
+    repeat: int = 5,
+    capacity: int = SimulationConfig.capacity,
+) -> dict[str, dict[str, float | int]]:
+    variants = {"dedup": {"dedup": True}, "private_copies": {"dedup": False}}
+    return _run_variants(trace_path, variants, policy, repeat, capacity)
+
+
+def run_timeline_mode_comparison(
+    trace_path: str | Path = DEFAULT_TRACE,
+    policy: str = "confidence",
+    repeat: int = 5,
+    capacity: int = SimulationConfig.capacity,
+) -> dict[str, dict[str, float | int]]:
+    variants = {mode: {"timeline_mode": mode} for mode in TIMELINE_MODES}
+    return _run_variants(trace_path, variants, policy, repeat, capacity)
+
+
 def _format_metric(name: str, value: float | int | None) -> str:
     if value is None:
         return "-"
     if name in {"external_frag", "hot_hit_rate", "cold_hit_rate", "entropy"}:
         return f"{float(value):.3f}"
-    if name == "bytes_moved":
+    if name == "events_per_sec":
+        return f"{float(value):,.0f}"
+    if name in {"bytes_moved", "compaction_saved", "peak_used"}:
         return f"{float(value) / 1e6:.3f} MB"
+    if name == "stall_time_s":
+        return f"{float(value) * 1e3:.3f} ms"
+    if name == "effective_throughput":
+        return f"{float(value) / 1e9:.2f} GB/s"
     return str(value)
 
 
@@ -35,11 +126,15 @@ def _print_table(results: dict[str, dict[str, float | int]], trace_path: str | P
         ("Faults", "faults"),
         ("Migrations", "migrations"),
         ("Bytes moved", "bytes_moved"),
+        ("Compaction saved", "compaction_saved"),
         ("Fallback epochs", "fallback_epochs"),
         ("external_frag", "external_frag"),
         ("LFE", "lfe"),
         ("Holes", "holes"),
         ("Entropy", "entropy"),
+        ("Internal frag", "internal_frag"),
+        ("Stall time", "stall_time_s"),
+        ("Eff. throughput", "effective_throughput"),
         ("Hot hit rate", "hot_hit_rate"),
         ("Cold hit rate", "cold_hit_rate"),
         ("Promotions", "promotions"),
@@ -60,14 +155,103 @@ def _print_table(results: dict[str, dict[str, float | int]], trace_path: str | P
     )
 
 
+def _print_variant_table(
+    title: str,
+    results: dict[str, dict[str, float | int]],
+    trace_path: str | Path,
+):
+    metrics = [
+        ("Faults", "faults"),
+        ("Bytes moved", "bytes_moved"),
+        ("Compaction saved", "compaction_saved"),
+        ("HBM alloc fails", "hbm_alloc_fail"),
+        ("Peak HBM used", "peak_used"),
+        ("external_frag", "external_frag"),
+        ("Internal frag", "internal_frag"),
+        ("LFE", "lfe"),
+        ("Holes", "holes"),
+        ("Timeline points", "timeline_points"),
+        ("Events/sec", "events_per_sec"),
+    ]
+    variants = list(results)
+    print("=" * 90)
+    print(f"{title} ({trace_path})")
+    print("=" * 90)
+    print(f"{'Metric':<20} " + " ".join(f"{name:>16}" for name in variants))
+    print("-" * 90)
+    for label, key in metrics:
+        values = [_format_metric(key, results[name].get(key)) for name in variants]
+        print(f"{label:<20} " + " ".join(f"{value:>16}" for value in values))
+    print("=" * 90)
+
+
 def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--trace", default=str(DEFAULT_TRACE))
     parser.add_argument("--json", dest="json_path")
+    parser.add_argument("--capacity", type=int, default=SimulationConfig.capacity)
+    parser.add_argument("--allocator", choices=ALLOCATORS, default="contiguous")
+    parser.add_argument("--placement", choices=sorted(PLACEMENTS), default="first_fit")
+    parser.add_argument(
+        "--tiers",
+        default="none",
+        help="Lower memory tiers for the main table ('default' or a run_sim.py --tiers spec).",
+    )
+    parser.add_argument(
+        "--compare-placements",
+        action="store_true",
+        help="Also compare placement engines for the confidence policy.",
+    )
+    parser.add_argument(
+        "--compare-allocators",
+        action="store_true",
+        help="Also compare contiguous, buddy and paged allocators for the confidence policy.",
+    )
+    parser.add_argument(
+        "--compare-dedup",
+        action="store_true",
+        help="Also compare shared prefix blocks against private copies (use a trace with share events).",
+    )
+    parser.add_argument(
+        "--compare-timeline-modes",
+        action="store_true",
+        help="Also time the confidence policy with timeline_mode none, sampled and full.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-simulate the main table instead of reading the on-disk result cache.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Split the main table's lockstep policy runs across this many processes.",
+    )
     args = parser.parse_args(argv)
 
-    results = run_benchmark(args.trace)
+    results = run_benchmark(
+        args.trace,
+        placement=args.placement,
+        allocator=args.allocator,
+        capacity=args.capacity,
+        tiers=args.tiers,
+        cache=default_cache(not args.no_cache),
+        shards=args.shards,
+    )
     _print_table(results, args.trace)
+    if args.compare_placements:
+        placements = run_placement_comparison(args.trace, capacity=args.capacity)
+        _print_variant_table("Placement Comparison", placements, args.trace)
+    if args.compare_allocators:
+        allocators = run_allocator_comparison(args.trace, capacity=args.capacity)
+        _print_variant_table("Allocator Comparison", allocators, args.trace)
+    if args.compare_dedup:
+        dedup = run_dedup_comparison(args.trace, capacity=args.capacity)
+        _print_variant_table("Shared Block Comparison", dedup, args.trace)
+    if args.compare_timeline_modes:
+        modes = run_timeline_mode_comparison(args.trace, capacity=args.capacity)
+        _print_variant_table("Timeline Mode Comparison", modes, args.trace)
 
     if args.json_path:
         payload = {
@@ -77,11 +261,13 @@ def main(argv: list[str] | None = None):
                     "faults": int(metrics["faults"]),
                     "migrations": int(metrics["migrations"]),
                     "bytes_moved": int(metrics["bytes_moved"]),
+                    "compaction_saved": int(metrics["compaction_saved"]),
                     "fallback_epochs": int(metrics["fallback_epochs"]),
                     "external_frag": float(metrics["external_frag"]),
                     "lfe": int(metrics["lfe"]),
                     "holes": int(metrics["holes"]),
                     "entropy": float(metrics["entropy"]),
+                    "internal_frag": int(metrics["internal_frag"]),
                     "hot_hit_rate": float(metrics["hot_hit_rate"]),
                     "cold_hit_rate": float(metrics["cold_hit_rate"]),
                     "promotions": int(metrics["promotions"]),
@@ -1,6 +1,8 @@
 from __future__ import annotations
 from dataclasses import dataclass
 
+from control.sensitivity import above
+
 @dataclass
 class Budgets:
     max_migration_bytes: int
@@ -9,6 +11,7 @@ class Budgets:
 class SafetyGate:
     def __init__(self, budgets: Budgets):
         self.budgets = budgets
+        self.sensitivity = None  # SensitivityLog while a run records decision sensitivity
         self.reset_epoch()
     def reset_epoch(self):
         self.migration_bytes = 0
@@ -21,8 +24,18 @@ class SafetyGate:
         self.faults += n
         self._check()
     def _check(self):
-        if self.migration_bytes > self.budgets.max_migration_bytes or self.faults > self.budgets.max_faults:
+        over_bytes = self.migration_bytes > self.budgets.max_migration_bytes
+        over_faults = self.faults > self.budgets.max_faults
+        log = self.sensitivity
+        if log is not None:
+            log.threshold("max_migration_bytes", above, self.migration_bytes, over_bytes)
+            log.threshold("max_faults", above, self.faults, over_faults)
+        if over_bytes or over_faults:
             self.fallback = True
+    def remaining_migration_bytes(self) -> int:
+        if self.sensitivity is not None:
+            self.sensitivity.read("max_migration_bytes")
+        return max(0, self.budgets.max_migration_bytes - self.migration_bytes)
     def allow_action(self) -> bool:
         return not self.fallback
     def status(self) -> str:
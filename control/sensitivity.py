@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ``test(x, value)`` must be non-decreasing in ``x``: once it holds for some x it
+# holds for every larger x. Decrementing comparisons are recorded as their negation.
+Test = Callable[[Any, Any], bool]
+
+
+def at_least(x, value) -> bool:
+    return x >= value
+
+
+def above(x, value) -> bool:
+    return x > value
+
+
+class SensitivityLog:
+    """Where each config field could first have changed a run's outcome.
+
+    Two kinds of evidence are kept, both keyed by ``SimulationConfig`` field:
+
+    - ``threshold(field, test, x, outcome)`` notes a decision that compared a
+      measured ``x`` against the field's value. Only comparisons that narrow
+      the range of field values reproducing every decision so far are stored,
+      so another value is checked against a short, event-ordered history.
+    - ``read(field)`` notes that the field was consulted in a way that is not
+      tracked exactly; any other value is assumed to diverge from there.
+
+    ``event`` is the 0-based index of the event being processed; the simulator
+    advances it.
+    """
+
+    def __init__(self):
+        self.event = 0
+        self.reads: Dict[str, int] = {}
+        self.history: Dict[str, List[Tuple[int, Test, Any, bool]]] = {}
+        self._tightest: Dict[Tuple[str, Test, bool], Any] = {}
+
+    def read(self, field: str):
+        if field not in self.reads:
+            self.reads[field] = self.event
+
+    def threshold(self, field: str, test: Test, x, outcome: bool):
+        key = (field, test, outcome)
+        bound = self._tightest.get(key)
+        # A smaller x that passed, or a larger x that failed, pins the field down further.
+        if bound is None or (x < bound if outcome else x > bound):
+            self._tightest[key] = x
+            self.history.setdefault(field, []).append((self.event, test, x, outcome))
+
+    def divergence(self, field: str, value) -> Optional[int]:
+        """Index of the first event that ``value`` might process differently, or None."""
+        first = self.reads.get(field)
+        for event, test, x, outcome in self.history.get(field, ()):
+            if first is not None and event >= first:
+                break
+            if test(x, value) != outcome:
+                first = event
+                break
+        return first
+
+
+class RecordingConfig:
+    """Read-only view of a config that reports every field access to a ``SensitivityLog``."""
+
+    def __init__(self, config, log: SensitivityLog):
+        object.__setattr__(self, "_config", config)
+        object.__setattr__(self, "_log", log)
+
+    def __getattr__(self, name: str):
+        self._log.read(name)
+        return getattr(self._config, name)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError("RecordingConfig is read-only")
@@ -5,6 +5,7 @@ import io
 import sys
 from pathlib import Path
 
+import numpy as np
 import plotly.graph_objects as go
 import streamlit as st
 
@@ -12,7 +13,9 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from run_sim import SimulationConfig, load_trace, simulate
+from result_cache import default_cache, simulate_trace_many
+from run_sim import SimulationConfig
+from viz.timeline import state_at
 
 TRACE_OPTIONS = {
     "llm_kvcache_growth": REPO_ROOT / "traces" / "llm_kvcache_growth.jsonl",
@@ -27,39 +30,32 @@ POLICY_COLORS = {
 PHASE_COLORS = ["#1F3A7A", "#E8593C", "#2D8450", "#A56B00", "#7B849A", "#5498FF"]
 
 
-@st.cache_data(show_spinner=False)
-def cached_trace(trace_path: str):
-    return load_trace(trace_path)
-
-
 def run_selected_policies(
     trace_key: str,
     config: SimulationConfig,
     compare_all: bool,
     selected_policy: str,
+    use_cache: bool = True,
 ):
-    trace_events = cached_trace(str(TRACE_OPTIONS[trace_key]))
+    trace_path = str(TRACE_OPTIONS[trace_key])
     policies = ["confidence", "lru", "clockpro"] if compare_all else [selected_policy]
-    return {policy: simulate(trace_events, policy, config) for policy in policies}
+    cache = default_cache(use_cache)
+    # Timeline points carry memory-map deltas, so whole timelines stay small. Compared
+    # policies share one lockstep pass over the trace.
+    results = simulate_trace_many(trace_path, [(policy, config) for policy in policies], cache)
+    return dict(zip(policies, results))
 
 
 def bucket_counts(result, bucket_count: int = 10):
-    if not result.timeline:
+    timeline = result.timeline
+    if not len(timeline):
         return [f"B{i}" for i in range(bucket_count)], [0] * bucket_count, [0] * bucket_count
-    size = max(1, len(result.timeline) // bucket_count)
-    labels = []
-    faults = []
-    migrations = []
-    for index in range(bucket_count):
-        start = index * size
-        if index == bucket_count - 1:
-            end = len(result.timeline)
-        else:
-            end = min(len(result.timeline), (index + 1) * size)
-        window = result.timeline[start:end]
-        labels.append(f"{index * 10}-{(index + 1) * 10}%")
-        faults.append(sum(point.faults for point in window))
-        migrations.append(sum(point.migrations for point in window))
+    size = max(1, len(timeline) // bucket_count)
+    bounds = np.minimum(np.arange(bucket_count + 1) * size, len(timeline))
+    bounds[-1] = len(timeline)
+    labels = [f"{index * 10}-{(index + 1) * 10}%" for index in range(bucket_count)]
+    faults = timeline.aggregate("faults", bounds).tolist()
+    migrations = timeline.aggregate("migrations", bounds).tolist()
     return labels, faults, migrations
 
 
@@ -104,23 +100,23 @@ def build_csv(results: dict[str, object]) -> str:
         ]
     )
     for policy, result in results.items():
-        for point in result.timeline:
-            writer.writerow(
-                [
-                    policy,
-                    point.t,
-                    point.event,
-                    point.phase or "",
-                    point.occupancy,
-                    point.external_frag,
-                    point.entropy,
-                    point.faults,
-                    point.migrations,
-                    point.bytes_moved,
-                    point.lfe,
-                    point.holes,
-                ]
+        timeline = result.timeline
+        writer.writerows(
+            zip(
+                [policy] * len(timeline),
+                timeline.column("t").tolist(),
+                timeline.decoded("event").tolist(),
+                timeline.decoded("phase", missing="").tolist(),
+                timeline.column("occupancy").tolist(),
+                timeline.column("external_frag").tolist(),
+                timeline.column("entropy").tolist(),
+                timeline.column("faults").tolist(),
+                timeline.column("migrations").tolist(),
+                timeline.column("bytes_moved").tolist(),
+                timeline.column("lfe").tolist(),
+                timeline.column("holes").tolist(),
             )
+        )
     return buffer.getvalue()
 
 
@@ -128,39 +124,29 @@ def render_occupancy_chart(results, compare_all: bool, selected_policy: str):
     fig = go.Figure()
     if compare_all:
         for policy, result in results.items():
-            x_values = [point.t for point in result.timeline]
-            y_values = [point.occupancy for point in result.timeline]
             fig.add_trace(
                 go.Scatter(
-                    x=x_values,
-                    y=y_values,
+                    x=result.timeline.column("t"),
+                    y=result.timeline.column("occupancy"),
                     mode="lines",
                     name=policy,
                     line=dict(color=POLICY_COLORS[policy], width=3),
                 )
             )
     else:
-        result = results[selected_policy]
-        phases = []
-        for point in result.timeline:
-            if point.phase and point.phase not in phases:
-                phases.append(point.phase)
+        timeline = results[selected_policy].timeline
+        x_values = timeline.column("t")
+        occupancy = timeline.column("occupancy").astype(float)
+        phases = timeline.vocabulary("phase")
+        masks = [timeline.mask("phase", phase) for phase in phases]
         if not phases:
             phases = ["simulation"]
-        for index, phase in enumerate(phases):
-            x_values = []
-            y_values = []
-            for point in result.timeline:
-                if (point.phase or "simulation") == phase:
-                    x_values.append(point.t)
-                    y_values.append(point.occupancy)
-                else:
-                    x_values.append(point.t)
-                    y_values.append(None)
+            masks = [np.ones(len(timeline), dtype=bool)]
+        for index, (phase, mask) in enumerate(zip(phases, masks)):
             fig.add_trace(
                 go.Scatter(
                     x=x_values,
-                    y=y_values,
+                    y=np.where(mask, occupancy, np.nan),
                     mode="lines",
                     name=phase,
                     line=dict(color=PHASE_COLORS[index % len(PHASE_COLORS)], width=3),
@@ -184,8 +170,8 @@ def render_fragmentation_chart(results, compare_all: bool, selected_policy: str)
         color = POLICY_COLORS.get(policy, "#1F3A7A")
         fig.add_trace(
             go.Scatter(
-                x=[point.t for point in result.timeline],
-                y=[point.external_frag for point in result.timeline],
+                x=result.timeline.column("t"),
+                y=result.timeline.column("external_frag"),
                 mode="lines",
                 name=f"{policy} external_frag" if compare_all else "external_frag",
                 line=dict(color=color, width=3),
@@ -194,8 +180,8 @@ def render_fragmentation_chart(results, compare_all: bool, selected_policy: str)
         )
         fig.add_trace(
             go.Scatter(
-                x=[point.t for point in result.timeline],
-                y=[point.entropy for point in result.timeline],
+                x=result.timeline.column("t"),
+                y=result.timeline.column("entropy"),
                 mode="lines",
                 name=f"{policy} entropy" if compare_all else "entropy",
                 line=dict(color=color, width=2, dash="dash"),
@@ -288,6 +274,43 @@ def render_free_extent_chart(results, compare_all: bool, selected_policy: str):
     return fig
 
 
+def render_memory_map_chart(result, t: int):
+    memory_map = state_at(result.timeline, t)
+    fig = go.Figure()
+    for start, size, obj_id in memory_map.blocks:
+        fig.add_trace(
+            go.Bar(
+                x=[size],
+                y=["resident"],
+                base=[start],
+                orientation="h",
+                name=obj_id,
+                marker_color=POLICY_COLORS.get(result.policy, "#1F3A7A"),
+                showlegend=False,
+                hovertemplate=f"{obj_id}: [{start}, {start + size})<extra></extra>",
+            )
+        )
+    for start, size in memory_map.free_extents:
+        fig.add_trace(
+            go.Bar(
+                x=[size],
+                y=["free"],
+                base=[start],
+                orientation="h",
+                marker_color="#BDC3C7",
+                showlegend=False,
+                hovertemplate=f"free: [{start}, {start + size})<extra></extra>",
+            )
+        )
+    fig.update_layout(
+        title=f"Memory Map at t={memory_map.t} ({result.policy})",
+        xaxis=dict(title="HBM address", range=[0, result.config.capacity]),
+        barmode="overlay",
+        margin=dict(l=24, r=24, t=56, b=24),
+    )
+    return fig
+
+
 st.set_page_config(page_title="HBM Fragmentation Guard Dashboard", layout="wide")
 st.title("HBM Fragmentation Guard Dashboard")
 st.caption("Interactive parameter sweeping for confidence-gated, LRU, and CLOCK-Pro baselines.")
@@ -311,6 +334,7 @@ with st.sidebar:
     else:
         confidence_lb = 0.70
     compare_all = st.checkbox("Compare All Policies", value=False)
+    use_cache = st.checkbox("Reuse cached results", value=True)
     run_clicked = st.button("Run Simulation", type="primary")
 
 if run_clicked:
@@ -330,20 +354,21 @@ config = SimulationConfig(
     admit_lb=confidence_lb,
     evict_ub=max(0.0, 1.0 - ub_threshold),
 )
-results = run_selected_policies(trace_key, config, compare_all, selected_policy)
+results = run_selected_policies(trace_key, config, compare_all, selected_policy, use_cache)
 primary = results[selected_policy] if selected_policy in results else next(iter(results.values()))
 
-if not primary.timeline:
+if not len(primary.timeline):
     st.warning("This simulation returned zero events, so there is nothing to chart yet.")
     st.stop()
 
-metrics_columns = st.columns(6)
+metrics_columns = st.columns(7)
 metrics_columns[0].metric("Total Faults", primary.stats["faults"])
 metrics_columns[1].metric("Total Migrations", primary.stats["migrations"])
 metrics_columns[2].metric("Bytes Moved", f"{primary.stats['bytes_moved']:,}")
 metrics_columns[3].metric("Fallback Epochs", primary.stats["fallback_epochs"])
-metrics_columns[4].metric("Final external_frag", f"{primary.fragmentation.external_frag:.3f}")
-metrics_columns[5].metric("Final LFE", f"{primary.fragmentation.lfe:,}")
+metrics_columns[4].metric("Final HBM Used", f"{primary.final_used:,}")
+metrics_columns[5].metric("Final external_frag", f"{primary.fragmentation.external_frag:.3f}")
+metrics_columns[6].metric("Final LFE", f"{primary.fragmentation.lfe:,}")
 
 csv_payload = build_csv(results)
 st.download_button(
@@ -372,3 +397,10 @@ right.plotly_chart(
     render_free_extent_chart(results, compare_all, selected_policy),
     use_container_width=True,
 )
+
+timestamps = primary.timeline.column("t")
+first_t, last_t = int(timestamps[0]), int(timestamps[-1])
+map_t = last_t
+if first_t < last_t:
+    map_t = st.slider("Memory map at timestamp", min_value=first_t, max_value=last_t, value=last_t)
+st.plotly_chart(render_memory_map_chart(primary, map_t), use_container_width=True)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from dataclasses import fields, replace
+from itertools import chain
+from typing import Any, Iterable, Optional
+
+from policy.registry import build_policy
+from run_sim import (
+    SIMULATOR_FIELDS,
+    STRUCTURAL_FIELDS,
+    TIMELINE_FIELDS,
+    SimResult,
+    SimulationConfig,
+    simulate,
+    simulate_iter,
+)
+from trace_format import BinaryTrace
+from viz.timeline import Timeline
+
+
+def _epoch_divergence(old: int, new: int) -> int:
+    """First event index whose epoch reset differs between the two epoch lengths."""
+    for position in range(max(old, new) + 2):
+        event_i = position + 1
+        if (event_i % old == 1) != (event_i % new == 1):
+            return position
+    return 0
+
+
+def divergence(
+    base: SimResult,
+    config: SimulationConfig,
+    events: int,
+    policy_fields: Optional[tuple[str, ...]],
+) -> int:
+    """How many leading events a run under ``config`` is guaranteed to share with ``base``.
+
+    ``base`` must have been run with ``track_sensitivity=True`` over ``events``
+    events. ``policy_fields`` is the policy's ``config_fields``; when it is None
+    any change outside ``SIMULATOR_FIELDS`` is assumed to matter from the start.
+    """
+    log = base.sensitivity
+    if log is None:
+        raise ValueError("base run did not record decision sensitivity")
+    shared = events
+    for item in fields(SimulationConfig):
+        name = item.name
+        old, new = getattr(base.config, name), getattr(config, name)
+        if old == new:
+            continue
+        if name in STRUCTURAL_FIELDS or name in TIMELINE_FIELDS:
+            return 0
+        if name == "epoch":
+            shared = min(shared, _epoch_divergence(old, new))
+            continue
+        if policy_fields is None and name not in SIMULATOR_FIELDS:
+            return 0
+        first = log.divergence(name, new)
+        if first is not None:
+            shared = min(shared, first)
+    return shared
+
+
+class IncrementalSimulator:
+    """Re-simulates config variants of one trace and policy, reusing a base run's prefix.
+
+    The base run records a ``SensitivityLog`` and a checkpoint every
+    ``checkpoint_every`` events. ``simulate(config)`` finds the first event
+    the new config could decide differently, resumes from the last checkpoint
+    before it, and prepends the base run's timeline up to that checkpoint, so
+    the result matches a run from ``t=0``. Changing a structural or timeline
+    field always replays the whole trace.
+    """
+
+    def __init__(
+        self,
+        trace_events: Iterable[dict[str, Any]] | BinaryTrace,
+        policy: str,
+        config: SimulationConfig | None = None,
+        checkpoint_every: int = 256,
+    ):
+        if checkpoint_every < 1:
+            raise ValueError(f"checkpoint_every must be >= 1, got {checkpoint_every}")
+        if not isinstance(trace_events, BinaryTrace):
+            trace_events = list(trace_events)
+        self.trace_events = trace_events
+        self.policy = policy
+        self.config = config or SimulationConfig()
+        self.policy_fields = build_policy(policy, self.config).config_fields
+        events = len(self.trace_events)
+        run = simulate_iter(
+            self.trace_events,
+            policy,
+            self.config,
+            checkpoint_at=range(0, events + 1, checkpoint_every),
+            track_sensitivity=True,
+        )
+        timeline = Timeline.from_points(run)
+        self.base = run.result
+        self.base.timeline = timeline
+        self.checkpoints = run.checkpoints
+        self.reused_events = 0
+
+    def divergence(self, config: SimulationConfig) -> int:
+        """Leading events a run under ``config`` shares with the base run."""
+        return divergence(self.base, config, len(self.trace_events), self.policy_fields)
+
+    def simulate(self, config: SimulationConfig) -> SimResult:
+        """Equivalent of ``simulate(trace_events, policy, config)``; sets ``reused_events``."""
+        shared = self.divergence(config)
+        self.reused_events = 0
+        if shared == 0:
+            return simulate(self.trace_events, self.policy, config)
+        if shared >= len(self.trace_events):
+            self.reused_events = shared
+            base = self.base
+            # The caller owns what it gets back; nothing it can mutate is shared with the base.
+            return replace(
+                base,
+                config=config,
+                miss_mode=config.miss_mode,
+                sensitivity=None,
+                stats=dict(base.stats),
+                fragmentation=replace(base.fragmentation),
+                policy_metrics=dict(base.policy_metrics),
+                timeline=base.timeline.copy(),
+                final_free_extents=list(base.final_free_extents),
+                final_blocks=list(base.final_blocks),
+                compaction_steps=list(base.compaction_steps),
+                tier_stats=dict(base.tier_stats),
+            )
+        start = max(
+            (saved for saved in self.checkpoints if saved.events <= shared),
+            key=lambda saved: saved.events,
+        )
+        self.reused_events = start.events
+        run = simulate_iter(self.trace_events, self.policy, config, resume_from=start)
+        timeline = Timeline.from_points(chain(self.base.timeline[: start.points], run))
+        result = run.result
+        result.timeline = timeline
+        result.timeline_points = len(timeline)
+        return result
@@ -1,7 +1,20 @@
 from __future__ import annotations
+import os
+import bisect
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
+from memory.extent_index import FreeExtentIndex
+from memory.fragmentation import FragmentationTracker, FragMetrics
+from memory.placement import build_placement
+from memory.sharing import SharedRefs
+
+
+# Debug mode re-derives every counter from the block map after each mutation.
+# Enable it per instance, via HBM_SIM_DEBUG=1, or by flipping the class
+# attribute (the test suite does this in conftest.py).
+DEBUG_CHECKS = os.environ.get("HBM_SIM_DEBUG", "") not in ("", "0")
+
 
 class AllocationError(RuntimeError):
     """Raised when a strict allocation request cannot be satisfied."""
@@ -11,6 +24,10 @@ class DoubleFreeError(KeyError):
     """Raised when a strict free targets a non-resident object."""
 
 
+class AllocatorInvariantError(AssertionError):
+    """Raised by debug-mode checks when running counters drift from the block map."""
+
+
 @dataclass
 class Block:
     start: int
@@ -18,21 +35,167 @@ class Block:
     obj_id: str
 
 class ContiguousAllocator:
-    def __init__(self, capacity: int):
+    debug: bool = DEBUG_CHECKS
+    # ``make_room`` plans targeted moves, priced against ``compaction_cost``.
+    plans_room: bool = True
+
+    def __init__(self, capacity: int, placement: str = "first_fit", debug: bool | None = None):
         self.capacity = capacity
         self.blocks: Dict[str, Block] = {}
+        self._free = FreeExtentIndex(capacity)
+        self.frag = FragmentationTracker()
+        self._free.add_listener(self.frag)
+        self.placement = build_placement(placement, self._free)
+        self._used = 0
+        # start -> obj_id for non-empty blocks, so sweeps can walk address order.
+        self._by_start: Dict[int, str] = {}
+        # Resume point of the incremental compactor. It always sits on an
+        # extent or block boundary and everything below it is already packed.
+        self.compact_cursor = 0
+        # Aliases of shared blocks; ``blocks`` holds physical blocks only.
+        self.refs = SharedRefs()
+        self._listeners: list = []
+        if debug is not None:
+            self.debug = debug
+
+    def add_listener(self, listener):
+        """Register ``listener`` for block and free-extent changes.
+
+        ``block_added`` / ``block_removed`` receive ``(start, size, obj_id)`` and
+        ``extent_added`` / ``extent_removed`` receive ``(start, size)``. The
+        current map is replayed as additions first.
+        """
+        self._listeners.append(listener)
+        self._free.add_listener(listener)
+        for start, size, obj_id in self.spans():
+            listener.block_added(start, size, obj_id)
+
+    def _block_changed(self, old: Optional[Block], new: Optional[Block]):
+        for listener in self._listeners:
+            if old is not None:
+                listener.block_removed(old.start, old.size, old.obj_id)
+            if new is not None:
+                listener.block_added(new.start, new.size, new.obj_id)
 
     def alloc(self, obj_id: str, size: int) -> bool:
-        if obj_id in self.blocks:
+        if obj_id in self.blocks or obj_id in self.refs:
             return True
         start = self._find_free_extent(size)
         if start is None:
             return False
-        self.blocks[obj_id] = Block(start, size, obj_id)
+        self._free.take(start, size)
+        self._set_block(obj_id, start, size)
+        self._used += size
+        if self.debug:
+            self.check_consistency()
         return True
 
+    def _set_block(self, obj_id: str, start: int, size: int):
+        block = Block(start, size, obj_id)
+        if self._listeners:
+            self._block_changed(self.blocks.get(obj_id), block)
+        self.blocks[obj_id] = block
+        if size > 0:
+            self._by_start[start] = obj_id
+
+    def _move(self, block: Block, start: int, size: int | None = None):
+        """Relocate ``block`` (optionally resized) to the free extent beginning at ``start``."""
+        size = block.size if size is None else size
+        merged = self._free.release(block.start, block.size)
+        if block.size > 0:
+            del self._by_start[block.start]
+        self._free.take(start, size)
+        self._set_block(block.obj_id, start, size)
+        if merged < self.compact_cursor:
+            self.compact_cursor = merged
+
+    def grow(self, obj_id: str, size: int) -> Optional[int]:
+        """Grow a resident block to ``size`` bytes.
+
+        Extends in place when the following extent has room, otherwise moves
+        the block to a new extent. Returns the bytes copied (0 in place), or
+        None when no extent can hold the larger block.
+        """
+        if self.refs.is_shared(obj_id):
+            return self.unshare(obj_id, size)
+        block = self.blocks[obj_id]
+        extra = size - block.size
+        if extra <= 0:
+            return 0
+        end = block.start + block.size
+        if self._free.size_at(end) >= extra:
+            self._free.take(end, extra)
+            self._set_block(obj_id, block.start, size)
+            if self.compact_cursor == end:
+                self.compact_cursor = block.start
+            moved = 0
+        else:
+            start = self._find_free_extent(size)
+            if start is None:
+                return None
+            self._move(block, start, size)
+            moved = block.size
+        self._used += extra
+        if self.debug:
+            self.check_consistency()
+        return moved
+
+    def share(self, obj_id: str, src_id: str) -> bool:
+        """Make ``obj_id`` another reference to ``src_id``'s block; False if ``src_id`` is not resident."""
+        if self.in_mem(obj_id):
+            return True
+        if not self.in_mem(src_id):
+            return False
+        self.refs.add(obj_id, src_id)
+        return True
+
+    def refcount(self, obj_id: str) -> int:
+        return self.refs.refcount(obj_id) if self.in_mem(obj_id) else 0
+
+    def unshare(self, obj_id: str, size: int | None = None) -> Optional[int]:
+        """Copy-on-write: give ``obj_id`` a private block of ``size`` bytes.
+
+        Returns the bytes copied out of the shared block, or None when no
+        extent can hold the copy (the reference then stays shared).
+        """
+        shared = self.blocks[self.refs.resolve(obj_id)]
+        size = shared.size if size is None else max(size, shared.size)
+        start = self._find_free_extent(size)
+        if start is None:
+            return None
+        self.refs.detach(obj_id, self._rename)
+        self._free.take(start, size)
+        self._set_block(obj_id, start, size)
+        self._used += size
+        if self.debug:
+            self.check_consistency()
+        return shared.size
+
+    def _rename(self, obj_id: str, new_id: str):
+        block = self.blocks.pop(obj_id)
+        if self._listeners:
+            self._block_changed(block, None)
+        self._set_block(new_id, block.start, block.size)
+
     def free(self, obj_id: str):
-        self.blocks.pop(obj_id, None)
+        if self.refs.is_shared(obj_id):
+            # Only the last reference releases the bytes.
+            self.refs.detach(obj_id, self._rename)
+            if self.debug:
+                self.check_consistency()
+            return
+        block = self.blocks.pop(obj_id, None)
+        if block is not None:
+            if self._listeners:
+                self._block_changed(block, None)
+            merged = self._free.release(block.start, block.size)
+            if block.size > 0:
+                del self._by_start[block.start]
+            if merged < self.compact_cursor:
+                self.compact_cursor = merged
+            self._used -= block.size
+            if self.debug:
+                self.check_consistency()
 
     def alloc_or_raise(self, obj_id: str, size: int):
         if not self.alloc(obj_id, size):
@@ -40,39 +203,45 @@ class ContiguousAllocator:
             raise AllocationError(msg)
 
     def free_or_raise(self, obj_id: str):
-        if obj_id not in self.blocks:
+        if not self.in_mem(obj_id):
             raise DoubleFreeError(f"object {obj_id!r} is not resident")
         self.free(obj_id)
 
     def in_mem(self, obj_id: str) -> bool:
-        return obj_id in self.blocks
+        return obj_id in self.blocks or obj_id in self.refs
 
     def used(self) -> int:
-        return sum(b.size for b in self.blocks.values())
+        return self._used
 
     def free_bytes(self) -> int:
-        return self.capacity - self.used()
+        return self.capacity - self._used
+
+    def block_count(self) -> int:
+        return len(self.blocks)
+
+    def hole_count(self) -> int:
+        return len(self._free)
+
+    def internal_fragmentation(self) -> int:
+        return 0
 
     def extents_free(self) -> List[Tuple[int,int]]:
-        used = sorted(self.blocks.values(), key=lambda b: b.start)
-        ext=[]
-        cur=0
-        for b in used:
-            if b.start > cur:
-                ext.append((cur, b.start-cur))
-            cur = max(cur, b.start+b.size)
-        if cur < self.capacity:
-            ext.append((cur, self.capacity-cur))
-        return ext
+        return self._free.extents()
 
     def largest_free_extent(self) -> int:
-        return max((s for _,s in self.extents_free()), default=0)
+        return self._free.largest()
+
+    def metrics(self) -> FragMetrics:
+        return self.frag.metrics()
+
+    def spans(self) -> List[Tuple[int, int, str]]:
+        return [
+            (b.start, b.size, b.obj_id)
+            for b in sorted(self.blocks.values(), key=lambda b: b.start)
+        ]
 
     def _find_free_extent(self, size: int) -> Optional[int]:
-        for start, sz in self.extents_free():
-            if sz >= size:
-                return start
-        return None
+        return self.placement.find(size)
 
     def compact(self, reserve: int=0) -> int:
         moved=0
@@ -84,6 +253,183 @@ class ContiguousAllocator:
                 continue
             if b.start != cursor:
                 moved += b.size
-                self.blocks[b.obj_id] = Block(cursor, b.size, b.obj_id)
+                self._move(b, cursor)
             cursor += b.size
+        self.compact_cursor = 0
+        if self.debug:
+            self.check_consistency()
         return moved
+
+    def compaction_cost(self, reserve: int=0) -> int:
+        """Bytes a full ``compact(reserve)`` would move, without moving anything."""
+        cost = 0
+        cursor = 0
+        for b in sorted(self.blocks.values(), key=lambda b: b.start):
+            if cursor + b.size > self.capacity - reserve:
+                cursor = b.start + b.size
+                continue
+            if b.start != cursor:
+                cost += b.size
+            cursor += b.size
+        return cost
+
+    def plan_room(self, need: int, reserve: int=0) -> Optional[List[Tuple[str, int]]]:
+        """Cheapest ``(obj_id, new_start)`` moves that open a free extent of ``need`` bytes.
+
+        Every window of ``need`` bytes starting on a block or extent boundary
+        is priced by the resident bytes it overlaps. Windows are tried
+        cheapest first; a window is feasible when its blocks, largest first,
+        best-fit into free space outside it below ``capacity - reserve``.
+        Returns None when no window can be cleared.
+        """
+        if self._free.largest() >= need:
+            return []
+        segments = sorted(
+            [(start, size, None) for start, size in self._free.extents()]
+            + [(b.start, b.size, b.obj_id) for b in self.blocks.values() if b.size > 0]
+        )
+        resident = [0]
+        for start, size, obj_id in segments:
+            resident.append(resident[-1] + (size if obj_id is not None else 0))
+        total_free = self.free_bytes()
+        candidates = []
+        j = 0
+        for i, (start, _, _) in enumerate(segments):
+            end = start + need
+            if end > self.capacity:
+                break
+            j = max(j, i)
+            while segments[j][0] + segments[j][1] < end:
+                j += 1
+            cost = resident[j + 1] - resident[i]
+            window_free = (end - start) - cost
+            if segments[j][2] is not None:
+                window_free += segments[j][0] + segments[j][1] - end
+            if cost <= total_free - window_free:
+                candidates.append((cost, start, i, j))
+        limit = self.capacity - reserve
+        for cost, start, i, j in sorted(candidates):
+            moves = self._fit_outside(segments, i, j, start + need, limit)
+            if moves is not None:
+                return moves
+        return None
+
+    def _fit_outside(self, segments, i: int, j: int, end: int, limit: int) -> Optional[List[Tuple[str, int]]]:
+        holes = []
+        for k, (start, size, obj_id) in enumerate(segments):
+            if obj_id is not None:
+                continue
+            if i <= k <= j:
+                if k != j or start + size <= end:
+                    continue
+                size -= end - start
+                start = end
+            size = min(start + size, limit) - start
+            if size > 0:
+                holes.append((size, start))
+        holes.sort()
+        inside = [seg for seg in segments[i:j + 1] if seg[2] is not None]
+        moves: List[Tuple[str, int]] = []
+        for _, size, obj_id in sorted(inside, key=lambda seg: -seg[1]):
+            pos = bisect.bisect_left(holes, (size, -1))
+            if pos == len(holes):
+                return None
+            hole_size, hole_start = holes.pop(pos)
+            moves.append((obj_id, hole_start))
+            if hole_size > size:
+                bisect.insort(holes, (hole_size - size, hole_start + size))
+        return moves
+
+    def make_room(self, need: int, reserve: int=0, max_bytes: int | None = None) -> Optional[int]:
+        """Open a free extent of ``need`` bytes with the moves chosen by ``plan_room``.
+
+        Returns the bytes moved, or None (touching nothing) when no plan
+        exists or the cheapest plan would move more than ``max_bytes``.
+        """
+        moves = self.plan_room(need, reserve)
+        if moves is None:
+            return None
+        moved = sum(self.blocks[obj_id].size for obj_id, _ in moves)
+        if max_bytes is not None and moved > max_bytes:
+            return None
+        for obj_id, start in moves:
+            self._move(self.blocks[obj_id], start)
+        if self.debug:
+            self.check_consistency()
+        return moved
+
+    def compact_step(self, max_bytes: int, reserve: int=0) -> int:
+        """Resume the left-packing sweep, moving at most ``max_bytes`` this call.
+
+        The sweep walks address order from ``compact_cursor`` and slides each
+        block down into the hole in front of it, stopping before a move would
+        exceed the budget. Blocks that would cross into the reserve, or that
+        are larger than the whole per-call budget, are skipped. The cursor
+        wraps to 0 once the sweep reaches the end of HBM. Returns bytes moved.
+        """
+        moved = 0
+        cursor = self.compact_cursor
+        limit = self.capacity - reserve
+        while cursor < self.capacity:
+            hole = self._free.size_at(cursor)
+            if hole == 0:
+                cursor += self.blocks[self._by_start[cursor]].size
+                continue
+            obj_id = self._by_start.get(cursor + hole)
+            if obj_id is None:
+                cursor = self.capacity
+                break
+            b = self.blocks[obj_id]
+            if cursor + b.size > limit or b.size > max_bytes:
+                cursor = b.start + b.size
+                continue
+            if moved + b.size > max_bytes:
+                break
+            self._move(b, cursor)
+            moved += b.size
+            cursor += b.size
+        self.compact_cursor = 0 if cursor >= self.capacity else cursor
+        if self.debug:
+            self.check_consistency()
+        return moved
+
+    def compaction_pending(self) -> bool:
+        return self.compact_cursor != 0
+
+    def fragmentation_debt(self) -> int:
+        """Free bytes stranded outside the largest free extent."""
+        return self.free_bytes() - self._free.largest()
+
+    def check_consistency(self):
+        """Recompute occupancy and free extents from scratch and compare."""
+        used = 0
+        cursor = 0
+        extents = []
+        for b in sorted(self.blocks.values(), key=lambda b: b.start):
+            if b.size == 0:
+                # A zero-size block occupies nothing, so it cannot split a hole.
+                continue
+            if b.start < cursor:
+                raise AllocatorInvariantError(f"block {b.obj_id!r} overlaps its predecessor")
+            if b.start > cursor:
+                extents.append((cursor, b.start - cursor))
+            cursor = max(cursor, b.start + b.size)
+            used += b.size
+        if cursor > self.capacity:
+            raise AllocatorInvariantError(f"blocks extend to {cursor} past capacity {self.capacity}")
+        if cursor < self.capacity:
+            extents.append((cursor, self.capacity - cursor))
+        if used != self._used:
+            raise AllocatorInvariantError(f"used counter {self._used} != scanned {used}")
+        if extents != self._free.extents():
+            raise AllocatorInvariantError("free-extent index diverged from the block map")
+        if not self.frag.matches(extents):
+            raise AllocatorInvariantError("fragmentation tracker diverged from the free extents")
+        if len(extents) != self.hole_count():
+            raise AllocatorInvariantError(f"hole counter {self.hole_count()} != {len(extents)}")
+        by_start = {b.start: b.obj_id for b in self.blocks.values() if b.size > 0}
+        if by_start != self._by_start:
+            raise AllocatorInvariantError("start index diverged from the block map")
+        if not self.refs.check(self.blocks):
+            raise AllocatorInvariantError("shared references point at missing blocks")
+
@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from memory.allocator import (
+    DEBUG_CHECKS,
+    AllocationError,
+    AllocatorInvariantError,
+    Block,
+    DoubleFreeError,
+)
+from memory.fragmentation import FragmentationTracker, FragMetrics
+from memory.sharing import SharedRefs
+
+
+def _default_min_block(capacity: int) -> int:
+    # Keep the order-0 bitmap at or below 64K bits so bitmap updates stay cheap.
+    return 1 << max(0, ((capacity - 1) >> 16).bit_length())
+
+
+class BuddyAllocator:
+    """Binary buddy allocator over power-of-two regions.
+
+    Requests are rounded up to ``min_block << order``. Each order keeps a free
+    bitmap (an int whose bit ``i`` marks block ``i`` of that order free) and a
+    mask of non-empty orders, so alloc picks the lowest free block of the
+    smallest sufficient order and free coalesces with its buddy by bit tests,
+    neither of which scans resident blocks. A capacity that is not a power of
+    two is carved into one top-level region per set bit.
+
+    ``blocks`` holds the rounded regions; the bytes lost to rounding are
+    reported by ``internal_fragmentation()``. ``extents_free()`` lists the
+    free buddy blocks themselves (not merged across buddy boundaries) since
+    those are the only extents an allocation can use.
+    """
+
+    debug: bool = DEBUG_CHECKS
+    plans_room: bool = False
+
+    def __init__(self, capacity: int, min_block: int | None = None, debug: bool | None = None):
+        self.capacity = capacity
+        self.min_block = min_block or _default_min_block(capacity)
+        if self.min_block & (self.min_block - 1):
+            raise ValueError(f"min_block must be a power of two, got {self.min_block}")
+        self.units = capacity // self.min_block
+        self.max_order = max(0, self.units.bit_length() - 1)
+        self.blocks: Dict[str, Block] = {}
+        self._order: Dict[str, int] = {}
+        self._requested: Dict[str, int] = {}
+        self._used = 0
+        self._internal = 0
+        self._view: Optional[List[Tuple[int, int]]] = None
+        self.refs = SharedRefs()
+        self._listeners: list = []
+        if debug is not None:
+            self.debug = debug
+        self._reset_free()
+
+    def add_listener(self, listener):
+        """Register ``listener`` for block and free-buddy changes, as ``ContiguousAllocator`` does."""
+        self._listeners.append(listener)
+        for start, size in self.extents_free():
+            listener.extent_added(start, size)
+        for start, size, obj_id in self.spans():
+            listener.block_added(start, size, obj_id)
+
+    def _block_changed(self, old: Optional[Block], new: Optional[Block]):
+        for listener in self._listeners:
+            if old is not None:
+                listener.block_removed(old.start, old.size, old.obj_id)
+            if new is not None:
+                listener.block_added(new.start, new.size, new.obj_id)
+
+    def _reset_free(self):
+        self._bits = [0] * (self.max_order + 1)
+        self._orders = 0
+        self.frag = FragmentationTracker()
+        offset = 0
+        for order in range(self.max_order, -1, -1):
+            if self.units >> order & 1:
+                self._set_free(order, offset >> order)
+                offset += 1 << order
+        self._view = None
+
+    def _set_free(self, order: int, index: int):
+        self._bits[order] |= 1 << index
+        self._orders |= 1 << order
+        span = self.min_block << order
+        self.frag.extent_added(index * span, span)
+        for listener in self._listeners:
+            listener.extent_added(index * span, span)
+
+    def _clear_free(self, order: int, index: int):
+        bits = self._bits[order] & ~(1 << index)
+        self._bits[order] = bits
+        if not bits:
+            self._orders &= ~(1 << order)
+        span = self.min_block << order
+        self.frag.extent_removed(index * span, span)
+        for listener in self._listeners:
+            listener.extent_removed(index * span, span)
+
+    def order_for(self, size: int) -> int:
+        units = max(1, -(-size // self.min_block))
+        return (units - 1).bit_length()
+
+    def alloc(self, obj_id: str, size: int) -> bool:
+        if obj_id in self.blocks or obj_id in self.refs:
+            return True
+        order = self.order_for(size)
+        index = self._take(order)
+        if index is None:
+            return False
+        self._place(obj_id, size, order, index)
+        return True
+
+    def _lowest_free(self, order: int) -> Optional[Tuple[int, int]]:
+        """``(order, index)`` of the lowest free block of the smallest order >= ``order``."""
+        candidates = self._orders >> order
+        if order > self.max_order or not candidates:
+            return None
+        found = order + (candidates & -candidates).bit_length() - 1
+        bits = self._bits[found]
+        return found, (bits & -bits).bit_length() - 1
+
+    def _take(self, order: int) -> Optional[int]:
+        """Claim the lowest free block of the smallest order >= ``order``, splitting it down."""
+        lowest = self._lowest_free(order)
+        if lowest is None:
+            return None
+        found, index = lowest
+        self._clear_free(found, index)
+        while found > order:
+            found -= 1
+            index <<= 1
+            self._set_free(found, index | 1)
+        self._view = None
+        return index
+
+    def _place(self, obj_id: str, size: int, order: int, index: int):
+        rounded = self.min_block << order
+        block = self.blocks[obj_id] = Block((index << order) * self.min_block, rounded, obj_id)
+        if self._listeners:
+            self._block_changed(None, block)
+        self._order[obj_id] = order
+        self._requested[obj_id] = size
+        self._used += rounded
+        self._internal += rounded - size
+        self._view = None
+        if self.debug:
+            self.check_consistency()
+
+    def grow(self, obj_id: str, size: int) -> Optional[int]:
+        """Grow ``obj_id`` to ``size`` bytes, moving it if it outgrows its order.
+
+        Returns the bytes copied (0 if the rounded block already fits), or None
+        when no block of the new order is free.
+        """
+        if self.refs.is_shared(obj_id):
+            return self.unshare(obj_id, size)
+        order = self._order[obj_id]
+        new_order = max(order, self.order_for(size))
+        block = self.blocks[obj_id]
+        if new_order == order:
+            if size > self._requested[obj_id]:
+                self._internal -= size - self._requested[obj_id]
+                self._requested[obj_id] = size
+            return 0
+        index = self._take(new_order)
+        if index is None:
+            return None
+        self._unplace(obj_id)
+        self._place(obj_id, size, new_order, index)
+        return block.size
+
+    def share(self, obj_id: str, src_id: str) -> bool:
+        if self.in_mem(obj_id):
+            return True
+        if not self.in_mem(src_id):
+            return False
+        self.refs.add(obj_id, src_id)
+        return True
+
+    def refcount(self, obj_id: str) -> int:
+        return self.refs.refcount(obj_id) if self.in_mem(obj_id) else 0
+
+    def unshare(self, obj_id: str, size: int | None = None) -> Optional[int]:
+        """Copy-on-write into a private buddy block; returns bytes copied or None."""
+        owner = self.refs.resolve(obj_id)
+        size = self._requested[owner] if size is None else max(size, self._requested[owner])
+        order = self.order_for(size)
+        index = self._take(order)
+        if index is None:
+            return None
+        copied = self.blocks[owner].size
+        self.refs.detach(obj_id, self._rename)
+        self._place(obj_id, size, order, index)
+        return copied
+
+    def _rename(self, obj_id: str, new_id: str):
+        block = self.blocks.pop(obj_id)
+        renamed = self.blocks[new_id] = Block(block.start, block.size, new_id)
+        if self._listeners:
+            self._block_changed(block, renamed)
+        self._order[new_id] = self._order.pop(obj_id)
+        self._requested[new_id] = self._requested.pop(obj_id)
+
+    def free(self, obj_id: str):
+        if self.refs.is_shared(obj_id):
+            self.refs.detach(obj_id, self._rename)
+            return
+        if obj_id not in self.blocks:
+            return
+        self._unplace(obj_id)
+        if self.debug:
+            self.check_consistency()
+
+    def _unplace(self, obj_id: str):
+        block = self.blocks.pop(obj_id)
+        if self._listeners:
+            self._block_changed(block, None)
+        order = self._order.pop(obj_id)
+        self._used -= block.size
+        self._internal -= block.size - self._requested.pop(obj_id)
+        self._release(block.start // self.min_block >> order, order)
+
+    def _release(self, index: int, order: int):
+        while order < self.max_order:
+            buddy = index ^ 1
+            if not self._bits[order] >> buddy & 1:
+                break
+            self._clear_free(order, buddy)
+            index >>= 1
+            order += 1
+        self._set_free(order, index)
+        self._view = None
+
+    def alloc_or_raise(self, obj_id: str, size: int):
+        if not self.alloc(obj_id, size):
+            msg = f"no free buddy block for {obj_id!r} ({size} bytes)"
+            raise AllocationError(msg)
+
+    def free_or_raise(self, obj_id: str):
+        if not self.in_mem(obj_id):
+            raise DoubleFreeError(f"object {obj_id!r} is not resident")
+        self.free(obj_id)
+
+    def in_mem(self, obj_id: str) -> bool:
+        return obj_id in self.blocks or obj_id in self.refs
+
+    def used(self) -> int:
+        return self._used
+
+    def free_bytes(self) -> int:
+        # Bytes past the last whole min_block can never be allocated.
+        return self.units * self.min_block - self._used
+
+    def block_count(self) -> int:
+        return len(self.blocks)
+
+    def hole_count(self) -> int:
+        return sum(bits.bit_count() for bits in self._bits)
+
+    def internal_fragmentation(self) -> int:
+        return self._internal
+
+    def extents_free(self) -> List[Tuple[int, int]]:
+        if self._view is None:
+            out = []
+            for order, bits in enumerate(self._bits):
+                span = self.min_block << order
+                while bits:
+                    low = bits & -bits
+                    out.append(((low.bit_length() - 1) * span, span))
+                    bits ^= low
+            out.sort()
+            self._view = out
+        return list(self._view)
+
+    def metrics(self) -> FragMetrics:
+        return self.frag.metrics(self._internal)
+
+    def spans(self) -> List[Tuple[int, int, str]]:
+        return [
+            (b.start, b.size, b.obj_id)
+            for b in sorted(self.blocks.values(), key=lambda b: b.start)
+        ]
+
+    def largest_free_extent(self) -> int:
+        return 0 if not self._orders else self.min_block << (self._orders.bit_length() - 1)
+
+    def compact(self, reserve: int = 0) -> int:
+        """Repack every block largest-first from address 0.
+
+        Power-of-two blocks placed in descending size order land back to back,
+        so the free space ends up in as few buddy blocks as the capacity allows.
+        ``reserve`` is accepted for interface parity; the repack never grows the
+        occupied prefix. Returns the bytes of blocks whose address changed.
+        """
+        before = (self.spans(), self.extents_free()) if self._listeners else None
+        previous = (list(self._bits), self._orders, self.frag)
+        layout = self._repack()
+        if layout is None:
+            self._bits, self._orders, self.frag = previous
+            self._view = None
+            return 0
+        moved = 0
+        for obj_id, start in layout.items():
+            block = self.blocks[obj_id]
+            if start != block.start:
+                moved += block.size
+                self.blocks[obj_id] = Block(start, block.size, obj_id)
+        if before is not None:
+            # The repack rebuilt the bitmaps silently; report it as the old map
+            # giving way to the new one.
+            after = (self.spans(), self.extents_free())
+            for listener in self._listeners:
+                for span in before[0]:
+                    listener.block_removed(*span)
+                for extent in before[1]:
+                    listener.extent_removed(*extent)
+                for span in after[0]:
+                    listener.block_added(*span)
+                for extent in after[1]:
+                    listener.extent_added(*extent)
+        if self.debug:
+            self.check_consistency()
+        return moved
+
+    def _repack(self) -> Optional[Dict[str, int]]:
+        """Rebuild the free bitmaps with every block placed largest-first; returns new starts."""
+        order_of = self._order
+        residents = sorted(self.blocks.values(), key=lambda b: (-order_of[b.obj_id], b.start))
+        # Listeners hear about the scratch bitmaps only through ``compact``.
+        listeners, self._listeners = self._listeners, []
+        try:
+            self._reset_free()
+            layout: Dict[str, int] = {}
+            for block in residents:
+                order = order_of[block.obj_id]
+                index = self._take(order)
+                if index is None:
+                    return None
+                layout[block.obj_id] = (index << order) * self.min_block
+            return layout
+        finally:
+            self._listeners = listeners
+
+    def compaction_cost(self, reserve: int = 0) -> int:
+        """Bytes ``compact()`` would move, computed on scratch bitmaps."""
+        previous = (list(self._bits), self._orders, self.frag)
+        layout = self._repack()
+        self._bits, self._orders, self.frag = previous
+        self._view = None
+        if layout is None:
+            return 0
+        return sum(b.size for b in self.blocks.values() if layout[b.obj_id] != b.start)
+
+    def make_room(self, need: int, reserve: int = 0, max_bytes: int | None = None) -> Optional[int]:
+        """No targeted plan: a larger buddy only forms by clearing a whole aligned group.
+
+        Returns 0 when a free block of the needed order already exists and None
+        otherwise, so callers fall back to ``compact()``.
+        """
+        return 0 if self.largest_free_extent() >= need else None
+
+    def compact_step(self, max_bytes: int, reserve: int = 0) -> int:
+        """Move blocks from the top of HBM into lower free buddies of their order.
+
+        Works highest address first and stops before exceeding ``max_bytes``.
+        Each move frees a high block that can then coalesce with its buddy.
+        """
+        moved = 0
+        for block in sorted(self.blocks.values(), key=lambda b: -b.start):
+            if moved + block.size > max_bytes:
+                break
+            order = self._order[block.obj_id]
+            index = self._take(order)
+            if index is None:
+                break
+            start = (index << order) * self.min_block
+            if start > block.start:
+                self._release(index, order)
+                break
+            size = self._requested[block.obj_id]
+            self._unplace(block.obj_id)
+            self._place(block.obj_id, size, order, index)
+            moved += block.size
+        return moved
+
+    def compaction_pending(self) -> bool:
+        """Whether ``compact_step`` can still move the highest block to a lower buddy."""
+        if not self.blocks:
+            return False
+        top = max(self.blocks.values(), key=lambda b: b.start)
+        lowest = self._lowest_free(self._order[top.obj_id])
+        return lowest is not None and (lowest[1] << lowest[0]) * self.min_block < top.start
+
+    def fragmentation_debt(self) -> int:
+        return self.free_bytes() - self.largest_free_extent()
+
+    def check_consistency(self):
+        """Verify that free buddy blocks and resident blocks tile the managed range."""
+        spans = sorted(
+            [(b.start, b.size) for b in self.blocks.values()] + self.extents_free()
+        )
+        cursor = 0
+        for start, size in spans:
+            if start != cursor:
+                raise AllocatorInvariantError(f"gap or overlap at {cursor} (next span {start})")
+            cursor += size
+        if cursor != self.units * self.min_block:
+            raise AllocatorInvariantError(f"spans end at {cursor}, expected {self.units * self.min_block}")
+        if self._used != sum(b.size for b in self.blocks.values()):
+            raise AllocatorInvariantError("used counter diverged from the block map")
+        if not self.frag.matches(self.extents_free()):
+            raise AllocatorInvariantError("fragmentation tracker diverged from the free extents")
+        if not self.refs.check(self.blocks):
+            raise AllocatorInvariantError("shared references point at missing blocks")
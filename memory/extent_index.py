@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import random
+from typing import List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("start", "size", "prio", "left", "right", "max_size")
+
+    def __init__(self, start: int, size: int, prio: float):
+        self.start = start
+        self.size = size
+        self.prio = prio
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.max_size = size
+
+
+def _max_of(node: Optional[_Node]) -> int:
+    return node.max_size if node is not None else 0
+
+
+def _pull(node: _Node):
+    node.max_size = max(node.size, _max_of(node.left), _max_of(node.right))
+
+
+def _split(node: Optional[_Node], key: int) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into (starts < key, starts >= key)."""
+    if node is None:
+        return None, None
+    if node.start < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _pull(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _pull(node)
+    return left, node
+
+
+def _merge(a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        _pull(a)
+        return a
+    b.left = _merge(a, b.left)
+    _pull(b)
+    return b
+
+
+def _ceiling(node: Optional[_Node], key: int) -> Optional[_Node]:
+    best = None
+    while node is not None:
+        if node.start >= key:
+            best = node
+            node = node.left
+        else:
+            node = node.right
+    return best
+
+
+def _floor(node: Optional[_Node], key: int) -> Optional[_Node]:
+    best = None
+    while node is not None:
+        if node.start <= key:
+            best = node
+            node = node.right
+        else:
+            node = node.left
+    return best
+
+
+def _first_fit_from(node: Optional[_Node], addr: int, size: int) -> Optional[_Node]:
+    if node is None or node.max_size < size:
+        return None
+    if node.start < addr:
+        return _first_fit_from(node.right, addr, size)
+    found = _first_fit_from(node.left, addr, size)
+    if found is not None:
+        return found
+    if node.size >= size:
+        return node
+    return _first_fit_from(node.right, addr, size)
+
+
+class OrderedKeys:
+    """Ordered set of integer keys (a plain treap) with ceiling lookup."""
+
+    def __init__(self, seed: int = 0x5EED):
+        self._root: Optional[_Node] = None
+        self._count = 0
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, key: int):
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key, 0, self._rng.random())), right)
+        self._count += 1
+
+    def discard(self, key: int):
+        left, rest = _split(self._root, key)
+        mid, right = _split(rest, key + 1)
+        if mid is not None:
+            self._count -= 1
+        self._root = _merge(left, right)
+
+    def ceiling(self, key: int) -> Optional[int]:
+        node = _ceiling(self._root, key)
+        return None if node is None else node.start
+
+
+class FreeExtentIndex:
+    """Address-ordered index of coalesced free extents.
+
+    Extents live in a treap keyed by start address and augmented with the
+    largest extent size in each subtree, so first-fit lookup is a single
+    root-to-leaf descent and the largest free extent is read off the root.
+    Two hash maps (start -> size, end -> start) make neighbour coalescing on
+    release O(1) before the tree is touched.
+
+    Listeners registered with ``add_listener`` receive ``extent_added`` and
+    ``extent_removed`` callbacks for every change, which lets placement
+    engines keep their own secondary indexes in step.
+    """
+
+    def __init__(self, capacity: int, seed: int = 0x5EED):
+        self.capacity = capacity
+        self._root: Optional[_Node] = None
+        self._sizes: dict[int, int] = {}
+        self._ends: dict[int, int] = {}
+        self._rng = random.Random(seed)
+        self._view: Optional[List[Tuple[int, int]]] = None
+        self._listeners: list = []
+        if capacity > 0:
+            self._insert(0, capacity)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, start: int) -> bool:
+        return start in self._sizes
+
+    def size_at(self, start: int) -> int:
+        return self._sizes.get(start, 0)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+        for start, size in self.extents():
+            listener.extent_added(start, size)
+
+    def largest(self) -> int:
+        return _max_of(self._root)
+
+    def extents(self) -> List[Tuple[int, int]]:
+        if self._view is None:
+            out: List[Tuple[int, int]] = []
+            stack: List[_Node] = []
+            node = self._root
+            while stack or node is not None:
+                while node is not None:
+                    stack.append(node)
+                    node = node.left
+                node = stack.pop()
+                out.append((node.start, node.size))
+                node = node.right
+            self._view = out
+        return list(self._view)
+
+    def first_fit(self, size: int) -> Optional[int]:
+        node = self._root
+        if node is None or node.max_size < size:
+            return None
+        while node is not None:
+            if node.left is not None and node.left.max_size >= size:
+                node = node.left
+            elif node.size >= size:
+                return node.start
+            else:
+                node = node.right
+        return None
+
+    def first_fit_from(self, addr: int, size: int) -> Optional[int]:
+        """Lowest-addressed extent starting at or after ``addr`` that fits ``size``."""
+        node = _first_fit_from(self._root, addr, size)
+        return None if node is None else node.start
+
+    def take(self, start: int, size: int):
+        """Claim ``[start, start + size)``, which must lie inside one free extent.
+
+        The common case claims the front of the extent at ``start``; a range in
+        the middle of an extent splits it in two.
+        """
+        if size <= 0:
+            return
+        have = self._sizes.get(start)
+        if have is None:
+            node = _floor(self._root, start)
+            if node is None or node.start + node.size < start + size:
+                raise ValueError(f"[{start}, {start + size}) is not inside a free extent")
+            ext_start, ext_end = node.start, node.start + node.size
+            self._rekey(ext_start, ext_start, start - ext_start)
+            if ext_end > start + size:
+                self._insert(start + size, ext_end - start - size)
+            return
+        if size > have:
+            raise ValueError(f"extent at {start} has {have} bytes, cannot take {size}")
+        if size == have:
+            self._delete(start)
+        else:
+            self._rekey(start, start + size, have - size)
+
+    def release(self, start: int, size: int) -> int:
+        """Return ``[start, start + size)`` to the index, coalescing neighbours.
+
+        Returns the start of the (possibly merged) free extent now covering ``start``.
+        """
+        if size <= 0:
+            return start
+        end = start + size
+        prev_start = self._ends.get(start)
+        next_size = self._sizes.get(end)
+        if prev_start is not None and next_size is not None:
+            self._delete(end)
+            self._rekey(prev_start, prev_start, self._sizes[prev_start] + size + next_size)
+            return prev_start
+        if prev_start is not None:
+            self._rekey(prev_start, prev_start, self._sizes[prev_start] + size)
+            return prev_start
+        if next_size is not None:
+            self._rekey(end, start, size + next_size)
+        else:
+            self._insert(start, size)
+        return start
+
+    def _insert(self, start: int, size: int):
+        left, right = _split(self._root, start)
+        node = _Node(start, size, self._rng.random())
+        self._root = _merge(_merge(left, node), right)
+        self._sizes[start] = size
+        self._ends[start + size] = start
+        self._view = None
+        for listener in self._listeners:
+            listener.extent_added(start, size)
+
+    def _delete(self, start: int):
+        left, rest = _split(self._root, start)
+        _, right = _split(rest, start + 1)
+        self._root = _merge(left, right)
+        size = self._sizes.pop(start)
+        del self._ends[start + size]
+        self._view = None
+        for listener in self._listeners:
+            listener.extent_removed(start, size)
+
+    def _rekey(self, start: int, new_start: int, new_size: int):
+        # Callers only move a key within the gap to its neighbours, so the
+        # node keeps its in-order position and only the path maxima change.
+        path: List[_Node] = []
+        node = self._root
+        while node is not None and node.start != start:
+            path.append(node)
+            node = node.left if start < node.start else node.right
+        if node is None:
+            raise KeyError(start)
+        old_size = self._sizes.pop(start)
+        del self._ends[start + old_size]
+        node.start = new_start
+        node.size = new_size
+        self._sizes[new_start] = new_size
+        self._ends[new_start + new_size] = new_start
+        _pull(node)
+        for parent in reversed(path):
+            _pull(parent)
+        self._view = None
+        for listener in self._listeners:
+            listener.extent_removed(start, old_size)
+            listener.extent_added(new_start, new_size)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from collections import Counter
 from typing import List, Tuple
+import heapq
 import math
 
 @dataclass
@@ -10,6 +12,7 @@ class FragMetrics:
     external_frag: float
     entropy: float
     hole_count: int
+    internal_frag: int = 0
 
 def _entropy(ext_sizes: List[int]) -> float:
     total = sum(ext_sizes)
@@ -18,11 +21,82 @@ def _entropy(ext_sizes: List[int]) -> float:
     ps = [s/total for s in ext_sizes if s>0]
     return -sum(p*math.log(p+1e-12, 2) for p in ps)
 
-def compute_metrics(free_extents: List[Tuple[int,int]]) -> FragMetrics:
+def compute_metrics(free_extents: List[Tuple[int,int]], internal_frag: int=0) -> FragMetrics:
     sizes=[s for _,s in free_extents if s>0]
     total_free=sum(sizes)
     lfe=max(sizes, default=0)
     holes=len(sizes)
     external = 0.0 if total_free==0 else max(0.0, 1.0 - (lfe/total_free))
     ent=_entropy(sizes)
-    return FragMetrics(total_free, lfe, external, ent, holes)
+    return FragMetrics(total_free, lfe, external, ent, holes, internal_frag)
+
+class FragmentationTracker:
+    """Running fragmentation metrics fed by extent add/remove callbacks.
+
+    Registered as a listener on an allocator's free-extent index, it keeps the
+    total free bytes, hole count, a size multiset with a lazily cleaned max-heap
+    for the largest extent, and the running sum of ``s * log2(s)``. Entropy then
+    follows from ``H = log2(T) - sum(s * log2(s)) / T``, so ``metrics()`` is O(1)
+    apart from discarding stale heap entries.
+    """
+
+    def __init__(self):
+        self.total_free = 0
+        self.hole_count = 0
+        self._sizes: Counter[int] = Counter()
+        self._heap: List[int] = []
+        self._slogs = 0.0
+
+    def extent_added(self, start: int, size: int):
+        if size <= 0:
+            return
+        self.total_free += size
+        self.hole_count += 1
+        self._slogs += size * math.log2(size)
+        if self._sizes[size] == 0:
+            heapq.heappush(self._heap, -size)
+        self._sizes[size] += 1
+
+    def extent_removed(self, start: int, size: int):
+        if size <= 0:
+            return
+        self.total_free -= size
+        self.hole_count -= 1
+        self._slogs -= size * math.log2(size)
+        left = self._sizes[size] - 1
+        if left:
+            self._sizes[size] = left
+        else:
+            del self._sizes[size]
+
+    def largest(self) -> int:
+        heap = self._heap
+        sizes = self._sizes
+        while heap and -heap[0] not in sizes:
+            heapq.heappop(heap)
+        if len(heap) > 2 * len(sizes) + 16:
+            # Sizes that went stale below the top are only dropped here.
+            self._heap = heap = [-size for size in sizes]
+            heapq.heapify(heap)
+        return -heap[0] if heap else 0
+
+    def entropy(self) -> float:
+        if self.hole_count <= 1:
+            return 0.0
+        total = self.total_free
+        return max(0.0, math.log2(total) - self._slogs / total)
+
+    def matches(self, free_extents: List[Tuple[int, int]]) -> bool:
+        """True when the running counters agree with a freshly scanned extent list."""
+        sizes = [s for _, s in free_extents if s > 0]
+        return (self.total_free, self.hole_count, self.largest()) == (
+            sum(sizes),
+            len(sizes),
+            max(sizes, default=0),
+        )
+
+    def metrics(self, internal_frag: int = 0) -> FragMetrics:
+        total_free = self.total_free
+        lfe = self.largest()
+        external = 0.0 if total_free == 0 else max(0.0, 1.0 - (lfe / total_free))
+        return FragMetrics(total_free, lfe, external, self.entropy(), self.hole_count, internal_frag)
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from memory.allocator import (
+    DEBUG_CHECKS,
+    AllocationError,
+    AllocatorInvariantError,
+    DoubleFreeError,
+)
+from memory.extent_index import FreeExtentIndex
+from memory.fragmentation import FragmentationTracker, FragMetrics
+from memory.sharing import SharedRefs
+
+
+# Smallest default page: below this a paged allocator degenerates into a byte-granular one.
+MIN_PAGE_SIZE = 16
+
+
+def _default_page_size(capacity: int) -> int:
+    return max(1, min(capacity, max(MIN_PAGE_SIZE, capacity >> 10)))
+
+
+class PagedAllocator:
+    """Fixed-size page allocator with a block table per object.
+
+    Models a paged KV cache: every object owns a list of page numbers (its
+    block table) drawn from an array-backed free-page stack, so alloc and free
+    cost O(pages) and never search for a contiguous extent. ``grow`` appends
+    pages to an existing table instead of reallocating. Pages need not be
+    adjacent, which is why ``compact`` is a no-op here; the only loss is the
+    slack in each object's last page, reported by ``internal_fragmentation()``.
+    ``extents_free()`` describes runs of physically adjacent free pages, kept
+    in a ``FreeExtentIndex`` so fragmentation metrics update page by page.
+    """
+
+    debug: bool = DEBUG_CHECKS
+    plans_room: bool = False
+
+    def __init__(self, capacity: int, page_size: int | None = None, debug: bool | None = None):
+        self.capacity = capacity
+        self.page_size = page_size or _default_page_size(capacity)
+        self.page_count = capacity // self.page_size
+        # Stack top is the end of the array; seed it so low pages are handed out first.
+        self._free_pages = array("l", range(self.page_count - 1, -1, -1))
+        self.tables: Dict[str, array] = {}
+        self._runs: Dict[str, List[Tuple[int, int]]] = {}
+        self._spans: Optional[List[Tuple[int, int, str]]] = None
+        self._requested: Dict[str, int] = {}
+        self._internal = 0
+        self._free_runs = FreeExtentIndex(self.page_count * self.page_size)
+        self.frag = FragmentationTracker()
+        self._free_runs.add_listener(self.frag)
+        self.refs = SharedRefs()
+        self._listeners: list = []
+        if debug is not None:
+            self.debug = debug
+
+    def add_listener(self, listener):
+        """Register ``listener`` for block and free-run changes, as ``ContiguousAllocator`` does.
+
+        Blocks are the ``spans()`` runs, so one object can report several.
+        """
+        self._listeners.append(listener)
+        self._free_runs.add_listener(listener)
+        for start, size, obj_id in self.spans():
+            listener.block_added(start, size, obj_id)
+
+    def _runs_changed(self, removed, added):
+        """Announce ``(obj_id, first_page, count)`` runs leaving and joining the map."""
+        page_size = self.page_size
+        for listener in self._listeners:
+            for obj_id, first, count in removed:
+                listener.block_removed(first * page_size, count * page_size, obj_id)
+            for obj_id, first, count in added:
+                listener.block_added(first * page_size, count * page_size, obj_id)
+
+    def pages_for(self, size: int) -> int:
+        return -(-max(size, 0) // self.page_size)
+
+    def _pop_pages(self, count: int) -> array:
+        stack = self._free_pages
+        pages = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        pages.reverse()
+        page_size = self.page_size
+        for page in pages:
+            self._free_runs.take(page * page_size, page_size)
+        self._spans = None
+        return pages
+
+    def alloc(self, obj_id: str, size: int) -> bool:
+        if obj_id in self.tables or obj_id in self.refs:
+            return True
+        count = self.pages_for(size)
+        if count > len(self._free_pages):
+            return False
+        pages = self._pop_pages(count)
+        self.tables[obj_id] = pages
+        runs = self._runs[obj_id] = _runs(pages)
+        if self._listeners:
+            self._runs_changed((), [(obj_id, *run) for run in runs])
+        self._requested[obj_id] = size
+        self._internal += count * self.page_size - size
+        if self.debug:
+            self.check_consistency()
+        return True
+
+    def grow(self, obj_id: str, size: int) -> Optional[int]:
+        """Extend ``obj_id`` to ``size`` bytes by appending pages; nothing is copied.
+
+        A shared table is copied on write first, like ``unshare``.
+        """
+        if self.refs.is_shared(obj_id):
+            return self.unshare(obj_id, size)
+        table = self.tables[obj_id]
+        extra = self.pages_for(size) - len(table)
+        if extra > len(self._free_pages):
+            return None
+        self._internal -= len(table) * self.page_size - self._requested[obj_id]
+        if extra > 0:
+            pages = self._pop_pages(extra)
+            table.extend(pages)
+            runs = self._runs[obj_id]
+            # Only the last run can extend; everything before it is untouched.
+            tail = max(len(runs) - 1, 0)
+            before = runs[tail:]
+            for first, count in _runs(pages):
+                if runs and runs[-1][0] + runs[-1][1] == first:
+                    runs[-1] = (runs[-1][0], runs[-1][1] + count)
+                else:
+                    runs.append((first, count))
+            if self._listeners:
+                self._runs_changed(
+                    [(obj_id, *run) for run in before], [(obj_id, *run) for run in runs[tail:]]
+                )
+        self._internal += len(table) * self.page_size - size
+        self._requested[obj_id] = size
+        if self.debug:
+            self.check_consistency()
+        return 0
+
+    def share(self, obj_id: str, src_id: str) -> bool:
+        if self.in_mem(obj_id):
+            return True
+        if not self.in_mem(src_id):
+            return False
+        self.refs.add(obj_id, src_id)
+        return True
+
+    def refcount(self, obj_id: str) -> int:
+        return self.refs.refcount(obj_id) if self.in_mem(obj_id) else 0
+
+    def unshare(self, obj_id: str, size: int | None = None) -> Optional[int]:
+        """Copy-on-write into private pages; returns bytes copied or None."""
+        owner = self.refs.resolve(obj_id)
+        size = self._requested[owner] if size is None else max(size, self._requested[owner])
+        if self.pages_for(size) > len(self._free_pages):
+            return None
+        copied = len(self.tables[owner]) * self.page_size
+        self.refs.detach(obj_id, self._rename)
+        self.alloc(obj_id, size)
+        return copied
+
+    def _rename(self, obj_id: str, new_id: str):
+        self.tables[new_id] = self.tables.pop(obj_id)
+        runs = self._runs[new_id] = self._runs.pop(obj_id)
+        if self._listeners:
+            self._runs_changed([(obj_id, *run) for run in runs], [(new_id, *run) for run in runs])
+        self._requested[new_id] = self._requested.pop(obj_id)
+        self._spans = None
+
+    def free(self, obj_id: str):
+        if self.refs.is_shared(obj_id):
+            self.refs.detach(obj_id, self._rename)
+            return
+        table = self.tables.pop(obj_id, None)
+        if table is None:
+            return
+        size = self._requested.pop(obj_id)
+        runs = self._runs.pop(obj_id)
+        if self._listeners:
+            self._runs_changed([(obj_id, *run) for run in runs], ())
+        self._internal -= len(table) * self.page_size - size
+        table.reverse()
+        self._free_pages.extend(table)
+        page_size = self.page_size
+        for page in table:
+            self._free_runs.release(page * page_size, page_size)
+        self._spans = None
+        if self.debug:
+            self.check_consistency()
+
+    def alloc_or_raise(self, obj_id: str, size: int):
+        if not self.alloc(obj_id, size):
+            msg = f"insufficient free pages for {obj_id!r} ({size} bytes)"
+            raise AllocationError(msg)
+
+    def free_or_raise(self, obj_id: str):
+        if not self.in_mem(obj_id):
+            raise DoubleFreeError(f"object {obj_id!r} is not resident")
+        self.free(obj_id)
+
+    def in_mem(self, obj_id: str) -> bool:
+        return obj_id in self.tables or obj_id in self.refs
+
+    def block_table(self, obj_id: str) -> List[int]:
+        return list(self.tables[self.refs.resolve(obj_id)])
+
+    def used(self) -> int:
+        return (self.page_count - len(self._free_pages)) * self.page_size
+
+    def free_bytes(self) -> int:
+        return self.capacity - self.used()
+
+    def block_count(self) -> int:
+        return len(self.tables)
+
+    def hole_count(self) -> int:
+        return len(self._free_runs)
+
+    def internal_fragmentation(self) -> int:
+        return self._internal
+
+    def extents_free(self) -> List[Tuple[int, int]]:
+        return self._free_runs.extents()
+
+    def largest_free_extent(self) -> int:
+        return self._free_runs.largest()
+
+    def metrics(self) -> FragMetrics:
+        return self.frag.metrics(self._internal)
+
+    def spans(self) -> List[Tuple[int, int, str]]:
+        if self._spans is None:
+            page_size = self.page_size
+            self._spans = sorted(
+                (first * page_size, count * page_size, obj_id)
+                for obj_id, runs in self._runs.items()
+                for first, count in runs
+            )
+        return list(self._spans)
+
+    def compact(self, reserve: int = 0) -> int:
+        return 0
+
+    def compact_step(self, max_bytes: int, reserve: int = 0) -> int:
+        return 0
+
+    def compaction_cost(self, reserve: int = 0) -> int:
+        return 0
+
+    def make_room(self, need: int, reserve: int = 0, max_bytes: int | None = None) -> Optional[int]:
+        # Pages need not be adjacent; moving them never frees a page.
+        return 0 if self.pages_for(need) <= len(self._free_pages) else None
+
+    def compaction_pending(self) -> bool:
+        return False
+
+    def fragmentation_debt(self) -> int:
+        return 0
+
+    def check_consistency(self):
+        owned = [page for table in self.tables.values() for page in table]
+        pages = sorted(owned + list(self._free_pages))
+        if pages != list(range(self.page_count)):
+            raise AllocatorInvariantError("pages are lost or owned twice")
+        slack = sum(
+            len(table) * self.page_size - self._requested[obj_id]
+            for obj_id, table in self.tables.items()
+        )
+        if slack != self._internal:
+            raise AllocatorInvariantError(f"internal counter {self._internal} != {slack}")
+        runs = [
+            (first * self.page_size, count * self.page_size)
+            for first, count in _runs(sorted(self._free_pages))
+        ]
+        if runs != self._free_runs.extents():
+            raise AllocatorInvariantError("free-run index diverged from the free-page stack")
+        if not self.frag.matches(runs):
+            raise AllocatorInvariantError("fragmentation tracker diverged from the free extents")
+        if not self.refs.check(self.tables):
+            raise AllocatorInvariantError("shared references point at missing tables")
+
+
+def _runs(pages) -> List[Tuple[int, int]]:
+    """Collapse consecutive page numbers into ``(first_page, count)`` runs."""
+    runs: List[Tuple[int, int]] = []
+    for page in pages:
+        if runs and runs[-1][0] + runs[-1][1] == page:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((page, 1))
+    return runs
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from memory.extent_index import FreeExtentIndex, OrderedKeys
+
+
+class FirstFit:
+    """Lowest-addressed extent that fits (the historical default)."""
+
+    name = "first_fit"
+
+    def __init__(self, index: FreeExtentIndex):
+        self.index = index
+
+    def find(self, size: int) -> Optional[int]:
+        return self.index.first_fit(size)
+
+
+class NextFit:
+    """First fit starting from a roving pointer left after the last placement."""
+
+    name = "next_fit"
+
+    def __init__(self, index: FreeExtentIndex):
+        self.index = index
+        self.rover = 0
+
+    def find(self, size: int) -> Optional[int]:
+        start = self.index.first_fit_from(self.rover, size)
+        if start is None:
+            start = self.index.first_fit(size)
+        if start is not None:
+            self.rover = start + size
+        return start
+
+
+class BestFit:
+    """Smallest extent that fits, ties broken by address.
+
+    Extents are mirrored into a size-ordered treap whose integer key packs
+    ``(size, start)``, so the best fit is a single ceiling lookup.
+    """
+
+    name = "best_fit"
+
+    def __init__(self, index: FreeExtentIndex):
+        self.index = index
+        self._stride = index.capacity + 1
+        self._by_size = OrderedKeys()
+        index.add_listener(self)
+
+    def extent_added(self, start: int, size: int):
+        self._by_size.add(size * self._stride + start)
+
+    def extent_removed(self, start: int, size: int):
+        self._by_size.discard(size * self._stride + start)
+
+    def find(self, size: int) -> Optional[int]:
+        key = self._by_size.ceiling(max(size, 0) * self._stride)
+        return None if key is None else key % self._stride
+
+
+class SegregatedFit:
+    """Segregated free lists keyed by power-of-two size class.
+
+    Class ``k`` holds extents with ``2**k <= size < 2**(k + 1)``. A bitmap of
+    non-empty classes finds the next populated class without scanning, and
+    each class is size-ordered so the request's own class can be searched for
+    a fitting extent before falling through to larger classes.
+    """
+
+    name = "segregated"
+
+    def __init__(self, index: FreeExtentIndex):
+        self.index = index
+        self._stride = index.capacity + 1
+        self._classes: Dict[int, OrderedKeys] = {}
+        self._nonempty = 0
+        index.add_listener(self)
+
+    @staticmethod
+    def size_class(size: int) -> int:
+        return max(size, 1).bit_length() - 1
+
+    def extent_added(self, start: int, size: int):
+        cls = self.size_class(size)
+        bucket = self._classes.get(cls)
+        if bucket is None:
+            bucket = self._classes[cls] = OrderedKeys()
+        bucket.add(size * self._stride + start)
+        self._nonempty |= 1 << cls
+
+    def extent_removed(self, start: int, size: int):
+        cls = self.size_class(size)
+        bucket = self._classes[cls]
+        bucket.discard(size * self._stride + start)
+        if not bucket:
+            self._nonempty &= ~(1 << cls)
+
+    def find(self, size: int) -> Optional[int]:
+        cls = self.size_class(size)
+        if self._nonempty >> cls & 1:
+            key = self._classes[cls].ceiling(max(size, 0) * self._stride)
+            if key is not None:
+                return key % self._stride
+        larger = self._nonempty >> (cls + 1)
+        if not larger:
+            return None
+        cls += (larger & -larger).bit_length()
+        key = self._classes[cls].ceiling(0)
+        return None if key is None else key % self._stride
+
+
+PLACEMENTS = {
+    FirstFit.name: FirstFit,
+    NextFit.name: NextFit,
+    BestFit.name: BestFit,
+    SegregatedFit.name: SegregatedFit,
+}
+
+
+def build_placement(name: str, index: FreeExtentIndex):
+    try:
+        return PLACEMENTS[name](index)
+    except KeyError:
+        raise ValueError(f"unsupported placement: {name}") from None
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+
+
+class SharedRefs:
+    """Logical references onto refcounted physical blocks.
+
+    Allocators key each physical block by the id that allocated it (its
+    owner). ``add`` makes another id an alias of that block, so the block's
+    refcount is one plus its alias count. Dropping the owner while aliases
+    remain hands the block to the oldest alias; the allocator renames the
+    physical block through the ``rename`` callback passed to ``detach``.
+    """
+
+    def __init__(self):
+        self.owner: Dict[str, str] = {}
+        self.aliases: Dict[str, List[str]] = {}
+
+    def __contains__(self, obj_id: str) -> bool:
+        return obj_id in self.owner
+
+    def __len__(self) -> int:
+        return len(self.owner)
+
+    def resolve(self, obj_id: str) -> str:
+        return self.owner.get(obj_id, obj_id)
+
+    def refcount(self, obj_id: str) -> int:
+        return 1 + len(self.aliases.get(self.resolve(obj_id), ()))
+
+    def is_shared(self, obj_id: str) -> bool:
+        return obj_id in self.owner or obj_id in self.aliases
+
+    def add(self, alias: str, obj_id: str):
+        owner = self.resolve(obj_id)
+        self.owner[alias] = owner
+        self.aliases.setdefault(owner, []).append(alias)
+
+    def detach(self, obj_id: str, rename: Callable[[str, str], None]) -> Optional[str]:
+        """Drop ``obj_id``'s reference without freeing the block.
+
+        Returns the block's new owner when ``obj_id`` owned it, else None.
+        """
+        owner = self.owner.pop(obj_id, None)
+        if owner is not None:
+            aliases = self.aliases[owner]
+            aliases.remove(obj_id)
+            if not aliases:
+                del self.aliases[owner]
+            return None
+        aliases = self.aliases.pop(obj_id)
+        heir = aliases.pop(0)
+        del self.owner[heir]
+        for alias in aliases:
+            self.owner[alias] = heir
+        if aliases:
+            self.aliases[heir] = aliases
+        rename(obj_id, heir)
+        return heir
+
+    def check(self, owners) -> bool:
+        """True when every alias points at a resident owner and the two maps agree."""
+        listed = sorted(alias for aliases in self.aliases.values() for alias in aliases)
+        return (
+            all(owner in owners for owner in self.aliases)
+            and all(self.owner[alias] == owner for owner, aliases in self.aliases.items() for alias in aliases)
+            and listed == sorted(self.owner)
+            and not any(alias in owners for alias in self.owner)
+        )
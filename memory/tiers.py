@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class Tier:
+    """A memory tier below HBM.
+
+    ``bandwidth`` (bytes/s) and ``latency`` (s) describe the link between this
+    tier and HBM; moving ``n`` bytes either way costs ``latency + n / bandwidth``.
+    """
+
+    name: str
+    capacity: int
+    bandwidth: float
+    latency: float
+
+
+# Peak HBM3 stack bandwidth; only used to price hits so throughput has a baseline.
+HBM_BANDWIDTH = 3.35e12
+
+
+def default_tiers(hbm_capacity: int) -> tuple[Tier, ...]:
+    """Host DRAM over PCIe Gen5 x16 and a local NVMe drive, sized relative to HBM."""
+    return (
+        Tier("host_dram", 4 * hbm_capacity, 64e9, 1e-6),
+        Tier("nvme", 64 * hbm_capacity, 7e9, 80e-6),
+    )
+
+
+def parse_tiers(spec: str, hbm_capacity: int) -> tuple[Tier, ...]:
+    """Parse ``default`` or ``name:capacity:bandwidth:latency[,...]`` (top tier first).
+
+    A capacity written as ``4x`` is a multiple of the HBM capacity.
+    """
+    if spec in ("", "none"):
+        return ()
+    if spec == "default":
+        return default_tiers(hbm_capacity)
+    tiers = []
+    for item in spec.split(","):
+        try:
+            name, capacity, bandwidth, latency = item.split(":")
+            if capacity.endswith("x"):
+                size = int(float(capacity[:-1]) * hbm_capacity)
+            else:
+                size = int(float(capacity))
+            tiers.append(Tier(name, size, float(bandwidth), float(latency)))
+        except ValueError:
+            raise ValueError(f"invalid tier spec: {item!r}") from None
+    return tuple(tiers)
+
+
+class TieredMemory:
+    """Residency and transfer-time model for the tiers below HBM.
+
+    HBM itself stays with the allocator; this class tracks where every object
+    that is *not* in HBM lives. The hierarchy is exclusive: promotion into HBM
+    removes the object from its tier, and an HBM eviction demotes it into the
+    highest tier with room. A full tier pushes its least recently used objects
+    one level down; objects pushed out of the last tier are dropped.
+
+    Touching an object outside HBM stalls for the transfer from its tier.
+    Demotions are write-backs and are accounted separately from stall time.
+    """
+
+    def __init__(self, tiers: Sequence[Tier], hbm_bandwidth: float = HBM_BANDWIDTH):
+        self.tiers = list(tiers)
+        self.hbm_bandwidth = hbm_bandwidth
+        self._resident: List[OrderedDict[str, int]] = [OrderedDict() for _ in self.tiers]
+        self._used = [0] * len(self.tiers)
+        self._peak = [0] * len(self.tiers)
+        self.location: Dict[str, int] = {}
+        self.bytes_touched = 0
+        self.hbm_time = 0.0
+        self.stall_time = 0.0
+        self.demotion_time = 0.0
+        self.promotions = 0
+        self.promoted_bytes = 0
+        self.demotions = 0
+        self.demoted_bytes = 0
+        self.dropped = 0
+        self._fetches = [0] * len(self.tiers)
+
+    def transfer_time(self, level: int, size: int) -> float:
+        tier = self.tiers[level]
+        return tier.latency + size / tier.bandwidth
+
+    def used(self, level: int) -> int:
+        return self._used[level]
+
+    def place(self, obj_id: str, size: int, level: int = 0) -> Optional[int]:
+        """Store ``obj_id`` in the highest tier at or below ``level`` that can hold it.
+
+        Returns the tier index, or None when no tier is large enough.
+        """
+        self.discard(obj_id)
+        for index in range(level, len(self.tiers)):
+            if size > self.tiers[index].capacity:
+                continue
+            self._make_room(index, size)
+            self._resident[index][obj_id] = size
+            self._used[index] += size
+            self._peak[index] = max(self._peak[index], self._used[index])
+            self.location[obj_id] = index
+            return index
+        return None
+
+    def _make_room(self, level: int, size: int):
+        resident = self._resident[level]
+        while self._used[level] + size > self.tiers[level].capacity:
+            victim, victim_size = resident.popitem(last=False)
+            self._used[level] -= victim_size
+            del self.location[victim]
+            landed = None
+            if level + 1 < len(self.tiers):
+                landed = self.place(victim, victim_size, level + 1)
+            if landed is None:
+                self.dropped += 1
+            else:
+                # A victim too large for the next tier may land further down.
+                self.demotions += 1
+                self.demoted_bytes += victim_size
+                self.demotion_time += self.transfer_time(landed, victim_size)
+
+    def discard(self, obj_id: str):
+        level = self.location.pop(obj_id, None)
+        if level is not None:
+            self._used[level] -= self._resident[level].pop(obj_id)
+
+    def touch(self, obj_id: str, size: int, in_hbm: bool):
+        """Charge one access: HBM bandwidth for a hit, a stalled fetch for a miss."""
+        self.bytes_touched += size
+        self.hbm_time += size / self.hbm_bandwidth
+        if in_hbm or not self.tiers:
+            return
+        level = self.location.get(obj_id)
+        if level is None:
+            # Never placed (or dropped from the last tier): read from the bottom.
+            level = len(self.tiers) - 1
+        else:
+            self._resident[level].move_to_end(obj_id)
+        self._fetches[level] += 1
+        self.stall_time += self.transfer_time(level, size)
+
+    def promote(self, obj_id: str):
+        """``obj_id`` was admitted into HBM; its transfer was charged by ``touch``."""
+        if obj_id in self.location:
+            self.promotions += 1
+            self.promoted_bytes += self._resident[self.location[obj_id]][obj_id]
+            self.discard(obj_id)
+
+    def demote(self, obj_id: str, size: int) -> int:
+        """Write an object evicted from HBM into the lower tiers.
+
+        Returns the bytes moved, including objects a full tier pushed further down.
+        """
+        before = self.demoted_bytes
+        level = self.place(obj_id, size)
+        if level is None:
+            self.dropped += 1
+            return self.demoted_bytes - before
+        self.demotions += 1
+        self.demoted_bytes += size
+        self.demotion_time += self.transfer_time(level, size)
+        return self.demoted_bytes - before
+
+    def stats(self) -> dict[str, float | int]:
+        elapsed = self.hbm_time + self.stall_time
+        out: dict[str, float | int] = {
+            "stall_time_s": self.stall_time,
+            "hbm_time_s": self.hbm_time,
+            "demotion_time_s": self.demotion_time,
+            "effective_throughput": self.bytes_touched / elapsed if elapsed > 0 else 0.0,
+            "promotions": self.promotions,
+            "promoted_bytes": self.promoted_bytes,
+            "demotions": self.demotions,
+            "demoted_bytes": self.demoted_bytes,
+            "dropped": self.dropped,
+        }
+        for index, tier in enumerate(self.tiers):
+            out[f"{tier.name}_fetches"] = self._fetches[index]
+            out[f"{tier.name}_used"] = self._used[index]
+            out[f"{tier.name}_peak"] = self._peak[index]
+        return out
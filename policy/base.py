@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Protocol, runtime_checkable
+
+
+@dataclass
+class Forecast:
+    mu: float
+    sigma: float
+
+    def lb(self, z: float) -> float:
+        return max(0.0, min(1.0, self.mu - z * self.sigma))
+
+    def ub(self, z: float) -> float:
+        return max(0.0, min(1.0, self.mu + z * self.sigma))
+
+
+@dataclass
+class PolicyDecision:
+    action: str  # noop/admit/pin/evict/compact
+    reason: str
+
+
+NOOP = PolicyDecision("noop", "no_opinion")
+
+
+@runtime_checkable
+class Policy(Protocol):
+    """Interface ``simulate()`` drives a residency policy through.
+
+    ``forecast_driven`` picks the touch path. A recency policy (False) is told
+    about hits through ``on_touch`` and, on a demand miss, the simulator admits
+    the object and evicts ``pick_victim()`` results until it fits. A forecast
+    policy (True) is asked to ``decide`` on every touch and may request
+    compaction afterwards.
+
+    ``reconfigure`` applies a new config's thresholds to a policy restored from
+    a checkpoint, keeping the state it has learned so far.
+
+    ``config_fields`` names the ``SimulationConfig`` fields the policy reads
+    after construction, or is None if unknown. While a run records decision
+    sensitivity, ``sensitivity`` holds its ``SensitivityLog`` and the policy
+    reports every comparison against those fields to it; a policy that
+    declares no fields is assumed to diverge at the first event whenever any
+    field outside the simulator's own changes.
+    """
+
+    forecast_driven: bool
+    config_fields: Optional[tuple[str, ...]]
+
+    def on_touch(self, obj_id: str) -> None: ...
+
+    def on_admit(self, obj_id: str, size: int) -> None: ...
+
+    def remove(self, obj_id: str) -> None: ...
+
+    def pick_victim(self) -> Optional[str]: ...
+
+    def decide(self, obj_id: str, in_hbm: bool, forecast: Optional[Forecast]) -> PolicyDecision: ...
+
+    def request_compaction(
+        self, frag_ratio: float, lfe: int, upcoming_need: int
+    ) -> PolicyDecision: ...
+
+    def reconfigure(self, config) -> None: ...
+
+    def metrics(self) -> dict[str, float | int]: ...
+
+
+class BasePolicy:
+    """No-op implementations of every ``Policy`` method; subclasses override what they use."""
+
+    forecast_driven = False
+    config_fields: Optional[tuple[str, ...]] = None
+    sensitivity = None
+
+    def on_touch(self, obj_id: str):
+        pass
+
+    def on_admit(self, obj_id: str, size: int):
+        pass
+
+    def remove(self, obj_id: str):
+        pass
+
+    def pick_victim(self) -> Optional[str]:
+        return None
+
+    def decide(self, obj_id: str, in_hbm: bool, forecast: Optional[Forecast]) -> PolicyDecision:
+        return NOOP
+
+    def request_compaction(self, frag_ratio: float, lfe: int, upcoming_need: int) -> PolicyDecision:
+        return NOOP
+
+    def reconfigure(self, config):
+        pass
+
+    def metrics(self) -> dict[str, float | int]:
+        return {
+            "hot_hit_rate": 0.0,
+            "cold_hit_rate": 0.0,
+            "promotions": 0,
+            "demotions": 0,
+        }
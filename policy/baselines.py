@@ -1,34 +1,48 @@
 from __future__ import annotations
-from dataclasses import dataclass
 from typing import Optional
 from collections import OrderedDict
 
-@dataclass
-class PolicyDecision:
-    action: str
-    reason: str
+from control.sensitivity import at_least
+from policy.base import BasePolicy, Forecast, PolicyDecision
 
-class LRUPolicy:
+class LRUPolicy(BasePolicy):
+    config_fields = ()
     def __init__(self):
         self.lru = OrderedDict()
+    @classmethod
+    def from_config(cls, config) -> LRUPolicy:
+        return cls()
     def on_touch(self, obj_id: str):
         if obj_id in self.lru:
             self.lru.move_to_end(obj_id)
-    def on_admit(self, obj_id: str):
+    def on_admit(self, obj_id: str, size: int = 0):
         self.lru[obj_id] = None
         self.lru.move_to_end(obj_id)
+    def remove(self, obj_id: str):
+        self.lru.pop(obj_id, None)
     def pick_victim(self) -> Optional[str]:
         if not self.lru:
             return None
         victim, _ = self.lru.popitem(last=False)
         return victim
 
-class GreedyPrefetchPolicy:
+class GreedyPrefetchPolicy(BasePolicy):
+    """Admits any missing object whose forecast mean clears ``mu_thresh``; never evicts."""
+    forecast_driven = True
+    config_fields = ('admit_lb',)
     def __init__(self, mu_thresh: float=0.65):
         self.mu_thresh = mu_thresh
-    def decide(self, in_hbm: bool, mu: Optional[float]) -> PolicyDecision:
+    @classmethod
+    def from_config(cls, config) -> GreedyPrefetchPolicy:
+        return cls(mu_thresh=config.admit_lb)
+    def reconfigure(self, config):
+        self.mu_thresh = config.admit_lb
+    def decide(self, obj_id: str, in_hbm: bool, fc: Optional[Forecast]) -> PolicyDecision:
         if in_hbm:
             return PolicyDecision('noop','already_in_hbm')
-        if mu is None:
+        if fc is None:
             return PolicyDecision('noop','no_mu')
-        return PolicyDecision('admit' if mu >= self.mu_thresh else 'noop', f'mu={mu:.2f}')
+        admit = fc.mu >= self.mu_thresh
+        if self.sensitivity is not None:
+            self.sensitivity.threshold('admit_lb', at_least, fc.mu, admit)
+        return PolicyDecision('admit' if admit else 'noop', f'mu={fc.mu:.2f}')
@@ -4,6 +4,8 @@ from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Optional
 
+from policy.base import BasePolicy
+
 
 @dataclass
 class ClockProStats:
@@ -22,7 +24,7 @@ class ClockProStats:
         return 0.0 if self.touches == 0 else self.cold_hits / self.touches
 
 
-class ClockProPolicy:
+class ClockProPolicy(BasePolicy):
     """A simplified CLOCK-Pro inspired adaptive baseline.
 
     Objects begin in the cold list, are promoted to hot on reuse, and eviction
@@ -30,6 +32,8 @@ class ClockProPolicy:
     in bytes so the policy adapts naturally to heterogeneous object sizes.
     """
 
+    config_fields = ("clockpro_hot_fraction", "clockpro_cold_fraction")
+
     def __init__(self, capacity: int, hot_fraction: float = 0.40, cold_fraction: float = 0.60):
         self.capacity = capacity
         self.hot_fraction = hot_fraction
@@ -40,6 +44,21 @@ class ClockProPolicy:
         self.cold: "OrderedDict[str, int]" = OrderedDict()
         self.stats = ClockProStats()
 
+    @classmethod
+    def from_config(cls, config) -> ClockProPolicy:
+        return cls(
+            capacity=config.capacity,
+            hot_fraction=config.clockpro_hot_fraction,
+            cold_fraction=config.clockpro_cold_fraction,
+        )
+
+    def reconfigure(self, config):
+        # Capacity is fixed for a run; only the hot/cold split can change.
+        self.hot_fraction = config.clockpro_hot_fraction
+        self.cold_fraction = config.clockpro_cold_fraction
+        self.hot_target = int(self.capacity * self.hot_fraction)
+        self.cold_target = max(0, self.capacity - self.hot_target)
+
     def on_touch(self, obj_id: str):
         self.stats.touches += 1
         if obj_id in self.hot:
@@ -93,5 +112,7 @@ class ClockProPolicy:
         self.stats.demotions += 1
 
     def _rebalance_hot(self):
+        if self.sensitivity is not None:
+            self.sensitivity.read("clockpro_hot_fraction")
         while self._hot_bytes() > self.hot_target and self.hot:
             self._demote_oldest_hot()
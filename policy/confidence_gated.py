@@ -1,36 +1,47 @@
 from __future__ import annotations
-from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
-class Forecast:
-    mu: float
-    sigma: float
-    def lb(self, z: float) -> float:
-        return max(0.0, min(1.0, self.mu - z*self.sigma))
-    def ub(self, z: float) -> float:
-        return max(0.0, min(1.0, self.mu + z*self.sigma))
-
-@dataclass
-class PolicyDecision:
-    action: str   # noop/admit/pin/evict/compact
-    reason: str
-
-class ConfidenceGatedPolicy:
+from control.sensitivity import above, at_least
+from policy.base import BasePolicy, Forecast, PolicyDecision
+
+
+def _pin_margin(lb: float, admit_lb: float) -> bool:
+    return lb >= admit_lb + 0.15
+
+
+def _above_hard_floor(ub: float, evict_ub: float) -> bool:
+    return ub >= evict_ub * 0.6
+
+
+class ConfidenceGatedPolicy(BasePolicy):
     """Confidence-gated hysteresis:
     - Admission uses Lower Bound (LB)
     - Eviction uses Upper Bound (UB) to reduce thrash
     """
+    forecast_driven = True
+    config_fields = ('admit_lb', 'evict_ub', 'confidence_z')
+
     def __init__(self, admit_lb: float=0.60, evict_ub: float=0.35, z: float=1.0):
         self.admit_lb = admit_lb
         self.evict_ub = evict_ub
         self.z = z
         self.pinned: set[str] = set()
 
-    def decide_on_touch(self, obj_id: str, in_hbm: bool, fc: Optional[Forecast]) -> PolicyDecision:
+    @classmethod
+    def from_config(cls, config) -> ConfidenceGatedPolicy:
+        return cls(admit_lb=config.admit_lb, evict_ub=config.evict_ub, z=config.confidence_z)
+
+    def reconfigure(self, config):
+        self.admit_lb = config.admit_lb
+        self.evict_ub = config.evict_ub
+        self.z = config.confidence_z
+
+    def decide(self, obj_id: str, in_hbm: bool, fc: Optional[Forecast]) -> PolicyDecision:
         if fc is None:
             return PolicyDecision('noop','no_forecast')
         lb = fc.lb(self.z); ub = fc.ub(self.z)
+        if self.sensitivity is not None:
+            self._record_sensitivity(obj_id, in_hbm, lb, ub)
 
         if not in_hbm:
             if lb >= self.admit_lb:
@@ -52,6 +63,23 @@ class ConfidenceGatedPolicy:
 
         return PolicyDecision('noop', f'hold lb={lb:.2f} ub={ub:.2f}')
 
+    decide_on_touch = decide
+
+    def _record_sensitivity(self, obj_id: str, in_hbm: bool, lb: float, ub: float):
+        """Report the threshold comparisons ``decide`` is about to make."""
+        log = self.sensitivity
+        log.read('confidence_z')
+        if not in_hbm:
+            log.threshold('admit_lb', at_least, lb, lb >= self.admit_lb)
+            return
+        if obj_id in self.pinned:
+            log.threshold('evict_ub', _above_hard_floor, ub, _above_hard_floor(ub, self.evict_ub))
+            return
+        keep = ub > self.evict_ub
+        log.threshold('evict_ub', above, ub, keep)
+        if keep:
+            log.threshold('admit_lb', _pin_margin, lb, _pin_margin(lb, self.admit_lb))
+
     def request_compaction(self, frag_ratio: float, lfe: int, upcoming_need: int) -> PolicyDecision:
         if lfe < upcoming_need:
             return PolicyDecision('compact', f'lfe={lfe}<need={upcoming_need}')
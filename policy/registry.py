@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, List
+
+from policy.base import Policy
+from policy.baselines import GreedyPrefetchPolicy, LRUPolicy
+from policy.clockpro import ClockProPolicy
+from policy.confidence_gated import ConfidenceGatedPolicy
+
+# Factories take the SimulationConfig and return a fresh policy object.
+PolicyFactory = Callable[[Any], Policy]
+
+ENTRY_POINT_GROUP = "hbm_sim.policies"
+
+_FACTORIES: Dict[str, PolicyFactory] = {}
+_entry_points_loaded = False
+
+
+def register_policy(name: str, factory: PolicyFactory | None = None):
+    """Register ``factory`` under ``name``; usable as a decorator on a class with ``from_config``.
+
+    Re-registering a name replaces the earlier factory.
+    """
+    if factory is None:
+        def decorator(obj):
+            register_policy(name, getattr(obj, "from_config", obj))
+            return obj
+
+        return decorator
+    _FACTORIES[name] = factory
+    return factory
+
+
+def load_entry_point_policies():
+    """Register third-party policies advertised under the ``hbm_sim.policies`` entry point group.
+
+    Each entry point names a policy class (registered through its ``from_config``)
+    or a factory taking the config. Built-in names cannot be shadowed this way.
+    """
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in _FACTORIES:
+            continue
+        obj = entry_point.load()
+        register_policy(entry_point.name, getattr(obj, "from_config", obj))
+
+
+def available_policies() -> List[str]:
+    load_entry_point_policies()
+    return list(_FACTORIES)
+
+
+def build_policy(name: str, config) -> Policy:
+    if name not in _FACTORIES:
+        load_entry_point_policies()
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"unsupported policy: {name}")
+    return factory(config)
+
+
+register_policy("confidence", ConfidenceGatedPolicy.from_config)
+register_policy("lru", LRUPolicy.from_config)
+register_policy("clockpro", ClockProPolicy.from_config)
+register_policy("greedy", GreedyPrefetchPolicy.from_config)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import zlib
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from run_sim import RunSpec, SimResult, SimulationConfig, open_trace, simulate, simulate_many
+
+REPO_ROOT = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "hbm-sim"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FORMAT = 1
+# Everything a simulation result depends on besides its inputs.
+SIMULATOR_SOURCES = (
+    "run_sim.py",
+    "trace_format.py",
+    "trace_index.py",
+    "control",
+    "memory",
+    "policy",
+    "viz/timeline.py",
+)
+
+EventLoader = Callable[[], Iterable[dict[str, Any]]]
+
+_source_digest: Optional[str] = None
+_trace_digests: dict[tuple[str, int, int], str] = {}
+
+
+def simulator_version() -> str:
+    """Digest of the simulator sources, so any code change invalidates cached results."""
+    global _source_digest
+    if _source_digest is None:
+        digest = hashlib.sha256(f"format={CACHE_FORMAT}".encode("utf-8"))
+        for entry in SIMULATOR_SOURCES:
+            path = REPO_ROOT / entry
+            files = sorted(path.rglob("*.py")) if path.is_dir() else [path]
+            for source in files:
+                digest.update(source.relative_to(REPO_ROOT).as_posix().encode("utf-8"))
+                digest.update(source.read_bytes())
+        _source_digest = digest.hexdigest()
+    return _source_digest
+
+
+def trace_digest(trace_path: str | Path) -> str:
+    """SHA-256 of the trace file contents, remembered per (path, size, mtime)."""
+    stat = os.stat(trace_path)
+    memo_key = (str(Path(trace_path).resolve()), stat.st_size, stat.st_mtime_ns)
+    digest = _trace_digests.get(memo_key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(trace_path, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                hasher.update(block)
+        digest = _trace_digests[memo_key] = hasher.hexdigest()
+    return digest
+
+
+class ResultCache:
+    """Content-addressed store of ``SimResult`` objects on disk.
+
+    Entries are keyed by the trace contents, policy name, serialized config and
+    ``simulator_version()``, and stored as zlib-compressed pickles. Reads refresh
+    an entry's mtime and writes evict the least recently used entries until the
+    directory fits in ``max_bytes``. Entries are written to a temporary file and
+    renamed, so concurrent sweep workers can share one cache directory.
+    """
+
+    def __init__(self, root: str | Path | None = None, max_bytes: int | None = None):
+        if root is None:
+            root = os.environ.get("HBM_SIM_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("HBM_SIM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, trace_path: str | Path, policy: str, config: SimulationConfig) -> str:
+        payload = json.dumps(
+            {
+                "trace": trace_digest(trace_path),
+                "policy": policy,
+                "config": asdict(config),
+                "simulator": simulator_version(),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.simresult"
+
+    def get(self, key: str) -> Optional[SimResult]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(zlib.decompress(data))
+
+    def put(self, key: str, result: SimResult):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        partial.write_bytes(zlib.compress(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)))
+        os.replace(partial, path)
+        self.evict()
+
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self.root.glob("*.simresult"))
+
+    def evict(self):
+        entries = []
+        for path in self.root.glob("*.simresult"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Another process may have evicted the same entry already.
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for path in self.root.glob("*.simresult"):
+            path.unlink(missing_ok=True)
+
+    def simulate(
+        self,
+        trace_path: str | Path,
+        policy: str,
+        config: SimulationConfig | None = None,
+        load_events: EventLoader | None = None,
+    ) -> SimResult:
+        """Cached equivalent of ``simulate(open_trace(trace_path), policy, config)``.
+
+        ``load_events`` supplies already-parsed events for ``trace_path`` and is
+        only called on a miss.
+        """
+        config = config or SimulationConfig()
+        key = self.key(trace_path, policy, config)
+        result = self.get(key)
+        if result is None:
+            trace_events = load_events() if load_events else open_trace(trace_path)
+            result = simulate(trace_events, policy, config)
+            self.put(key, result)
+        return result
+
+
+def simulate_trace(
+    trace_path: str | Path,
+    policy: str,
+    config: SimulationConfig | None = None,
+    cache: ResultCache | None = None,
+    load_events: EventLoader | None = None,
+) -> SimResult:
+    """Simulate a trace file through ``cache``, or directly when ``cache`` is None."""
+    if cache is None:
+        trace_events = load_events() if load_events else open_trace(trace_path)
+        return simulate(trace_events, policy, config)
+    return cache.simulate(trace_path, policy, config, load_events)
+
+
+def simulate_trace_many(
+    trace_path: str | Path,
+    runs: Sequence[RunSpec],
+    cache: ResultCache | None = None,
+    shards: int = 1,
+) -> list[SimResult]:
+    """Simulate several ``(policy, config)`` runs of a trace file in one lockstep pass.
+
+    Runs already in ``cache`` are read back; the rest share a single
+    ``simulate_many`` pass over the trace and are then stored.
+    """
+    runs = [(policy, config or SimulationConfig()) for policy, config in runs]
+    results: list[SimResult | None] = [None] * len(runs)
+    keys: list[str | None] = [None] * len(runs)
+    if cache is not None:
+        for index, (policy, config) in enumerate(runs):
+            keys[index] = cache.key(trace_path, policy, config)
+            results[index] = cache.get(keys[index])
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        computed = simulate_many(trace_path, [runs[index] for index in missing], shards=shards)
+        for index, result in zip(missing, computed):
+            results[index] = result
+            if cache is not None:
+                cache.put(keys[index], result)
+    return results
+
+
+def default_cache(enabled: bool = True) -> ResultCache | None:
+    """The shared cache, or None when disabled here or by ``HBM_SIM_NO_CACHE=1``."""
+    if not enabled or os.environ.get("HBM_SIM_NO_CACHE", "") not in ("", "0"):
+        return None
+    return ResultCache()
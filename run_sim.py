@@ -1,19 +1,37 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
-from dataclasses import asdict, dataclass, field
+import pickle
+from dataclasses import asdict, dataclass, field, replace
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, tee
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
 
 from control.safety_gate import Budgets, SafetyGate
+from control.sensitivity import RecordingConfig, SensitivityLog
 from control.scheduler import SafeWindowScheduler
 from memory.allocator import ContiguousAllocator
-from memory.fragmentation import FragMetrics, compute_metrics
-from policy.baselines import LRUPolicy
-from policy.clockpro import ClockProPolicy
-from policy.confidence_gated import ConfidenceGatedPolicy, Forecast
+from memory.buddy import BuddyAllocator
+from memory.fragmentation import FragMetrics
+from memory.paged import PagedAllocator
+from memory.placement import PLACEMENTS
+from memory.tiers import HBM_BANDWIDTH, Tier, TieredMemory, parse_tiers
+from policy.base import Forecast
+from policy.registry import available_policies, build_policy
+from trace_format import (
+    BinaryTrace,
+    Record,
+    is_binary_trace,
+    read_ahead,
+    read_jsonl,
+    trace_records,
+)
+from trace_index import TraceIndex
 from viz.ascii_map import render_map
+from viz.timeline import DeltaEncoder, MapJournal, Timeline, TimelinePoint
 
 
 @dataclass
@@ -30,26 +48,18 @@ class SimulationConfig:
     confidence_z: float = 1.0
     clockpro_hot_fraction: float = 0.40
     clockpro_cold_fraction: float = 0.60
-
-
-@dataclass
-class TimelinePoint:
-    t: int
-    event: str
-    obj_id: str | None
-    phase: str | None
-    occupancy: int
-    external_frag: float
-    entropy: float
-    lfe: int
-    holes: int
-    faults: int
-    migrations: int
-    bytes_moved: int
-    compaction: int
-    in_safe_window: bool
-    free_extents: list[tuple[int, int]] = field(default_factory=list)
-    blocks: list[tuple[int, int, str]] = field(default_factory=list)
+    placement: str = "first_fit"
+    allocator: str = "contiguous"
+    page_size: int = 0
+    compaction_budget: int = 0
+    targeted_compaction: bool = True
+    tiers: tuple[Tier, ...] = ()
+    hbm_bandwidth: float = HBM_BANDWIDTH
+    dedup: bool = True
+    keyframe_interval: int = 64
+    timeline_mode: str = "full"
+    sample_every: int = 100
+    sample_threshold: float = 0.05
 
 
 @dataclass
@@ -60,115 +70,314 @@ class SimResult:
     stats: dict[str, int]
     fragmentation: FragMetrics
     policy_metrics: dict[str, float | int]
-    timeline: list[TimelinePoint]
+    timeline: Timeline
     final_free_extents: list[tuple[int, int]]
     final_blocks: list[tuple[int, int, str]]
     final_map: str
+    final_used: int = 0
+    peak_used: int = 0
+    timeline_points: int = 0
+    compaction_steps: list[tuple[int, int, int]] = field(default_factory=list)
+    tier_stats: dict[str, float | int] = field(default_factory=dict)
+    sensitivity: SensitivityLog | None = None
 
     def to_benchmark_row(self) -> dict[str, float | int]:
         row: dict[str, float | int] = {
             "faults": self.stats["faults"],
             "migrations": self.stats["migrations"],
             "bytes_moved": self.stats["bytes_moved"],
+            "compaction_saved": self.stats["compaction_bytes_saved"],
             "fallback_epochs": self.stats["fallback_epochs"],
             "external_frag": self.fragmentation.external_frag,
             "lfe": self.fragmentation.lfe,
             "holes": self.fragmentation.hole_count,
             "entropy": self.fragmentation.entropy,
+            "internal_frag": self.fragmentation.internal_frag,
         }
+        if self.tier_stats:
+            row["stall_time_s"] = self.tier_stats["stall_time_s"]
+            row["effective_throughput"] = self.tier_stats["effective_throughput"]
         row.update(self.policy_metrics)
         return row
 
 
-def load_trace(path: str | Path) -> list[dict[str, Any]]:
-    with open(path, "r", encoding="utf-8") as handle:
-        return [json.loads(line) for line in handle if line.strip()]
+def load_trace(path: str | Path) -> list[dict[str, Any]] | BinaryTrace:
+    """Parse a JSONL trace into a list of events; a binary trace is memory-mapped instead.
+
+    ``.jsonl.gz``, ``.jsonl.xz`` and ``.jsonl.zst`` files are decompressed on the fly.
+    """
+    if is_binary_trace(path):
+        return BinaryTrace(path)
+    return list(read_jsonl(path))
+
+
+def iter_trace(path: str | Path, read_ahead_depth: int = 0) -> Iterator[dict[str, Any]]:
+    """Like ``load_trace`` but parses one line at a time, so memory stays flat.
+
+    With ``read_ahead_depth`` > 0 a background thread decompresses and parses up
+    to that many batches of events ahead of the consumer.
+    """
+    events = read_jsonl(path)
+    return read_ahead(events, read_ahead_depth) if read_ahead_depth > 0 else events
+
+
+def open_trace(
+    path: str | Path, read_ahead_depth: int = 0
+) -> Iterable[dict[str, Any]] | BinaryTrace:
+    """A trace file as ``simulate()`` input: memory-mapped if binary, else parsed lazily."""
+    if is_binary_trace(path):
+        return BinaryTrace(path)
+    return iter_trace(path, read_ahead_depth)
+
+
+# Fields that shape the allocator or tiers; a resumed run must keep them.
+STRUCTURAL_FIELDS = ("capacity", "allocator", "placement", "page_size", "tiers", "hbm_bandwidth")
+# Fields that only change what the timeline records.
+TIMELINE_FIELDS = ("keyframe_interval", "timeline_mode", "sample_every", "sample_threshold")
+# Fields the event loop and SafetyGate consult themselves (as opposed to the policy).
+SIMULATOR_FIELDS = (
+    "miss_mode",
+    "demand_fallback_only",
+    "reserve",
+    "epoch",
+    "max_migration_bytes",
+    "max_faults",
+    "compaction_budget",
+    "targeted_compaction",
+    "dedup",
+)
+
+
+class _StatePickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        # A sensitivity log belongs to the run that took the checkpoint, not to its state.
+        return "sensitivity" if isinstance(obj, SensitivityLog) else None
+
+
+class _StateUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return None
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Simulator state after the first ``events`` events of a trace.
+
+    ``state`` is a pickle of everything the event loop carries: the allocator
+    and its blocks, policy internals, ``SafetyGate`` counters, the scheduler
+    window, tier residency, stats, ``upcoming_need`` and the epoch position.
+    Each resume unpickles a private copy, so one checkpoint can seed any
+    number of forked runs.
+    """
+
+    policy: str
+    config: SimulationConfig
+    events: int
+    t: int
+    state: bytes
+    points: int = 0  # timeline points recorded before the checkpoint
+
+    def save(self, path: str | Path):
+        Path(path).write_bytes(pickle.dumps(self, pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def load(cls, path: str | Path) -> Checkpoint:
+        checkpoint = pickle.loads(Path(path).read_bytes())
+        if not isinstance(checkpoint, cls):
+            raise ValueError(f"{path} does not hold a simulation checkpoint")
+        return checkpoint
+
+    def restore(self, policy: str, config: SimulationConfig) -> dict[str, Any]:
+        """Unpickle a fresh copy of the state for a run of ``policy`` under ``config``."""
+        if policy != self.policy:
+            raise ValueError(f"checkpoint was taken with policy {self.policy!r}, not {policy!r}")
+        for name in STRUCTURAL_FIELDS:
+            if getattr(config, name) != getattr(self.config, name):
+                raise ValueError(f"cannot resume with a different {name}")
+        return _StateUnpickler(io.BytesIO(self.state)).load()
 
 
 def _snapshot(
     hbm: ContiguousAllocator,
     timeline: list[TimelinePoint],
-    event: dict[str, Any],
+    frames: DeltaEncoder,
+    record: Record,
+    position: int,
     safe_window: bool,
     faults_delta: int = 0,
     migrations_delta: int = 0,
     bytes_moved_delta: int = 0,
     compaction_delta: int = 0,
 ):
-    metrics = compute_metrics(hbm.extents_free())
-    blocks = [
-        (block.start, block.size, block.obj_id)
-        for block in sorted(hbm.blocks.values(), key=lambda b: b.start)
-    ]
+    metrics = hbm.metrics()
+    t = record[0]
+    keyframe, blocks_added, blocks_removed, extents_added, extents_removed = frames.encode(hbm)
     timeline.append(
         TimelinePoint(
-            t=int(event.get("t", len(timeline))),
-            event=str(event.get("event", "unknown")),
-            obj_id=event.get("id"),
-            phase=event.get("phase"),
+            t=int(position if t is None else t),
+            event=str(record[1]),
+            obj_id=record[2],
+            phase=record[8],
             occupancy=hbm.used(),
             external_frag=metrics.external_frag,
             entropy=metrics.entropy,
             lfe=metrics.lfe,
-            holes=metrics.hole_count,
+            holes=hbm.hole_count(),
             faults=faults_delta,
             migrations=migrations_delta,
             bytes_moved=bytes_moved_delta,
             compaction=compaction_delta,
             in_safe_window=safe_window,
-            free_extents=list(hbm.extents_free()),
-            blocks=blocks,
+            internal_frag=metrics.internal_frag,
+            keyframe=keyframe,
+            blocks_added=blocks_added,
+            blocks_removed=blocks_removed,
+            extents_added=extents_added,
+            extents_removed=extents_removed,
         )
     )
 
 
-def _build_policy(policy_name: str, config: SimulationConfig):
-    if policy_name == "confidence":
-        return ConfidenceGatedPolicy(
-            admit_lb=config.admit_lb,
-            evict_ub=config.evict_ub,
-            z=config.confidence_z,
-        )
-    if policy_name == "lru":
-        return LRUPolicy()
-    if policy_name == "clockpro":
-        return ClockProPolicy(
-            capacity=config.capacity,
-            hot_fraction=config.clockpro_hot_fraction,
-            cold_fraction=config.clockpro_cold_fraction,
-        )
-    raise ValueError(f"unsupported policy: {policy_name}")
+def _skip_snapshot(*args, **kwargs):
+    """``timeline_mode="none"``: record nothing."""
 
 
-def _policy_on_admit(policy_obj: Any, obj_id: str, size: int):
-    try:
-        policy_obj.on_admit(obj_id, size)
-    except TypeError:
-        policy_obj.on_admit(obj_id)
+class _SampledSnapshot:
+    """Snapshot function for ``timeline_mode="sampled"``.
 
+    Records every ``every``-th event, plus any event that moves occupancy (as a
+    fraction of capacity) or external fragmentation by more than ``threshold``
+    since the last recorded point.
 
-def _policy_remove(policy_obj: Any, obj_id: str):
-    if hasattr(policy_obj, "remove"):
-        policy_obj.remove(obj_id)
-    elif hasattr(policy_obj, "lru") and obj_id in policy_obj.lru:
-        del policy_obj.lru[obj_id]
+    Fault, migration, byte and compaction deltas of skipped events are carried
+    into the next recorded point, so the timeline still sums to the run totals.
+    """
+
+    def __init__(self, every: int, threshold: float, capacity: int):
+        if every < 1:
+            raise ValueError(f"sample_every must be >= 1, got {every}")
+        self.every = every
+        self.threshold = threshold
+        self.capacity = max(capacity, 1)
+        self.last_occupancy = 0
+        self.last_frag = 0.0
+        self.pending = [0, 0, 0, 0]
+
+    def __call__(
+        self,
+        hbm: ContiguousAllocator,
+        timeline: list[TimelinePoint],
+        frames: DeltaEncoder,
+        record: Record,
+        position: int,
+        safe_window: bool,
+        faults_delta: int = 0,
+        migrations_delta: int = 0,
+        bytes_moved_delta: int = 0,
+        compaction_delta: int = 0,
+    ):
+        pending = self.pending
+        pending[0] += faults_delta
+        pending[1] += migrations_delta
+        pending[2] += bytes_moved_delta
+        pending[3] += compaction_delta
+        occupancy = hbm.used()
+        if position % self.every:
+            frag = hbm.metrics().external_frag
+            if (
+                abs(occupancy - self.last_occupancy) <= self.threshold * self.capacity
+                and abs(frag - self.last_frag) <= self.threshold
+            ):
+                return
+        _snapshot(hbm, timeline, frames, record, position, safe_window, *pending)
+        self.last_occupancy = occupancy
+        self.last_frag = timeline[-1].external_frag
+        self.pending = [0, 0, 0, 0]
+
+
+TIMELINE_MODES = ("none", "sampled", "full")
+
+
+def _build_snapshot(config: SimulationConfig, sampler: _SampledSnapshot | None = None):
+    """Snapshot function for ``config``; a resumed run passes its checkpoint's ``sampler``."""
+    if config.timeline_mode == "full":
+        return _snapshot
+    if config.timeline_mode == "sampled":
+        if sampler is not None and (sampler.every, sampler.threshold) == (
+            config.sample_every,
+            config.sample_threshold,
+        ):
+            return sampler
+        return _SampledSnapshot(config.sample_every, config.sample_threshold, config.capacity)
+    if config.timeline_mode == "none":
+        return _skip_snapshot
+    raise ValueError(f"unsupported timeline_mode: {config.timeline_mode}")
+
+
+ALLOCATORS = ("contiguous", "buddy", "paged")
+
+
+def _build_allocator(config: SimulationConfig):
+    if config.allocator == "contiguous":
+        return ContiguousAllocator(config.capacity, placement=config.placement)
+    if config.allocator == "buddy":
+        return BuddyAllocator(config.capacity)
+    if config.allocator == "paged":
+        return PagedAllocator(config.capacity, page_size=config.page_size or None)
+    raise ValueError(f"unsupported allocator: {config.allocator}")
+
+
+STAT_KEYS = (
+    "alloc_events",
+    "free_events",
+    "faults",
+    "migrations",
+    "bytes_moved",
+    "admit",
+    "pin",
+    "evict",
+    "compact",
+    "hbm_alloc_fail",
+    "fallback_epochs",
+    "blocked_prefetch",
+    "blocked_evict",
+    "blocked_compact",
+    "grow",
+    "grow_fail",
+    "targeted_compact",
+    "compaction_bytes_saved",
+    "compact_steps",
+    "compact_step_max_bytes",
+    "fragmentation_debt",
+    "share",
+    "share_miss",
+    "dedup_bytes",
+    "cow",
+    "cow_bytes",
+    "cow_fail",
+)
+
+# What a run driven with ``pause_every`` yields when it reaches a pause point.
+_PAUSE = object()
 
 
 def _admit_with_eviction(
     hbm: ContiguousAllocator,
-    policy_obj: Any,
     obj_id: str,
     size: int,
     stats: dict[str, int],
     try_compact_then_alloc,
+    evict,
+    pick_victim: Callable[[], str | None],
+    on_admit: Callable[[str, int], None],
 ) -> tuple[bool, int, int, int]:
     ok, bytes_moved_delta, migrations_delta, compaction_delta = try_compact_then_alloc(obj_id, size)
     while not ok:
-        victim = policy_obj.pick_victim()
+        victim = pick_victim()
         if victim is None:
             break
         if hbm.in_mem(victim):
-            hbm.free(victim)
+            evict(victim)
         stats["evict"] += 1
         ok, extra_bytes, extra_migrations, extra_compaction = try_compact_then_alloc(obj_id, size)
         bytes_moved_delta += extra_bytes
@@ -176,47 +385,170 @@ def _admit_with_eviction(
         compaction_delta += extra_compaction
 
     if ok:
-        _policy_on_admit(policy_obj, obj_id, size)
+        on_admit(obj_id, size)
         stats["admit"] += 1
     else:
         stats["hbm_alloc_fail"] += 1
     return ok, bytes_moved_delta, migrations_delta, compaction_delta
 
 
-def simulate(
-    trace_events: Iterable[dict[str, Any]],
+def _fresh_state(policy: str, cfg: SimulationConfig) -> dict[str, Any]:
+    """The event loop's state before the first event, keyed like a checkpoint's."""
+    budgets = Budgets(max_migration_bytes=cfg.max_migration_bytes, max_faults=cfg.max_faults)
+    return {
+        "hbm": _build_allocator(cfg),
+        "obj_size": {},
+        "safety": SafetyGate(budgets),
+        "sched": SafeWindowScheduler(),
+        "policy": build_policy(policy, cfg),
+        "tiered": TieredMemory(cfg.tiers, cfg.hbm_bandwidth) if cfg.tiers else None,
+        "stats": dict.fromkeys(STAT_KEYS, 0),
+        "compaction_steps": [],
+        "peak_used": 0,
+        "event_i": 0,
+        "event_t": 0,
+        "upcoming_need": 0,
+        "sampler": None,
+        "journal": None,
+    }
+
+
+def _simulate_events(
+    records: Iterable[Record],
     policy: str,
-    config: SimulationConfig | None = None,
-) -> SimResult:
-    cfg = config or SimulationConfig()
-    hbm = ContiguousAllocator(cfg.capacity)
-    obj_size: Dict[str, int] = {}
+    cfg: SimulationConfig,
+    batch_size: int,
+    resume_from: Checkpoint | None = None,
+    checkpoint_at: Iterable[int] = (),
+    checkpoints: list[Checkpoint] | None = None,
+    track_sensitivity: bool = False,
+    pause_every: int = 0,
+) -> Iterator[TimelinePoint | list[TimelinePoint]]:
+    """Generator behind ``simulate_iter``; its return value is the summary SimResult.
 
-    safety = SafetyGate(
-        Budgets(max_migration_bytes=cfg.max_migration_bytes, max_faults=cfg.max_faults)
-    )
-    sched = SafeWindowScheduler()
-    policy_obj = _build_policy(policy, cfg)
-
-    stats = {
-        "alloc_events": 0,
-        "free_events": 0,
-        "faults": 0,
-        "migrations": 0,
-        "bytes_moved": 0,
-        "admit": 0,
-        "pin": 0,
-        "evict": 0,
-        "compact": 0,
-        "hbm_alloc_fail": 0,
-        "fallback_epochs": 0,
-        "blocked_prefetch": 0,
-        "blocked_evict": 0,
-        "blocked_compact": 0,
-    }
+    ``checkpoint_at`` lists event counts after which the state is captured into
+    ``checkpoints``. ``track_sensitivity`` records a ``SensitivityLog`` on the result.
+    ``pause_every`` yields ``_PAUSE`` after each that many events (see ``simulate_many``).
+    """
+    budgets = Budgets(max_migration_bytes=cfg.max_migration_bytes, max_faults=cfg.max_faults)
+    if resume_from is None:
+        state = _fresh_state(policy, cfg)
+    else:
+        state = resume_from.restore(policy, cfg)
+        state["safety"].budgets = budgets
+        state["policy"].reconfigure(cfg)
+    hbm = state["hbm"]
+    obj_size: Dict[str, int] = state["obj_size"]
+    safety = state["safety"]
+    sched = state["sched"]
+    policy_obj = state["policy"]
+    tiered = state["tiered"]
+    stats = state["stats"]
+    compaction_steps: list[tuple[int, int, int]] = state["compaction_steps"]
+    peak_used = state["peak_used"]
+    event_i = state["event_i"]
+    event_t = state["event_t"]
+    upcoming_need = state["upcoming_need"]
+    sampler = state["sampler"]
+    # Bind the policy's hooks once; the event loop never dispatches on the policy name.
+    on_touch = policy_obj.on_touch
+    on_admit = policy_obj.on_admit
+    remove = policy_obj.remove
+    pick_victim = policy_obj.pick_victim
+    decide = policy_obj.decide
+    request_compaction = policy_obj.request_compaction
+    forecast_driven = policy_obj.forecast_driven
+
+    # A resumed run's timeline starts with a keyframe at the checkpoint.
     timeline: list[TimelinePoint] = []
-    event_i = 0
-    upcoming_need = 0
+    # The allocator reports map changes into the journal, so deltas never rescan the map.
+    journal = state["journal"]
+    if journal is None and cfg.timeline_mode != "none":
+        journal = MapJournal()
+        hbm.add_listener(journal)
+    if journal is not None:
+        # Nothing is recorded until this run's first keyframe.
+        journal.paused = True
+    frames = DeltaEncoder(cfg.keyframe_interval, journal)
+    snapshot = _build_snapshot(cfg, sampler)
+    recorded = 0
+    flush_at = max(batch_size, 1)
+    pending_checkpoints = sorted((at for at in set(checkpoint_at) if at >= event_i), reverse=True)
+    checkpoint_next = pending_checkpoints.pop() if pending_checkpoints else -1
+    pause_next = event_i + pause_every if pause_every > 0 else -1
+
+    settings = cfg
+    log = SensitivityLog() if track_sensitivity else None
+    policy_obj.sensitivity = log
+    safety.sensitivity = log
+    if log is not None:
+        # Every config read from here on is an event that the field may influence.
+        cfg = RecordingConfig(cfg, log)
+
+    def capture(
+        peak_used: int, event_i: int, event_t: int, upcoming_need: int, points: int
+    ) -> Checkpoint:
+        state = {
+            "hbm": hbm,
+            "obj_size": obj_size,
+            "safety": safety,
+            "sched": sched,
+            "policy": policy_obj,
+            "tiered": tiered,
+            "stats": stats,
+            "compaction_steps": compaction_steps,
+            "peak_used": peak_used,
+            "event_i": event_i,
+            "event_t": event_t,
+            "upcoming_need": upcoming_need,
+            "sampler": snapshot if isinstance(snapshot, _SampledSnapshot) else None,
+            "journal": journal,
+        }
+        buffer = io.BytesIO()
+        _StatePickler(buffer, pickle.HIGHEST_PROTOCOL).dump(state)
+        return Checkpoint(policy, settings, event_i, event_t, buffer.getvalue(), points)
+
+    def run_compaction(need: int = 0) -> int:
+        if need > 0 and cfg.targeted_compaction:
+            # Clear just enough room for ``need`` when that beats a full sweep. Backends
+            # without a planner never move bytes here, so they skip the full-sweep dry run
+            # unless there turns out to be room already.
+            full_cost = hbm.compaction_cost(reserve=cfg.reserve) if hbm.plans_room else None
+            limit = full_cost
+            if cfg.compaction_budget > 0:
+                budget = min(cfg.compaction_budget, safety.remaining_migration_bytes())
+                limit = budget if limit is None else min(limit, budget)
+            moved = hbm.make_room(need, reserve=cfg.reserve, max_bytes=limit)
+            if moved is not None:
+                if full_cost is None:
+                    full_cost = hbm.compaction_cost(reserve=cfg.reserve)
+                stats["targeted_compact"] += 1
+                stats["compaction_bytes_saved"] += full_cost - moved
+                return moved
+        if cfg.compaction_budget <= 0:
+            return hbm.compact(reserve=cfg.reserve)
+        # Bounded mode: never move more than this epoch's migration budget has left,
+        # so a compaction cannot by itself trip the SafetyGate into fallback.
+        budget = min(cfg.compaction_budget, safety.remaining_migration_bytes())
+        if budget <= 0:
+            return 0
+        moved = hbm.compact_step(budget, reserve=cfg.reserve)
+        stats["compact_steps"] += 1
+        stats["compact_step_max_bytes"] = max(stats["compact_step_max_bytes"], moved)
+        compaction_steps.append((event_t, moved, hbm.fragmentation_debt()))
+        return moved
+
+    def evict(obj: str, size: int | None = None):
+        # Dropping one of several references to a shared block frees no HBM bytes,
+        # so only the last reference has anything to write back.
+        last_reference = hbm.refcount(obj) <= 1
+        hbm.free(obj)
+        if tiered is not None and last_reference:
+            # Demote instead of dropping; the write-back counts against the
+            # same migration budget as promotions.
+            moved = tiered.demote(obj, obj_size.get(obj, 20) if size is None else size)
+            if moved:
+                safety.consume_migration(moved)
 
     def try_compact_then_alloc(obj: str, size: int) -> tuple[bool, int, int, int]:
         ok = hbm.alloc(obj, size)
@@ -224,13 +556,15 @@ def simulate(
         migrations_delta = 0
         compaction_delta = 0
         if ok:
+            if tiered is not None:
+                tiered.promote(obj)
             return ok, bytes_moved_delta, migrations_delta, compaction_delta
         if not sched.can_compact():
             return False, bytes_moved_delta, migrations_delta, compaction_delta
         if not safety.allow_action():
             stats["blocked_compact"] += 1
             return False, bytes_moved_delta, migrations_delta, compaction_delta
-        moved = hbm.compact(reserve=cfg.reserve)
+        moved = run_compaction(size)
         if moved > 0:
             safety.consume_migration(moved)
             stats["bytes_moved"] += moved
@@ -240,17 +574,40 @@ def simulate(
             migrations_delta += 1
             compaction_delta += 1
         ok = hbm.alloc(obj, size)
+        if ok and tiered is not None:
+            tiered.promote(obj)
         return ok, bytes_moved_delta, migrations_delta, compaction_delta
 
-    for ev in trace_events:
+    for record in records:
+        t, et, obj, size, src, write, mu, sigma, _ = record
+        # Hand the previous event's point(s) to the consumer before going on.
+        if len(timeline) >= flush_at:
+            recorded += len(timeline)
+            if batch_size > 0:
+                yield timeline
+            else:
+                yield from timeline
+            timeline = []
+        if event_i == checkpoint_next:
+            checkpoints.append(
+                capture(peak_used, event_i, event_t, upcoming_need, recorded + len(timeline))
+            )
+            checkpoint_next = pending_checkpoints.pop() if pending_checkpoints else -1
+        if event_i == pause_next:
+            # Let the other runs of a lockstep group catch up to this event.
+            pause_next += pause_every
+            yield _PAUSE
+        peak_used = max(peak_used, hbm.used())
         event_i += 1
+        event_t = event_i if t is None else int(t)
+        if log is not None:
+            log.event = event_i - 1
         if event_i % cfg.epoch == 1:
             if safety.fallback:
                 stats["fallback_epochs"] += 1
             safety.reset_epoch()
             sched.end_window()
 
-        et = ev["event"]
         faults_delta = 0
         migrations_delta = 0
         bytes_moved_delta = 0
@@ -258,53 +615,169 @@ def simulate(
 
         if et == "safe_window":
             sched.on_safe_window()
-            _snapshot(hbm, timeline, ev, sched.in_safe_window)
+            if cfg.compaction_budget > 0 and hbm.compaction_pending() and safety.allow_action():
+                # Resume an unfinished bounded sweep in this window.
+                moved = run_compaction()
+                if moved > 0:
+                    safety.consume_migration(moved)
+                    stats["bytes_moved"] += moved
+                    stats["migrations"] += 1
+                    stats["compact"] += 1
+                    bytes_moved_delta += moved
+                    migrations_delta += 1
+                    compaction_delta += 1
+            snapshot(
+                hbm,
+                timeline,
+                frames,
+                record,
+                event_i - 1,
+                sched.in_safe_window,
+                migrations_delta=migrations_delta,
+                bytes_moved_delta=bytes_moved_delta,
+                compaction_delta=compaction_delta,
+            )
             continue
 
         if et == "alloc":
-            obj = ev["id"]
-            size = int(ev["size"])
+            size = int(size)
+            previous_size = obj_size.get(obj)
             obj_size[obj] = size
             stats["alloc_events"] += 1
             upcoming_need = max(upcoming_need, size)
-            _snapshot(hbm, timeline, ev, sched.in_safe_window)
+            if previous_size is not None and size > previous_size and hbm.in_mem(obj):
+                # Re-allocating a live id with a larger size is a growth event
+                # (e.g. a KV cache gaining tokens). A shared block diverges here.
+                stats["grow"] += 1
+                shared = hbm.refcount(obj) > 1
+                copied = hbm.grow(obj, size)
+                if copied is None:
+                    # The block never reached the new size; write back what HBM held.
+                    evict(obj, previous_size)
+                    remove(obj)
+                    stats["grow_fail"] += 1
+                    if shared:
+                        stats["cow_fail"] += 1
+                    copied = 0
+                elif shared:
+                    stats["cow"] += 1
+                    stats["cow_bytes"] += copied
+                if copied > 0:
+                    safety.consume_migration(copied)
+                    stats["bytes_moved"] += copied
+                    stats["migrations"] += 1
+                    bytes_moved_delta += copied
+                    migrations_delta += 1
+            elif tiered is not None and not hbm.in_mem(obj):
+                # New objects start in the top tier; only what that pushes down is a transfer.
+                demoted = tiered.demoted_bytes
+                tiered.place(obj, size)
+                if tiered.demoted_bytes > demoted:
+                    safety.consume_migration(tiered.demoted_bytes - demoted)
+            snapshot(
+                hbm,
+                timeline,
+                frames,
+                record,
+                event_i - 1,
+                sched.in_safe_window,
+                migrations_delta=migrations_delta,
+                bytes_moved_delta=bytes_moved_delta,
+            )
+            continue
+
+        if et in ("share", "fork"):
+            resident = hbm.in_mem(obj)
+            if not resident:
+                obj_size[obj] = obj_size.get(src, 20)
+            size = obj_size.get(obj, 20)
+            if resident:
+                # A repeated share / fork of a resident id references nothing new.
+                pass
+            elif not hbm.in_mem(src):
+                stats["share_miss"] += 1
+            elif cfg.dedup:
+                hbm.share(obj, src)
+                on_admit(obj, size)
+                stats["share"] += 1
+                stats["dedup_bytes"] += size
+            else:
+                # Without dedup every reference is a private copy of the source.
+                ok, bytes_moved_delta, migrations_delta, compaction_delta = try_compact_then_alloc(
+                    obj, size
+                )
+                if ok:
+                    on_admit(obj, size)
+                    safety.consume_migration(size)
+                    stats["bytes_moved"] += size
+                    stats["migrations"] += 1
+                    bytes_moved_delta += size
+                    migrations_delta += 1
+                else:
+                    stats["hbm_alloc_fail"] += 1
+            snapshot(
+                hbm,
+                timeline,
+                frames,
+                record,
+                event_i - 1,
+                sched.in_safe_window,
+                migrations_delta=migrations_delta,
+                bytes_moved_delta=bytes_moved_delta,
+                compaction_delta=compaction_delta,
+            )
             continue
 
         if et == "free":
-            obj = ev["id"]
             obj_size.pop(obj, None)
             if hbm.in_mem(obj):
                 hbm.free(obj)
-            _policy_remove(policy_obj, obj)
+            if tiered is not None:
+                tiered.discard(obj)
+            remove(obj)
             stats["free_events"] += 1
-            _snapshot(hbm, timeline, ev, sched.in_safe_window)
+            snapshot(hbm, timeline, frames, record, event_i - 1, sched.in_safe_window)
             continue
 
         if et != "touch":
-            _snapshot(hbm, timeline, ev, sched.in_safe_window)
+            snapshot(hbm, timeline, frames, record, event_i - 1, sched.in_safe_window)
             continue
 
-        obj = ev["id"]
         size = obj_size.get(obj, 20)
         in_hbm = hbm.in_mem(obj)
-        mu = ev.get("mu")
-        sigma = ev.get("sigma")
         fc = Forecast(float(mu), float(sigma)) if mu is not None and sigma is not None else None
 
+        if tiered is not None:
+            tiered.touch(obj, size, in_hbm)
+
+        if in_hbm and write and hbm.refcount(obj) > 1:
+            # First write through a shared reference: copy on write.
+            copied = hbm.unshare(obj)
+            if copied is None:
+                stats["cow_fail"] += 1
+            else:
+                safety.consume_migration(copied)
+                stats["cow"] += 1
+                stats["cow_bytes"] += copied
+                stats["bytes_moved"] += copied
+                stats["migrations"] += 1
+                bytes_moved_delta += copied
+                migrations_delta += 1
+
         if not in_hbm:
             safety.consume_fault(1)
             stats["faults"] += 1
             faults_delta += 1
 
-        if policy == "lru":
+        if not forecast_driven:
             if in_hbm:
-                policy_obj.on_touch(obj)
+                on_touch(obj)
             elif cfg.miss_mode == "demand":
                 if not (safety.allow_action() and sched.can_prefetch()):
                     stats["blocked_prefetch"] += 1
                 else:
                     ok, extra_bytes, extra_migrations, extra_compaction = _admit_with_eviction(
-                        hbm, policy_obj, obj, size, stats, try_compact_then_alloc
+                        hbm, obj, size, stats, try_compact_then_alloc, evict, pick_victim, on_admit
                     )
                     if ok:
                         safety.consume_migration(size)
@@ -317,10 +790,12 @@ def simulate(
                         bytes_moved_delta += extra_bytes
                         migrations_delta += extra_migrations
                         compaction_delta += extra_compaction
-            _snapshot(
+            snapshot(
                 hbm,
                 timeline,
-                ev,
+                frames,
+                record,
+                event_i - 1,
                 sched.in_safe_window,
                 faults_delta,
                 migrations_delta,
@@ -329,44 +804,15 @@ def simulate(
             )
             continue
 
-        if policy == "clockpro":
-            if in_hbm:
-                policy_obj.on_touch(obj)
-            elif cfg.miss_mode == "demand":
-                if not (safety.allow_action() and sched.can_prefetch()):
-                    stats["blocked_prefetch"] += 1
-                else:
-                    ok, extra_bytes, extra_migrations, extra_compaction = _admit_with_eviction(
-                        hbm, policy_obj, obj, size, stats, try_compact_then_alloc
-                    )
-                    if ok:
-                        safety.consume_migration(size)
-                        stats["bytes_moved"] += size
-                        stats["migrations"] += 1
-                        bytes_moved_delta += size + extra_bytes
-                        migrations_delta += 1 + extra_migrations
-                        compaction_delta += extra_compaction
-                    else:
-                        bytes_moved_delta += extra_bytes
-                        migrations_delta += extra_migrations
-                        compaction_delta += extra_compaction
-            _snapshot(
-                hbm,
-                timeline,
-                ev,
-                sched.in_safe_window,
-                faults_delta,
-                migrations_delta,
-                bytes_moved_delta,
-                compaction_delta,
-            )
-            continue
-
-        decision = policy_obj.decide_on_touch(obj, in_hbm, fc)
+        if in_hbm:
+            on_touch(obj)
+        decision = decide(obj, in_hbm, fc)
 
         if decision.action == "admit":
             if not sched.can_prefetch():
-                _snapshot(hbm, timeline, ev, sched.in_safe_window, faults_delta)
+                snapshot(
+                    hbm, timeline, frames, record, event_i - 1, sched.in_safe_window, faults_delta
+                )
                 continue
             if not safety.allow_action():
                 stats["blocked_prefetch"] += 1
@@ -393,12 +839,14 @@ def simulate(
             stats["pin"] += 1
         elif decision.action == "evict":
             if not sched.can_evict():
-                _snapshot(hbm, timeline, ev, sched.in_safe_window, faults_delta)
+                snapshot(
+                    hbm, timeline, frames, record, event_i - 1, sched.in_safe_window, faults_delta
+                )
                 continue
             if not safety.allow_action():
                 stats["blocked_evict"] += 1
             elif hbm.in_mem(obj):
-                hbm.free(obj)
+                evict(obj)
                 stats["evict"] += 1
 
         if not in_hbm and cfg.miss_mode == "demand":
@@ -422,8 +870,8 @@ def simulate(
                 else:
                     stats["hbm_alloc_fail"] += 1
 
-        metrics = compute_metrics(hbm.extents_free())
-        compaction_request = policy_obj.request_compaction(
+        metrics = hbm.metrics()
+        compaction_request = request_compaction(
             metrics.external_frag,
             metrics.lfe,
             upcoming_need,
@@ -433,7 +881,7 @@ def simulate(
             if not safety.allow_action():
                 stats["blocked_compact"] += 1
             else:
-                moved = hbm.compact(reserve=cfg.reserve)
+                moved = run_compaction()
                 if moved > 0:
                     safety.consume_migration(moved)
                     stats["bytes_moved"] += moved
@@ -443,10 +891,12 @@ def simulate(
                     migrations_delta += 1
                     compaction_delta += 1
 
-        _snapshot(
+        snapshot(
             hbm,
             timeline,
-            ev,
+            frames,
+            record,
+            event_i - 1,
             sched.in_safe_window,
             faults_delta,
             migrations_delta,
@@ -454,35 +904,265 @@ def simulate(
             compaction_delta,
         )
 
-    final_metrics = compute_metrics(hbm.extents_free())
-    if hasattr(policy_obj, "metrics"):
-        policy_metrics = policy_obj.metrics()
-    else:
-        policy_metrics = {
-            "hot_hit_rate": 0.0,
-            "cold_hit_rate": 0.0,
-            "promotions": 0,
-            "demotions": 0,
-        }
+    if event_i == checkpoint_next:
+        checkpoints.append(
+            capture(peak_used, event_i, event_t, upcoming_need, recorded + len(timeline))
+        )
+    peak_used = max(peak_used, hbm.used())
+    if timeline:
+        recorded += len(timeline)
+        if batch_size > 0:
+            yield timeline
+        else:
+            yield from timeline
 
-    final_blocks = [
-        (block.start, block.size, block.obj_id)
-        for block in sorted(hbm.blocks.values(), key=lambda b: b.start)
-    ]
+    final_metrics = hbm.metrics()
+    stats["fragmentation_debt"] = hbm.fragmentation_debt()
+    policy_metrics = policy_obj.metrics()
+
+    final_blocks = hbm.spans()
     return SimResult(
         policy=policy,
-        miss_mode=cfg.miss_mode,
-        config=cfg,
+        miss_mode=settings.miss_mode,
+        config=settings,
         stats=stats,
         fragmentation=final_metrics,
         policy_metrics=policy_metrics,
-        timeline=timeline,
+        timeline=Timeline(capacity=0),
         final_free_extents=list(hbm.extents_free()),
         final_blocks=final_blocks,
         final_map=render_map(hbm),
+        final_used=hbm.used(),
+        peak_used=peak_used,
+        timeline_points=recorded,
+        compaction_steps=compaction_steps,
+        tier_stats=tiered.stats() if tiered is not None else {},
+        sensitivity=log,
+    )
+
+
+class SimulationRun:
+    """One simulation, consumed incrementally.
+
+    Iterating yields ``TimelinePoint`` objects in trace order (or lists of up
+    to ``batch_size`` points) as the events are processed, so neither the
+    trace nor the timeline has to be held in memory. Once the iterator is
+    exhausted ``result`` holds the summary ``SimResult``, whose ``timeline`` is
+    left empty.
+
+    With ``resume_from`` the run skips the checkpoint's events and continues
+    from its state; stats and the final map are then identical to an
+    uninterrupted run, while the timeline covers only the resumed events.
+    ``checkpoint_at`` event counts are captured into ``checkpoints`` as the
+    run passes them, and ``track_sensitivity`` attaches a ``SensitivityLog``
+    to the result (see ``incremental.py``).
+    """
+
+    def __init__(
+        self,
+        trace_events: Iterable[dict[str, Any]],
+        policy: str,
+        config: SimulationConfig | None = None,
+        batch_size: int = 0,
+        resume_from: Checkpoint | None = None,
+        checkpoint_at: Iterable[int] = (),
+        track_sensitivity: bool = False,
+    ):
+        self.policy = policy
+        if config is None:
+            config = resume_from.config if resume_from is not None else SimulationConfig()
+        self.config = config
+        self.batch_size = batch_size
+        self.result: SimResult | None = None
+        self.checkpoints: list[Checkpoint] = []
+        records = trace_records(trace_events)
+        if resume_from is not None:
+            records = islice(records, resume_from.events, None)
+        self._events = _simulate_events(
+            records,
+            policy,
+            self.config,
+            batch_size,
+            resume_from,
+            checkpoint_at,
+            self.checkpoints,
+            track_sensitivity,
+        )
+
+    def __iter__(self) -> SimulationRun:
+        return self
+
+    def __next__(self) -> TimelinePoint | list[TimelinePoint]:
+        try:
+            return next(self._events)
+        except StopIteration as stop:
+            self.result = stop.value
+            raise
+
+    def finish(self) -> SimResult:
+        """Run the remaining events, discarding their points, and return the summary."""
+        for _ in self:
+            pass
+        return self.result
+
+
+def simulate_iter(
+    trace_events: Iterable[dict[str, Any]],
+    policy: str,
+    config: SimulationConfig | None = None,
+    batch_size: int = 0,
+    resume_from: Checkpoint | None = None,
+    checkpoint_at: Iterable[int] = (),
+    track_sensitivity: bool = False,
+) -> SimulationRun:
+    return SimulationRun(
+        trace_events, policy, config, batch_size, resume_from, checkpoint_at, track_sensitivity
     )
 
 
+def simulate(
+    trace_events: Iterable[dict[str, Any]],
+    policy: str,
+    config: SimulationConfig | None = None,
+    resume_from: Checkpoint | None = None,
+) -> SimResult:
+    """Run a trace and return its summary and timeline.
+
+    ``resume_from`` continues from a ``Checkpoint`` of the same trace and policy
+    instead of from ``t=0``; ``trace_events`` is still the whole trace. The
+    config may differ from the checkpoint's except in ``STRUCTURAL_FIELDS``.
+    """
+    run = simulate_iter(trace_events, policy, config, resume_from=resume_from)
+    timeline = Timeline.from_points(run)
+    result = run.result
+    result.timeline = timeline
+    return result
+
+
+def checkpoint(
+    trace_events: Iterable[dict[str, Any]],
+    policy: str,
+    at: int,
+    config: SimulationConfig | None = None,
+) -> Checkpoint:
+    """Simulate only the first ``at`` events and return the state after them."""
+    config = config or SimulationConfig()
+    # Nothing before the checkpoint is reported, so skip the timeline on the way there.
+    run = simulate_iter(
+        islice(trace_events, at),
+        policy,
+        replace(config, timeline_mode="none"),
+        checkpoint_at=(at,),
+    )
+    run.finish()
+    if not run.checkpoints:
+        raise ValueError(f"trace has fewer than {at} events")
+    return replace(run.checkpoints[0], config=config)
+
+
+def catalog_checkpoint(
+    policy: str,
+    config: SimulationConfig,
+    obj_size: dict[str, int],
+    upcoming_need: int = 0,
+    event_i: int = 0,
+    event_t: int = 0,
+) -> Checkpoint:
+    """A checkpoint with an empty HBM whose object catalog already holds ``obj_size``.
+
+    This is the state a fast-forward over a trace prefix produces when it only
+    replays alloc/free bookkeeping: object sizes carry over, while residency,
+    policy and safety state start cold. The checkpoint has consumed none of the
+    events it is resumed on, so pass only the events after the prefix;
+    ``event_i`` keeps epoch boundaries and timeline positions aligned with the
+    full trace.
+    """
+    state = _fresh_state(policy, config)
+    state.update(
+        obj_size=dict(obj_size), upcoming_need=upcoming_need, event_i=event_i, event_t=event_t
+    )
+    buffer = io.BytesIO()
+    _StatePickler(buffer, pickle.HIGHEST_PROTOCOL).dump(state)
+    return Checkpoint(policy, config, 0, event_t, buffer.getvalue())
+
+
+RunSpec = tuple[str, "SimulationConfig | None"]
+
+
+def _advance(events: Iterator, timeline: Timeline) -> SimResult | None:
+    """Run a lockstep member to its next pause; return its result once it has finished."""
+    try:
+        while True:
+            points = next(events)
+            if points is _PAUSE:
+                return None
+            timeline.extend(points)
+    except StopIteration as stop:
+        result = stop.value
+        result.timeline = timeline
+        return result
+
+
+def _simulate_shard(
+    trace: list[dict[str, Any]] | BinaryTrace | str, runs: list[RunSpec], window: int
+):
+    return simulate_many(trace, runs, window=window)
+
+
+def simulate_many(
+    trace_events: Iterable[dict[str, Any]] | BinaryTrace | str | Path,
+    runs: Sequence[RunSpec],
+    shards: int = 1,
+    window: int = 256,
+) -> list[SimResult]:
+    """Simulate several ``(policy, config)`` runs over a single pass of one trace.
+
+    Each event is parsed once and handed to every run's simulator state; the runs
+    advance in lockstep ``window`` events at a time, so at most that many parsed
+    events are buffered. ``trace_events`` may also be a trace path, which is then
+    streamed. ``shards > 1`` splits the runs across that many processes, each
+    making its own pass; a path is parsed in every process, an event iterable is
+    materialized and sent to them. Results come back in ``runs`` order and are
+    identical to calling ``simulate`` once per run.
+    """
+    if window < 1:
+        raise ValueError(f"window must be >= 1, got {window}")
+    runs = [(policy, config or SimulationConfig()) for policy, config in runs]
+    if shards > 1 and len(runs) > 1:
+        if isinstance(trace_events, (str, Path, BinaryTrace)):
+            # Paths and memory-mapped traces are reopened by each worker.
+            trace = trace_events if isinstance(trace_events, BinaryTrace) else str(trace_events)
+        else:
+            trace = list(trace_events)
+        groups = [list(range(len(runs)))[shard::shards] for shard in range(shards)]
+        groups = [group for group in groups if group]
+        results: list[SimResult | None] = [None] * len(runs)
+        with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+            futures = [
+                pool.submit(_simulate_shard, trace, [runs[index] for index in group], window)
+                for group in groups
+            ]
+            for group, future in zip(groups, futures):
+                for index, result in zip(group, future.result()):
+                    results[index] = result
+        return results
+    if isinstance(trace_events, (str, Path)):
+        trace_events = open_trace(trace_events)
+    feeds = tee(trace_records(trace_events), len(runs))
+    members = [
+        (_simulate_events(feed, policy, config, window, pause_every=window), Timeline())
+        for feed, (policy, config) in zip(feeds, runs)
+    ]
+    results = [None] * len(runs)
+    pending = list(range(len(runs)))
+    while pending:
+        # Every member pauses at the same event, so tee never buffers more than a window.
+        for index in pending:
+            results[index] = _advance(*members[index])
+        pending = [index for index in pending if results[index] is None]
+    return results
+
+
 def _print_summary(result: SimResult, show_map: bool = False):
     stats = result.stats
     m = result.fragmentation
@@ -491,16 +1171,17 @@ def _print_summary(result: SimResult, show_map: bool = False):
     print("=" * 72)
     print(
         f"Policy: {result.policy}   Miss mode: {result.miss_mode}   "
-        f"Demand-fallback-only: {result.config.demand_fallback_only}"
+        f"Demand-fallback-only: {result.config.demand_fallback_only}   "
+        f"Allocator: {result.config.allocator}   Placement: {result.config.placement}"
     )
     print(
         f"HBM Capacity: {result.config.capacity}  "
-        f"HBM Used: {result.timeline[-1].occupancy if result.timeline else 0}  "
+        f"HBM Used: {result.final_used}  "
         f"HBM Free: {m.total_free}  Reserve: {result.config.reserve}"
     )
     print(
         f"Catalog events: alloc={stats['alloc_events']} free={stats['free_events']}  "
-        f"Timeline points: {len(result.timeline)}"
+        f"Timeline points: {result.timeline_points}"
     )
     print(
         f"Faults: {stats['faults']}  Migrations: {stats['migrations']}  "
@@ -510,13 +1191,26 @@ def _print_summary(result: SimResult, show_map: bool = False):
         f"Decisions: admit={stats['admit']} pin={stats['pin']} "
         f"evict={stats['evict']} compact={stats['compact']}"
     )
+    if stats["targeted_compact"]:
+        print(
+            f"Targeted compaction: {stats['targeted_compact']} "
+            f"(saved {stats['compaction_bytes_saved']} bytes vs full compaction)"
+        )
+    if result.config.compaction_budget > 0:
+        print(
+            f"Incremental compaction: steps={stats['compact_steps']} "
+            f"max_step_bytes={stats['compact_step_max_bytes']} "
+            f"budget={result.config.compaction_budget} "
+            f"fragmentation_debt={stats['fragmentation_debt']}"
+        )
     print(
         f"Blocked actions: prefetch={stats['blocked_prefetch']} "
         f"evict={stats['blocked_evict']} compact={stats['blocked_compact']}"
     )
     print(
         f"HBM alloc failures: {stats['hbm_alloc_fail']}  "
-        f"Fallback epochs: {stats['fallback_epochs']}"
+        f"Fallback epochs: {stats['fallback_epochs']}  "
+        f"Growth: {stats['grow']} (failed {stats['grow_fail']})"
     )
     if result.policy == "clockpro":
         print(
@@ -526,10 +1220,30 @@ def _print_summary(result: SimResult, show_map: bool = False):
             f"promotions={result.policy_metrics['promotions']} "
             f"demotions={result.policy_metrics['demotions']}"
         )
+    if stats["share"] or stats["share_miss"] or stats["cow"]:
+        print(
+            f"Sharing: refs={stats['share']} (missed {stats['share_miss']}) "
+            f"dedup_bytes={stats['dedup_bytes']} cow={stats['cow']} "
+            f"cow_bytes={stats['cow_bytes']} cow_failed={stats['cow_fail']}"
+        )
+    if result.tier_stats:
+        tiers = result.tier_stats
+        print(
+            f"Tiers: stall={tiers['stall_time_s'] * 1e3:.3f} ms  "
+            f"effective_throughput={tiers['effective_throughput'] / 1e9:.2f} GB/s  "
+            f"promotions={tiers['promotions']} demotions={tiers['demotions']} "
+            f"dropped={tiers['dropped']}"
+        )
+        for tier in result.config.tiers:
+            print(
+                f"  {tier.name}: used={tiers[tier.name + '_used']} "
+                f"peak={tiers[tier.name + '_peak']} fetches={tiers[tier.name + '_fetches']}"
+            )
     print("-" * 72)
     print(
         f"Fragmentation: LFE={m.lfe} holes={m.hole_count} "
-        f"external_frag={m.external_frag:.3f} entropy={m.entropy:.3f}"
+        f"external_frag={m.external_frag:.3f} entropy={m.entropy:.3f} "
+        f"internal_frag={m.internal_frag}"
     )
     if show_map:
         print("-" * 72)
@@ -538,10 +1252,49 @@ def _print_summary(result: SimResult, show_map: bool = False):
     print("=" * 72)
 
 
+def _write_json(run: SimulationRun, handle) -> SimResult:
+    """Stream ``run`` to ``handle`` as JSON: timeline points as they arrive, then the summary."""
+    handle.write('{\n  "timeline": [')
+    separator = "\n    "
+    for point in run:
+        handle.write(separator + json.dumps(asdict(point)))
+        separator = ",\n    "
+    handle.write("\n  ]")
+    result = run.result
+    summary = {
+        "policy": result.policy,
+        "miss_mode": result.miss_mode,
+        "config": asdict(result.config),
+        "stats": result.stats,
+        "fragmentation": asdict(result.fragmentation),
+        "policy_metrics": result.policy_metrics,
+        "compaction_steps": result.compaction_steps,
+        "tier_stats": result.tier_stats,
+    }
+    for key, value in summary.items():
+        handle.write(f",\n  {json.dumps(key)}: {json.dumps(value)}")
+    handle.write("\n}\n")
+    return result
+
+
 def _build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--trace", required=True)
-    parser.add_argument("--policy", choices=["confidence", "lru", "clockpro"], default="confidence")
+    parser.add_argument(
+        "--trace",
+        required=True,
+        help="JSONL trace (optionally .gz/.xz/.zst compressed) or binary .hbmt trace.",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=0,
+        metavar="BATCHES",
+        help=(
+            "Parse a JSONL trace on a background thread, up to this many 1024-event batches "
+            "ahead of the simulator."
+        ),
+    )
+    parser.add_argument("--policy", choices=available_policies(), default="confidence")
     parser.add_argument(
         "--miss-mode",
         choices=["serve", "demand"],
@@ -567,13 +1320,95 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument("--max-faults", type=int, default=6)
     parser.add_argument("--admit-lb", type=float, default=0.60)
     parser.add_argument("--evict-ub", type=float, default=0.35)
+    parser.add_argument("--allocator", choices=ALLOCATORS, default="contiguous")
+    parser.add_argument("--placement", choices=sorted(PLACEMENTS), default="first_fit")
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=0,
+        help="Page size for --allocator paged (default: capacity / 1024, at least 16).",
+    )
+    parser.add_argument(
+        "--compaction-budget",
+        type=int,
+        default=0,
+        help="Bytes moved per incremental compaction step (default 0: full compaction).",
+    )
+    parser.add_argument(
+        "--full-compaction",
+        action="store_true",
+        help="Always run a full compaction instead of clearing room for the failed allocation.",
+    )
+    parser.add_argument(
+        "--tiers",
+        default="none",
+        help=(
+            "Lower memory tiers: 'default' (host DRAM + NVMe) or "
+            "'name:capacity:bandwidth:latency,...' with capacity in bytes "
+            "or as a multiple like '4x'."
+        ),
+    )
+    parser.add_argument("--hbm-bandwidth", type=float, default=HBM_BANDWIDTH)
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Treat share/fork events as private copies (to measure what sharing saves).",
+    )
+    parser.add_argument(
+        "--timeline-mode",
+        choices=TIMELINE_MODES,
+        default="full",
+        help=(
+            "Timeline points to record: every event ('full'), every --sample-every events "
+            "plus large metric changes ('sampled'), or none ('none', summary only)."
+        ),
+    )
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument(
+        "--sample-threshold",
+        type=float,
+        default=0.05,
+        help="Also record a sampled point when occupancy/capacity or external_frag moves this much.",
+    )
+    parser.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=64,
+        help=(
+            "Store the full memory map every N timeline points and deltas in between "
+            "(1: always full)."
+        ),
+    )
+    parser.add_argument(
+        "--checkpoint-at",
+        type=int,
+        help="Save the simulator state after this many events to --checkpoint-out.",
+    )
+    parser.add_argument("--checkpoint-out", default="checkpoint.pkl")
+    parser.add_argument(
+        "--resume-from",
+        help="Continue from a saved checkpoint of the same trace and policy instead of t=0.",
+    )
+    parser.add_argument(
+        "--start-t",
+        type=int,
+        help=(
+            "Simulate only events with t >= START_T. The prefix is skipped through the trace's "
+            "sidecar index (built on first use) and only its alloc/free bookkeeping is replayed."
+        ),
+    )
+    parser.add_argument("--end-t", type=int, help="Simulate only events with t <= END_T.")
     parser.add_argument("--show-map", action="store_true")
     parser.add_argument("--json", dest="json_path")
     return parser
 
 
 def main(argv: list[str] | None = None):
-    args = _build_arg_parser().parse_args(argv)
+    parser = _build_arg_parser()
+    args = parser.parse_args(argv)
+    windowed = args.start_t is not None or args.end_t is not None
+    if windowed and args.resume_from:
+        parser.error("--start-t/--end-t cannot be combined with --resume-from")
     config = SimulationConfig(
         miss_mode=args.miss_mode,
         demand_fallback_only=args.demand_fallback_only,
@@ -584,21 +1419,48 @@ def main(argv: list[str] | None = None):
         max_faults=args.max_faults,
         admit_lb=args.admit_lb,
         evict_ub=args.evict_ub,
+        placement=args.placement,
+        allocator=args.allocator,
+        page_size=args.page_size,
+        compaction_budget=args.compaction_budget,
+        targeted_compaction=not args.full_compaction,
+        tiers=parse_tiers(args.tiers, args.capacity),
+        hbm_bandwidth=args.hbm_bandwidth,
+        dedup=not args.no_dedup,
+        keyframe_interval=args.keyframe_interval,
+        timeline_mode=args.timeline_mode,
+        sample_every=args.sample_every,
+        sample_threshold=args.sample_threshold,
+    )
+    resume_from = Checkpoint.load(args.resume_from) if args.resume_from else None
+    if windowed:
+        window = TraceIndex.open(args.trace).window(args.start_t, args.end_t)
+        need = window.upcoming_need(build_policy(args.policy, config).forecast_driven)
+        resume_from = catalog_checkpoint(
+            args.policy, config, window.catalog, need, window.start, window.event_t
+        )
+        trace_events = window.events
+        if args.read_ahead > 0 and not isinstance(trace_events, BinaryTrace):
+            trace_events = read_ahead(trace_events, args.read_ahead)
+    else:
+        trace_events = open_trace(args.trace, args.read_ahead)
+    checkpoint_at = () if args.checkpoint_at is None else (args.checkpoint_at,)
+    run = simulate_iter(
+        trace_events,
+        args.policy,
+        config,
+        resume_from=resume_from,
+        checkpoint_at=checkpoint_at,
     )
-    result = simulate(load_trace(args.trace), args.policy, config)
-    _print_summary(result, show_map=args.show_map)
     if args.json_path:
-        payload = {
-            "policy": result.policy,
-            "miss_mode": result.miss_mode,
-            "config": asdict(result.config),
-            "stats": result.stats,
-            "fragmentation": asdict(result.fragmentation),
-            "policy_metrics": result.policy_metrics,
-            "timeline": [asdict(point) for point in result.timeline],
-        }
-        Path(args.json_path).write_text(json.dumps(payload, indent=2), encoding="utf-8")
-
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            result = _write_json(run, handle)
+    else:
+        result = run.finish()
+    for saved in run.checkpoints:
+        saved.save(args.checkpoint_out)
+        print(f"Checkpoint after {saved.events} events (t={saved.t}) -> {args.checkpoint_out}")
+    _print_summary(result, show_map=args.show_map)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from memory.tiers import parse_tiers
+from policy.registry import available_policies
+from result_cache import ResultCache, default_cache, simulate_trace
+from run_sim import SimulationConfig, load_trace
+
+DEFAULT_OUT = Path("sweeps") / "latest"
+CHUNK_PREFIX = "chunk-"
+
+# Scalar config fields a spec may vary; ``tiers`` is given as a run_sim.py --tiers string.
+SWEEPABLE = {
+    item.name: type(item.default)
+    for item in fields(SimulationConfig)
+    if isinstance(item.default, (bool, int, float, str))
+}
+SWEEPABLE["tiers"] = str
+
+
+@dataclass(frozen=True)
+class SweepRun:
+    run_id: str
+    trace: str
+    policy: str
+    params: dict[str, Any]
+
+
+def _coerce(name: str, value: Any) -> Any:
+    if name not in SWEEPABLE:
+        raise ValueError(f"unsupported sweep field: {name}")
+    kind = SWEEPABLE[name]
+    if kind is bool and isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return kind(value)
+
+
+def _run_id(trace: str, policy: str, params: dict[str, Any]) -> str:
+    key = json.dumps([trace, policy, params], sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _grid(params: dict[str, list[Any]]) -> Iterator[dict[str, Any]]:
+    names = sorted(params)
+    for values in itertools.product(*(params[name] for name in names)):
+        yield {name: _coerce(name, value) for name, value in zip(names, values)}
+
+
+def _samples(params: dict[str, Any], count: int, seed: int) -> Iterator[dict[str, Any]]:
+    """Draw ``count`` configs; a list is sampled uniformly, ``{"low", "high"}`` as a range."""
+    rng = random.Random(seed)
+    names = sorted(params)
+    for _ in range(count):
+        draw = {}
+        for name in names:
+            choice = params[name]
+            if isinstance(choice, dict):
+                low, high = choice["low"], choice["high"]
+                if SWEEPABLE.get(name) is int:
+                    value = rng.randint(int(low), int(high))
+                else:
+                    value = rng.uniform(float(low), float(high))
+            else:
+                value = rng.choice(list(choice))
+            draw[name] = _coerce(name, value)
+        yield draw
+
+
+def expand_spec(spec: dict[str, Any]) -> list[SweepRun]:
+    """Cross the spec's parameter grid (or random draws) with its traces and policies.
+
+    ``spec`` holds ``traces``, ``policies``, ``params`` (field -> list of values, or
+    ``{"low", "high"}`` ranges in random mode), an optional ``base`` of fixed fields,
+    and ``mode`` (``grid`` or ``random`` with ``samples`` and ``seed``). Each run gets a
+    stable id derived from its trace, policy and full parameter set, which is what a
+    resumed sweep matches completed runs on.
+    """
+    traces = [str(trace) for trace in spec.get("traces", [])]
+    policies = list(spec.get("policies", ["confidence"]))
+    if not traces:
+        raise ValueError("sweep spec lists no traces")
+    unknown = sorted(set(policies) - set(available_policies()))
+    if unknown:
+        raise ValueError(f"unsupported policy: {', '.join(unknown)}")
+    base = {name: _coerce(name, value) for name, value in spec.get("base", {}).items()}
+    params = spec.get("params", {})
+    mode = spec.get("mode", "grid")
+    if mode == "grid":
+        configs = list(_grid(params))
+    elif mode == "random":
+        configs = list(_samples(params, int(spec.get("samples", 16)), int(spec.get("seed", 0))))
+    else:
+        raise ValueError(f"unsupported sweep mode: {mode}")
+    runs = []
+    for trace, policy, overrides in itertools.product(traces, policies, configs):
+        settings = {**base, **overrides}
+        runs.append(SweepRun(_run_id(trace, policy, settings), trace, policy, settings))
+    return runs
+
+
+_TRACES: dict[str, list[dict[str, Any]]] = {}
+
+
+def _worker_trace(path: str) -> list[dict[str, Any]]:
+    # Each worker process keeps its parsed traces, so a trace is read once per worker.
+    trace_events = _TRACES.get(path)
+    if trace_events is None:
+        trace_events = _TRACES[path] = load_trace(path)
+    return trace_events
+
+
+def run_one(run: SweepRun, cache: ResultCache | None = None) -> dict[str, Any]:
+    """Simulate one sweep point (through ``cache`` if given) and flatten it into a results row."""
+    settings: dict[str, Any] = {"miss_mode": "demand", "timeline_mode": "none", **run.params}
+    capacity = settings.get("capacity", SimulationConfig.capacity)
+    settings["tiers"] = parse_tiers(settings.get("tiers", "none"), capacity)
+    config = SimulationConfig(**settings)
+    started = time.perf_counter()
+    result = simulate_trace(
+        run.trace, run.policy, config, cache, lambda: _worker_trace(run.trace)
+    )
+    elapsed = time.perf_counter() - started
+    row: dict[str, Any] = {"run_id": run.run_id, "trace": run.trace, "policy": run.policy}
+    row.update(run.params)
+    row.update(result.to_benchmark_row())
+    row["hbm_alloc_fail"] = result.stats["hbm_alloc_fail"]
+    row["peak_used"] = result.peak_used
+    row["elapsed_s"] = elapsed
+    return row
+
+
+def _columns(rows: list[dict[str, Any]]) -> dict[str, np.ndarray]:
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    columns = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if any(value is None for value in values):
+            # Metrics a policy or tier setup does not report are NaN for that row.
+            values = [np.nan if value is None else value for value in values]
+        columns[name] = np.asarray(values)
+    return columns
+
+
+def _chunk_paths(out_dir: Path) -> list[Path]:
+    return sorted(out_dir.glob(f"{CHUNK_PREFIX}*.npz"))
+
+
+def _next_chunk_index(out_dir: Path) -> int:
+    # Chunk numbers can have gaps (a deleted chunk), so count up from the highest.
+    numbers = [int(path.stem[len(CHUNK_PREFIX):]) for path in _chunk_paths(out_dir)]
+    return max(numbers, default=-1) + 1
+
+
+def _write_chunk(out_dir: Path, index: int, rows: list[dict[str, Any]]):
+    path = out_dir / f"{CHUNK_PREFIX}{index:05d}.npz"
+    partial = path.with_suffix(".tmp")
+    with open(partial, "wb") as handle:
+        np.savez(handle, **_columns(rows))
+    # A chunk only appears once it is complete, so an interrupted write is simply redone.
+    os.replace(partial, path)
+
+
+def load_results(out_dir: str | Path) -> dict[str, np.ndarray]:
+    """Concatenate every results chunk into one array per column."""
+    chunks = []
+    for path in _chunk_paths(Path(out_dir)):
+        with np.load(path, allow_pickle=False) as data:
+            chunks.append({name: data[name] for name in data.files})
+    names = list(dict.fromkeys(name for chunk in chunks for name in chunk))
+    columns = {}
+    for name in names:
+        parts = []
+        for chunk in chunks:
+            size = len(chunk["run_id"])
+            parts.append(chunk.get(name, np.full(size, np.nan)))
+        columns[name] = np.concatenate(parts)
+    return columns
+
+
+def completed_runs(out_dir: str | Path) -> set[str]:
+    completed: set[str] = set()
+    for path in _chunk_paths(Path(out_dir)):
+        with np.load(path, allow_pickle=False) as data:
+            completed.update(data["run_id"].tolist())
+    return completed
+
+
+def _execute(
+    runs: list[SweepRun], workers: int, cache: ResultCache | None
+) -> Iterable[dict[str, Any]]:
+    if workers <= 1:
+        for run in runs:
+            yield run_one(run, cache)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Submit grouped by trace so each worker tends to stay on a trace it already parsed.
+        ordered = sorted(runs, key=lambda run: run.trace)
+        futures = [pool.submit(run_one, run, cache) for run in ordered]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _check_spec(out_path: Path, runs: list[SweepRun]):
+    """Refuse an ``out_path`` whose stored spec has runs that ``runs`` does not.
+
+    Extending a sweep keeps every stored run, so its results stay one sweep;
+    anything else would mix rows of two different sweeps in one directory.
+    """
+    stored = out_path / "spec.json"
+    if not stored.exists():
+        return
+    wanted = {run.run_id for run in runs}
+    previous = expand_spec(json.loads(stored.read_text(encoding="utf-8")))
+    dropped = sum(run.run_id not in wanted for run in previous)
+    if dropped:
+        raise ValueError(
+            f"{out_path} holds a different sweep ({dropped} of its runs are not in this spec); "
+            "use another output directory or --force"
+        )
+
+
+def run_sweep(
+    spec: dict[str, Any],
+    out_dir: str | Path = DEFAULT_OUT,
+    workers: int | None = None,
+    chunk_size: int = 64,
+    cache: ResultCache | None = None,
+    force: bool = False,
+) -> int:
+    """Run every point of ``spec`` not already in ``out_dir`` and return how many ran.
+
+    Rows are flushed to ``out_dir`` as numbered ``.npz`` chunks of ``chunk_size``
+    completed runs, one array per column, so an interrupted sweep loses at most the
+    unflushed rows and rerunning the same spec picks up where it stopped. Workers
+    share ``cache``, so points already simulated by any earlier sweep, bench run or
+    dashboard session are read back instead of rerun.
+
+    ``out_dir`` may already hold the same spec or one this spec extends; a spec
+    that drops any of the stored runs raises ValueError unless ``force`` is set,
+    in which case it replaces ``spec.json`` and the old rows stay in the results.
+    """
+    out_path = Path(out_dir)
+    runs = expand_spec(spec)
+    if not force:
+        _check_spec(out_path, runs)
+    out_path.mkdir(parents=True, exist_ok=True)
+    (out_path / "spec.json").write_text(json.dumps(spec, indent=2), encoding="utf-8")
+    done = completed_runs(out_path)
+    pending = [run for run in runs if run.run_id not in done]
+    index = _next_chunk_index(out_path)
+    rows: list[dict[str, Any]] = []
+    for row in _execute(pending, workers or os.cpu_count() or 1, cache):
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            _write_chunk(out_path, index, rows)
+            index += 1
+            rows = []
+    if rows:
+        _write_chunk(out_path, index, rows)
+    return len(pending)
+
+
+def _parse_param(text: str) -> tuple[str, list[str]]:
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected field=value[,value...], got {text!r}")
+    return name, values.split(",")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Run simulate() over a grid or random sample of SimulationConfig fields."
+    )
+    parser.add_argument("--spec", help="JSON sweep spec (see README); CLI flags extend it.")
+    parser.add_argument("--trace", action="append", default=[])
+    parser.add_argument("--policy", action="append", default=[], choices=available_policies())
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        type=_parse_param,
+        help="Sweep a config field over values, e.g. --param admit_lb=0.5,0.6,0.7.",
+    )
+    parser.add_argument(
+        "--random",
+        type=int,
+        default=0,
+        help="Draw this many random configs from the --param values instead of the full grid.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Worker processes (default: all CPUs)."
+    )
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--out", default=str(DEFAULT_OUT))
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run into --out even if it holds results of a spec this one does not extend.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Simulate every point even if a cached result exists.",
+    )
+    args = parser.parse_args(argv)
+
+    spec: dict[str, Any] = {}
+    if args.spec:
+        spec = json.loads(Path(args.spec).read_text(encoding="utf-8"))
+    spec["traces"] = list(spec.get("traces", [])) + args.trace
+    if args.policy:
+        spec["policies"] = list(spec.get("policies", [])) + args.policy
+    spec["params"] = {**spec.get("params", {}), **dict(args.param)}
+    if args.random:
+        spec.update(mode="random", samples=args.random, seed=args.seed)
+
+    total = len(expand_spec(spec))
+    started = time.perf_counter()
+    try:
+        ran = run_sweep(
+            spec,
+            args.out,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            cache=default_cache(not args.no_cache),
+            force=args.force,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    elapsed = time.perf_counter() - started
+    print(f"Sweep: {total} runs, {total - ran} already complete, {ran} run in {elapsed:.1f}s")
+    print(f"Results: {args.out} (load with sweep.load_results)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from __future__ import annotations
 import pytest
 
 from memory.allocator import ContiguousAllocator
+from memory.buddy import BuddyAllocator
+from memory.paged import PagedAllocator
 
 collect_ignore_glob = ["dashboard/*"]
 
@@ -26,3 +28,16 @@ def minimal_trace():
         {"t": 8, "event": "touch", "id": "obj_c", "mu": 0.75, "sigma": 0.10, "phase": "steady"},
         {"t": 9, "event": "free", "id": "obj_a"},
     ]
+
+
+@pytest.fixture(autouse=True)
+def allocator_debug_checks(monkeypatch):
+    monkeypatch.setattr(ContiguousAllocator, "debug", True)
+    monkeypatch.setattr(BuddyAllocator, "debug", True)
+    monkeypatch.setattr(PagedAllocator, "debug", True)
+
+
+@pytest.fixture(autouse=True)
+def isolated_result_cache(monkeypatch, tmp_path_factory):
+    # Keep CLI runs (and their subprocesses) out of the user's ~/.cache.
+    monkeypatch.setenv("HBM_SIM_CACHE_DIR", str(tmp_path_factory.mktemp("result_cache")))
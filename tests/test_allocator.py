@@ -1,9 +1,18 @@
 from __future__ import annotations
 
+import random
+
 import pytest
 
-from memory.allocator import AllocationError, ContiguousAllocator, DoubleFreeError
+from memory.allocator import (
+    AllocationError,
+    AllocatorInvariantError,
+    Block,
+    ContiguousAllocator,
+    DoubleFreeError,
+)
 from memory.fragmentation import compute_metrics
+from run_sim import SimulationConfig, simulate
 
 
 def test_single_alloc_succeeds_and_occupies_correct_bytes(small_hbm):
@@ -64,3 +73,197 @@ def test_double_free_raises_correct_exception():
     allocator.free_or_raise("tensor")
     with pytest.raises(DoubleFreeError):
         allocator.free_or_raise("tensor")
+
+
+def _scan_free_extents(allocator: ContiguousAllocator) -> list[tuple[int, int]]:
+    extents = []
+    cursor = 0
+    for block in sorted(allocator.blocks.values(), key=lambda b: b.start):
+        if block.start > cursor:
+            extents.append((cursor, block.start - cursor))
+        cursor = max(cursor, block.start + block.size)
+    if cursor < allocator.capacity:
+        extents.append((cursor, allocator.capacity - cursor))
+    return extents
+
+
+def test_first_fit_reuses_lowest_address_hole():
+    allocator = ContiguousAllocator(400)
+    for name in ("a", "b", "c", "d"):
+        allocator.alloc_or_raise(name, 100)
+    allocator.free_or_raise("c")
+    allocator.free_or_raise("a")
+    allocator.alloc_or_raise("e", 60)
+    assert allocator.blocks["e"].start == 0
+    assert allocator.extents_free() == [(60, 40), (200, 100)]
+
+
+def test_free_coalesces_adjacent_holes():
+    allocator = ContiguousAllocator(300)
+    for name in ("a", "b", "c"):
+        allocator.alloc_or_raise(name, 100)
+    allocator.free_or_raise("a")
+    allocator.free_or_raise("c")
+    allocator.free_or_raise("b")
+    assert allocator.extents_free() == [(0, 300)]
+    assert allocator.largest_free_extent() == 300
+
+
+def test_free_extent_index_matches_block_scan_under_churn():
+    rng = random.Random(7)
+    allocator = ContiguousAllocator(5000)
+    live: list[str] = []
+    for step in range(2000):
+        if live and rng.random() < 0.45:
+            allocator.free(live.pop(rng.randrange(len(live))))
+        elif allocator.alloc(f"o{step}", rng.randint(1, 200)):
+            live.append(f"o{step}")
+        if step % 250 == 0:
+            allocator.compact(reserve=rng.choice([0, 300]))
+        expected = _scan_free_extents(allocator)
+        assert allocator.extents_free() == expected
+        assert allocator.largest_free_extent() == max((s for _, s in expected), default=0)
+
+
+def test_occupancy_counters_track_alloc_free_and_compact():
+    allocator = ContiguousAllocator(400)
+    for name in ("a", "b", "c"):
+        allocator.alloc_or_raise(name, 100)
+    allocator.free_or_raise("b")
+    assert (allocator.used(), allocator.block_count(), allocator.hole_count()) == (200, 2, 2)
+    allocator.compact()
+    assert (allocator.used(), allocator.block_count(), allocator.hole_count()) == (200, 2, 1)
+
+
+def test_consistency_checker_detects_counter_drift():
+    allocator = ContiguousAllocator(400, debug=True)
+    allocator.alloc_or_raise("a", 100)
+    allocator.blocks["a"] = Block(0, 120, "a")
+    with pytest.raises(AllocatorInvariantError):
+        allocator.check_consistency()
+
+
+@pytest.mark.parametrize("placement", ["first_fit", "next_fit", "best_fit", "segregated"])
+def test_zero_size_blocks_do_not_split_free_extents(placement):
+    allocator = ContiguousAllocator(20, placement=placement, debug=True)
+    for name, size in (("a", 5), ("b", 0), ("c", 4), ("d", 0), ("e", 0)):
+        allocator.alloc_or_raise(name, size)
+    allocator.free_or_raise("c")
+    allocator.check_consistency()
+    assert allocator.extents_free() == [(5, 15)]
+
+
+def test_grow_extends_in_place_or_relocates():
+    allocator = ContiguousAllocator(400)
+    allocator.alloc_or_raise("a", 100)
+    assert allocator.grow("a", 150) == 0
+    allocator.alloc_or_raise("b", 50)
+    assert allocator.grow("a", 200) == 150
+    assert allocator.blocks["a"].start == 200
+    assert allocator.grow("b", 400) is None
+
+
+def _fragmented(capacity: int = 600) -> ContiguousAllocator:
+    allocator = ContiguousAllocator(capacity)
+    for name in "abcdef":
+        allocator.alloc_or_raise(name, 100)
+    for name in "ace":
+        allocator.free_or_raise(name)
+    return allocator
+
+
+def test_compact_step_respects_budget_and_resumes_from_cursor():
+    allocator = _fragmented()
+    assert allocator.fragmentation_debt() == 200
+
+    assert allocator.compact_step(150) == 100
+    assert allocator.blocks["b"].start == 0
+    assert allocator.compaction_pending()
+
+    assert allocator.compact_step(150) == 100
+    assert allocator.blocks["d"].start == 100
+    assert allocator.compact_step(150) == 100
+    assert allocator.blocks["f"].start == 200
+    assert allocator.fragmentation_debt() == 0
+
+
+def test_compact_step_with_unbounded_budget_matches_full_compaction():
+    stepped = _fragmented()
+    full = _fragmented()
+    assert stepped.compact_step(10**9) == full.compact()
+    assert stepped.spans() == full.spans()
+    assert not stepped.compaction_pending()
+
+
+def test_compact_step_interleaved_with_churn_stays_consistent():
+    rng = random.Random(11)
+    allocator = ContiguousAllocator(4096)
+    live: list[str] = []
+    for i in range(2000):
+        if live and rng.random() < 0.45:
+            allocator.free(live.pop(rng.randrange(len(live))))
+        elif allocator.alloc(f"o{i}", rng.randint(1, 96)):
+            live.append(f"o{i}")
+        if i % 7 == 0:
+            assert allocator.compact_step(rng.randint(0, 200)) >= 0
+    allocator.check_consistency()
+
+
+def test_simulate_spreads_bounded_compaction_across_safe_windows():
+    trace = [{"t": i, "event": "alloc", "id": name, "size": 100} for i, name in enumerate("abcdef")]
+    trace += [{"t": 6 + i, "event": "touch", "id": name, "mu": 0.9, "sigma": 0.05} for i, name in enumerate("abcdef")]
+    trace += [{"t": 12 + i, "event": "free", "id": name} for i, name in enumerate("ace")]
+    trace += [
+        {"t": 15, "event": "safe_window"},
+        {"t": 16, "event": "touch", "id": "b", "mu": 0.9, "sigma": 0.05},
+        {"t": 17, "event": "safe_window"},
+        {"t": 18, "event": "safe_window"},
+    ]
+    config = SimulationConfig(
+        miss_mode="demand", capacity=600, reserve=0, max_migration_bytes=1000, compaction_budget=100
+    )
+    result = simulate(trace, "confidence", config)
+    assert result.compaction_steps == [(16, 100, 100), (17, 100, 0), (18, 100, 0)]
+    assert result.stats["compact_step_max_bytes"] == 100
+    assert result.stats["fragmentation_debt"] == 0
+    assert result.final_blocks == [(0, 100, "b"), (100, 100, "d"), (200, 100, "f")]
+
+
+def test_make_room_moves_only_the_cheapest_window():
+    allocator = ContiguousAllocator(1000)
+    for name, size in (("a", 100), ("b", 300), ("c", 100), ("d", 20), ("e", 100), ("f", 300)):
+        allocator.alloc_or_raise(name, size)
+    for name in ("a", "c", "e"):
+        allocator.free_or_raise(name)
+    # Holes: [0,100) [400,500) [520,620) [920,1000); only "d" blocks a 200-byte run.
+    full = allocator.compaction_cost()
+    assert allocator.make_room(200) == 20
+    assert full == 620
+    assert allocator.largest_free_extent() >= 200
+    # "d" best-fits into the 20 bytes left past the window.
+    assert allocator.blocks["d"].start == 600
+
+
+def test_make_room_refuses_plans_over_budget_or_without_space():
+    allocator = _fragmented()
+    assert allocator.make_room(200, max_bytes=50) is None
+    assert allocator.make_room(400) is None
+    assert allocator.spans() == [(100, 100, "b"), (300, 100, "d"), (500, 100, "f")]
+
+
+def test_make_room_opens_requested_extent_under_churn():
+    rng = random.Random(7)
+    for _ in range(40):
+        allocator = ContiguousAllocator(2048)
+        live: list[str] = []
+        for i in range(200):
+            if live and rng.random() < 0.45:
+                allocator.free(live.pop(rng.randrange(len(live))))
+            elif allocator.alloc(f"o{i}", rng.randint(1, 120)):
+                live.append(f"o{i}")
+        need = rng.randint(allocator.largest_free_extent(), allocator.free_bytes())
+        full = allocator.compaction_cost()
+        moved = allocator.make_room(need)
+        if moved is not None:
+            assert moved <= full
+            assert allocator.largest_free_extent() >= need
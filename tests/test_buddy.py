@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import random
+
+from memory.buddy import BuddyAllocator
+from memory.fragmentation import compute_metrics
+from run_sim import SimulationConfig, simulate
+
+
+def test_requests_round_up_to_power_of_two_and_report_internal_fragmentation():
+    allocator = BuddyAllocator(1024)
+    allocator.alloc_or_raise("a", 100)
+    assert allocator.blocks["a"].size == 128
+    assert allocator.used() == 128
+    assert allocator.internal_fragmentation() == 28
+
+
+def test_freeing_buddies_coalesces_back_to_one_region():
+    allocator = BuddyAllocator(1024)
+    for name in ("a", "b", "c", "d"):
+        allocator.alloc_or_raise(name, 256)
+    assert allocator.extents_free() == []
+    for name in ("b", "d", "a", "c"):
+        allocator.free_or_raise(name)
+    assert allocator.extents_free() == [(0, 1024)]
+    assert allocator.internal_fragmentation() == 0
+
+
+def test_non_power_of_two_capacity_is_split_into_top_level_regions():
+    allocator = BuddyAllocator(800)
+    assert allocator.extents_free() == [(0, 512), (512, 256), (768, 32)]
+    assert allocator.largest_free_extent() == 512
+    assert allocator.alloc("big", 600) is False
+
+
+def test_compact_repacks_blocks_largest_first():
+    allocator = BuddyAllocator(1024)
+    for name in ("a", "b", "c", "d"):
+        allocator.alloc_or_raise(name, 128)
+    allocator.alloc_or_raise("e", 256)
+    allocator.free_or_raise("a")
+    allocator.free_or_raise("c")
+    assert allocator.largest_free_extent() == 256
+    moved = allocator.compact()
+    assert moved > 0
+    assert allocator.largest_free_extent() == 512
+
+
+def test_random_churn_keeps_buddy_free_space_consistent():
+    rng = random.Random(3)
+    allocator = BuddyAllocator(1 << 14)
+    live: list[str] = []
+    for step in range(800):
+        if live and rng.random() < 0.5:
+            allocator.free(live.pop(rng.randrange(len(live))))
+        elif allocator.alloc(f"o{step}", rng.randint(1, 900)):
+            live.append(f"o{step}")
+    free = sum(size for _, size in allocator.extents_free())
+    assert free + allocator.used() == 1 << 14
+
+
+def test_compute_metrics_carries_internal_fragmentation():
+    metrics = compute_metrics([(0, 64)], internal_frag=12)
+    assert metrics.internal_frag == 12
+
+
+def test_simulate_with_buddy_allocator_reports_internal_fragmentation():
+    trace = [
+        {"t": 0, "event": "alloc", "id": "a", "size": 50},
+        {"t": 1, "event": "touch", "id": "a", "mu": 0.9, "sigma": 0.05},
+    ]
+    config = SimulationConfig(miss_mode="demand", capacity=256, reserve=0, allocator="buddy")
+    result = simulate(trace, "lru", config)
+    assert result.final_blocks == [(0, 64, "a")]
+    assert result.fragmentation.internal_frag == 14
+
+
+def test_targeted_compaction_does_not_dry_run_a_buddy_repack(monkeypatch):
+    repacks = []
+    repack = BuddyAllocator._repack
+
+    def counting_repack(self):
+        repacks.append(1)
+        return repack(self)
+
+    monkeypatch.setattr(BuddyAllocator, "_repack", counting_repack)
+    trace = [{"t": 0, "event": "alloc", "id": name, "size": 64} for name in "abcd"]
+    trace += [{"t": 1, "event": "touch", "id": name, "mu": 0.9, "sigma": 0.05} for name in "abcd"]
+    trace += [
+        {"t": 2, "event": "free", "id": "b"},
+        {"t": 2, "event": "free", "id": "d"},
+        {"t": 3, "event": "safe_window"},
+        {"t": 4, "event": "alloc", "id": "e", "size": 128},
+        {"t": 4, "event": "touch", "id": "e", "mu": 0.9, "sigma": 0.05},
+    ]
+    config = SimulationConfig(
+        miss_mode="demand", capacity=256, reserve=0, allocator="buddy", max_migration_bytes=1000
+    )
+    result = simulate(trace, "lru", config)
+    assert result.stats["compact"] == 1
+    assert "e" in {obj for _, _, obj in result.final_blocks}
+    # compact() repacks once; no scratch repack priced it beforehand.
+    assert len(repacks) == 1
+
+
+def test_free_bytes_excludes_the_unallocatable_tail():
+    allocator = BuddyAllocator(1000, min_block=64)
+    assert allocator.free_bytes() == 960 == sum(size for _, size in allocator.extents_free())
+    allocator.alloc_or_raise("a", 100)
+    assert allocator.free_bytes() == 960 - 128
+    assert (
+        allocator.fragmentation_debt() == allocator.free_bytes() - allocator.largest_free_extent()
+    )
+
+
+def test_bounded_buddy_compaction_resumes_in_later_safe_windows():
+    trace = [
+        {"t": i, "event": "alloc", "id": name, "size": 64} for i, name in enumerate("abcdefgh")
+    ]
+    trace += [
+        {"t": 8 + i, "event": "touch", "id": name, "mu": 0.9, "sigma": 0.05}
+        for i, name in enumerate("abcdefgh")
+    ]
+    trace += [{"t": 16 + i, "event": "free", "id": name} for i, name in enumerate("aceg")]
+    trace += [
+        {"t": 20, "event": "safe_window"},
+        {"t": 21, "event": "touch", "id": "b", "mu": 0.9, "sigma": 0.05},
+        {"t": 22, "event": "safe_window"},
+        {"t": 23, "event": "safe_window"},
+    ]
+    config = SimulationConfig(
+        miss_mode="demand",
+        capacity=512,
+        reserve=0,
+        max_migration_bytes=1000,
+        compaction_budget=64,
+        allocator="buddy",
+    )
+    result = simulate(trace, "confidence", config)
+    # Two moves pack the blocks; the last window finds nothing lower to move to.
+    assert result.compaction_steps == [(20, 64, 128), (21, 64, 0)]
+    assert [block[0] for block in result.final_blocks] == [0, 64, 128, 192]
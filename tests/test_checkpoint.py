@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+
+import pytest
+
+from run_sim import Checkpoint, SimulationConfig, checkpoint, main, simulate, simulate_iter
+from viz.timeline import replay
+
+
+@pytest.mark.parametrize("policy", ["confidence", "lru", "clockpro"])
+@pytest.mark.parametrize("allocator", ["contiguous", "buddy", "paged"])
+def test_resume_matches_an_uninterrupted_run(minimal_trace, policy, allocator):
+    config = SimulationConfig(miss_mode="demand", capacity=128, reserve=0, allocator=allocator)
+    full = simulate(minimal_trace, policy, config)
+    for at in range(len(minimal_trace) + 1):
+        saved = checkpoint(minimal_trace, policy, at, config)
+        resumed = simulate(minimal_trace, policy, resume_from=saved)
+        assert resumed.stats == full.stats
+        assert resumed.final_blocks == full.final_blocks
+        assert resumed.policy_metrics == full.policy_metrics
+        assert resumed.peak_used == full.peak_used
+        assert resumed.timeline.column("t").tolist() == full.timeline.column("t")[at:].tolist()
+
+
+def test_forks_are_independent(minimal_trace):
+    config = SimulationConfig(miss_mode="demand", capacity=96, reserve=0)
+    start = checkpoint(minimal_trace, "confidence", 4, config)
+    strict_config = replace(config, admit_lb=0.99)
+    strict = simulate(minimal_trace, "confidence", strict_config, resume_from=start)
+    again = simulate(minimal_trace, "confidence", config, resume_from=start)
+    assert again.stats == simulate(minimal_trace, "confidence", config).stats
+    assert strict.stats["admit"] < again.stats["admit"]
+    # The resumed timeline stands alone: it opens with a keyframe at the checkpoint.
+    first, memory_map = next(replay(again.timeline))
+    assert first.keyframe and first.t == 4
+    assert memory_map.blocks == [(0, 64, "obj_a")]
+
+
+def test_checkpoints_captured_mid_run_round_trip_through_disk(tmp_path, minimal_trace):
+    config = SimulationConfig(miss_mode="demand", capacity=128, reserve=0)
+    run = simulate_iter(minimal_trace, "lru", config, checkpoint_at=[7, 3, 99])
+    expected = run.finish()
+    assert [(saved.events, saved.t) for saved in run.checkpoints] == [(3, 2), (7, 6)]
+    path = tmp_path / "at7.pkl"
+    run.checkpoints[1].save(path)
+    assert simulate(minimal_trace, "lru", resume_from=Checkpoint.load(path)).stats == expected.stats
+
+
+def test_resume_rejects_incompatible_runs(minimal_trace):
+    saved = checkpoint(minimal_trace, "lru", 5, SimulationConfig(capacity=128))
+    with pytest.raises(ValueError, match="policy"):
+        simulate(minimal_trace, "clockpro", resume_from=saved)
+    with pytest.raises(ValueError, match="capacity"):
+        simulate(minimal_trace, "lru", SimulationConfig(capacity=256), resume_from=saved)
+    with pytest.raises(ValueError):
+        checkpoint(minimal_trace, "lru", len(minimal_trace) + 1)
+
+
+def test_cli_saves_and_resumes(tmp_path, minimal_trace):
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text("\n".join(json.dumps(event) for event in minimal_trace) + "\n")
+    saved = tmp_path / "state.pkl"
+    common = ["--trace", str(trace), "--policy", "lru", "--miss-mode", "demand"]
+    main(common + ["--checkpoint-at", "6", "--checkpoint-out", str(saved)])
+    out = tmp_path / "resumed.json"
+    main(common + ["--resume-from", str(saved), "--json", str(out)])
+    payload = json.loads(out.read_text())
+    assert [point["t"] for point in payload["timeline"]] == [6, 7, 8, 9]
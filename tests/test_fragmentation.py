@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import math
+import random
 
 import pytest
 
-from memory.fragmentation import compute_metrics
+from memory.allocator import ContiguousAllocator
+from memory.buddy import BuddyAllocator
+from memory.fragmentation import FragmentationTracker, compute_metrics
+from memory.paged import PagedAllocator
 
 
 def test_all_free_memory_has_zero_external_fragmentation():
@@ -30,3 +34,44 @@ def test_entropy_of_single_free_extent_is_zero():
 def test_equal_sized_extents_have_log2_n_entropy():
     metrics = compute_metrics([(0, 10), (20, 10), (40, 10), (60, 10)])
     assert metrics.entropy == pytest.approx(math.log2(4), abs=1e-6)
+
+
+def test_tracker_follows_extent_splits_and_merges():
+    tracker = FragmentationTracker()
+    tracker.extent_added(0, 100)
+    tracker.extent_removed(0, 100)
+    tracker.extent_added(40, 60)
+    tracker.extent_added(0, 10)
+    expected = compute_metrics([(0, 10), (40, 60)])
+    got = tracker.metrics()
+    assert (got.total_free, got.lfe, got.hole_count) == (70, 60, 2)
+    assert got.external_frag == expected.external_frag
+    assert got.entropy == pytest.approx(expected.entropy, abs=1e-9)
+    tracker.extent_removed(40, 60)
+    assert tracker.largest() == 10
+
+
+@pytest.mark.parametrize(
+    "allocator",
+    [
+        ContiguousAllocator(4096, placement="best_fit"),
+        BuddyAllocator(4096, min_block=16),
+        PagedAllocator(4096, page_size=32),
+    ],
+    ids=["contiguous", "buddy", "paged"],
+)
+def test_allocator_metrics_match_a_full_recompute_under_churn(allocator):
+    rng = random.Random(3)
+    live: list[str] = []
+    for i in range(1500):
+        if live and rng.random() < 0.45:
+            allocator.free(live.pop(rng.randrange(len(live))))
+        elif allocator.alloc(f"o{i}", rng.randint(1, 200)):
+            live.append(f"o{i}")
+        if i % 50 == 0:
+            allocator.compact()
+        expected = compute_metrics(allocator.extents_free(), allocator.internal_fragmentation())
+        got = allocator.metrics()
+        assert (got.total_free, got.lfe, got.hole_count) == (expected.total_free, expected.lfe, expected.hole_count)
+        assert got.entropy == pytest.approx(expected.entropy, abs=1e-9)
+        assert got.internal_frag == expected.internal_frag
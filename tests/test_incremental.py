@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from control.sensitivity import SensitivityLog, at_least
+from incremental import IncrementalSimulator, _epoch_divergence
+from run_sim import SimulationConfig, load_trace, simulate
+
+TRACE = Path(__file__).resolve().parents[1] / "traces" / "moe_expert_swap.jsonl"
+
+
+@pytest.fixture(scope="module")
+def moe_trace():
+    return load_trace(TRACE)
+
+
+def assert_same_run(result, expected):
+    assert result.stats == expected.stats
+    assert result.final_blocks == expected.final_blocks
+    assert result.policy_metrics == expected.policy_metrics
+    assert result.peak_used == expected.peak_used
+    assert result.config == expected.config
+    for name in ("t", "occupancy", "faults"):
+        assert result.timeline.column(name).tolist() == expected.timeline.column(name).tolist()
+
+
+@pytest.mark.parametrize(
+    "change",
+    [{"evict_ub": 0.3}, {"admit_lb": 0.8}, {"reserve": 0}, {"max_faults": 1}, {"epoch": 21}],
+)
+def test_incremental_runs_match_full_runs(moe_trace, change):
+    config = SimulationConfig(miss_mode="demand")
+    incremental = IncrementalSimulator(moe_trace, "confidence", config, checkpoint_every=4)
+    variant = replace(config, **change)
+    assert_same_run(incremental.simulate(variant), simulate(moe_trace, "confidence", variant))
+    assert 0 < incremental.reused_events <= incremental.divergence(variant)
+
+
+def test_unread_fields_reuse_the_whole_base_run(moe_trace):
+    config = SimulationConfig(miss_mode="demand")
+    incremental = IncrementalSimulator(moe_trace, "confidence", config)
+    variant = replace(config, evict_ub=0.3)
+    result = incremental.simulate(variant)
+    assert incremental.reused_events == len(moe_trace)
+    assert result.config == variant and result.sensitivity is None
+
+
+def test_a_reused_result_does_not_share_state_with_the_base_run(moe_trace):
+    config = SimulationConfig(miss_mode="demand")
+    incremental = IncrementalSimulator(moe_trace, "confidence", config)
+    faults = incremental.base.stats["faults"]
+    points = len(incremental.base.timeline)
+    result = incremental.simulate(replace(config, evict_ub=0.3))
+    result.stats["faults"] += 1
+    result.timeline.append(result.timeline[0])
+    again = incremental.simulate(replace(config, evict_ub=0.25))
+    assert again.stats["faults"] == incremental.base.stats["faults"] == faults
+    assert len(again.timeline) == len(incremental.base.timeline) == points
+
+
+def test_structural_changes_replay_from_the_start(moe_trace):
+    config = SimulationConfig(miss_mode="demand")
+    incremental = IncrementalSimulator(moe_trace, "lru", config, checkpoint_every=8)
+    variant = replace(config, capacity=config.capacity * 2)
+    assert incremental.divergence(variant) == 0
+    assert_same_run(incremental.simulate(variant), simulate(moe_trace, "lru", variant))
+    assert incremental.reused_events == 0
+
+
+def test_sensitivity_log_finds_the_first_flipped_threshold():
+    log = SensitivityLog()
+    for event, mu in enumerate([0.9, 0.7, 0.4, 0.8]):
+        log.event = event
+        log.threshold("admit_lb", at_least, mu, mu >= 0.6)
+    assert log.divergence("admit_lb", 0.6) is None
+    assert log.divergence("admit_lb", 0.5) is None
+    assert log.divergence("admit_lb", 0.3) == 2
+    assert log.divergence("admit_lb", 0.75) == 1
+    log.event = 3
+    log.read("admit_lb")
+    assert log.divergence("admit_lb", 0.6) == 3
+
+
+def test_epoch_divergence():
+    # Epochs of 4 and 6 both reset at the first event, then first disagree at index 4.
+    assert _epoch_divergence(4, 6) == 4
+    assert _epoch_divergence(20, 21) == 20
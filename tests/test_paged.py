@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from memory.paged import PagedAllocator
+from run_sim import SimulationConfig, simulate
+
+
+def test_alloc_builds_block_table_of_fixed_pages():
+    allocator = PagedAllocator(1024, page_size=64)
+    allocator.alloc_or_raise("seq_0", 150)
+    assert allocator.block_table("seq_0") == [0, 1, 2]
+    assert allocator.used() == 192
+    assert allocator.internal_fragmentation() == 42
+
+
+def test_growth_appends_pages_without_copying():
+    allocator = PagedAllocator(1024, page_size=64)
+    allocator.alloc_or_raise("seq_0", 64)
+    allocator.alloc_or_raise("seq_1", 64)
+    assert allocator.grow("seq_0", 200) == 0
+    assert allocator.block_table("seq_0") == [0, 2, 3, 4]
+    assert allocator.internal_fragmentation() == 56
+
+
+def test_scattered_free_pages_still_satisfy_large_requests():
+    allocator = PagedAllocator(512, page_size=64)
+    for index in range(8):
+        allocator.alloc_or_raise(f"p{index}", 64)
+    for index in range(0, 8, 2):
+        allocator.free_or_raise(f"p{index}")
+    assert allocator.hole_count() == 4
+    assert allocator.alloc("big", 256) is True
+    assert allocator.free_bytes() == 0
+
+
+def test_growth_beyond_free_pages_fails_cleanly():
+    allocator = PagedAllocator(256, page_size=64)
+    allocator.alloc_or_raise("seq_0", 192)
+    assert allocator.grow("seq_0", 320) is None
+    assert allocator.block_table("seq_0") == [0, 1, 2]
+
+
+def test_simulate_paged_mode_appends_pages_on_growth_events():
+    trace = [
+        {"t": 0, "event": "alloc", "id": "kv", "size": 100},
+        {"t": 1, "event": "touch", "id": "kv", "mu": 0.9, "sigma": 0.05},
+        {"t": 2, "event": "alloc", "id": "kv", "size": 300},
+        {"t": 3, "event": "touch", "id": "kv", "mu": 0.9, "sigma": 0.05},
+    ]
+    config = SimulationConfig(
+        miss_mode="demand", capacity=1024, reserve=0, allocator="paged", page_size=64
+    )
+    result = simulate(trace, "lru", config)
+    assert result.stats["grow"] == 1
+    assert result.stats["faults"] == 1
+    assert result.final_used == 320
+    assert result.stats["bytes_moved"] == 100
+
+
+def test_default_page_size_has_a_floor():
+    # At the CLI default capacity, capacity / 1024 would give byte-granular pages.
+    assert PagedAllocator(800).page_size == 16
+    assert PagedAllocator(1 << 20).page_size == 1024
+    assert PagedAllocator(8).page_size == 8
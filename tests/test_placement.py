@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from memory.allocator import ContiguousAllocator
+from memory.placement import PLACEMENTS
+from run_sim import SimulationConfig, simulate
+
+
+def _holey_allocator(placement: str) -> ContiguousAllocator:
+    # Holes of 100 @ 0, 30 @ 150, 60 @ 250 and the 640-byte tail.
+    allocator = ContiguousAllocator(1000, placement=placement)
+    for name, size in (("h0", 100), ("a", 50), ("h1", 30), ("b", 70), ("h2", 60), ("c", 50)):
+        allocator.alloc_or_raise(name, size)
+    for name in ("h0", "h1", "h2"):
+        allocator.free_or_raise(name)
+    return allocator
+
+
+def test_best_fit_picks_smallest_hole_that_fits():
+    allocator = _holey_allocator("best_fit")
+    allocator.alloc_or_raise("x", 40)
+    assert allocator.blocks["x"].start == 250
+
+
+def test_next_fit_resumes_after_previous_placement():
+    allocator = _holey_allocator("next_fit")
+    allocator.alloc_or_raise("x", 20)
+    assert allocator.blocks["x"].start == 360
+    allocator.alloc_or_raise("y", 600)
+    allocator.alloc_or_raise("z", 90)
+    assert allocator.blocks["z"].start == 0
+
+
+def test_segregated_fit_prefers_request_size_class():
+    allocator = _holey_allocator("segregated")
+    allocator.alloc_or_raise("x", 25)
+    assert allocator.blocks["x"].start == 150
+
+
+def test_unknown_placement_is_rejected():
+    with pytest.raises(ValueError):
+        ContiguousAllocator(100, placement="worst_fit")
+
+
+@pytest.mark.parametrize("placement", sorted(PLACEMENTS))
+def test_every_placement_only_fails_when_no_extent_fits(placement):
+    rng = random.Random(11)
+    allocator = ContiguousAllocator(4000, placement=placement)
+    live: list[str] = []
+    for step in range(1500):
+        if live and rng.random() < 0.45:
+            allocator.free(live.pop(rng.randrange(len(live))))
+            continue
+        size = rng.randint(1, 300)
+        fits = allocator.largest_free_extent() >= size
+        assert allocator.alloc(f"o{step}", size) is fits
+        if fits:
+            live.append(f"o{step}")
+    assert allocator.used() + sum(s for _, s in allocator.extents_free()) == 4000
+
+
+@pytest.mark.parametrize("placement", sorted(PLACEMENTS))
+def test_simulate_accepts_every_placement(placement, minimal_trace):
+    config = SimulationConfig(miss_mode="demand", capacity=256, reserve=0, placement=placement)
+    result = simulate(minimal_trace, "confidence", config)
+    assert result.config.placement == placement
+    assert result.stats["faults"] >= 1
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from importlib.metadata import EntryPoint
+from typing import Optional
+
+import pytest
+
+import policy.registry as registry
+from policy.base import BasePolicy, Policy
+from policy.baselines import LRUPolicy
+from run_sim import SimulationConfig, simulate
+
+
+class FifoPolicy(BasePolicy):
+    """Evicts in admission order and ignores hits."""
+
+    def __init__(self):
+        self.order: list[str] = []
+
+    @classmethod
+    def from_config(cls, config) -> FifoPolicy:
+        return cls()
+
+    def on_admit(self, obj_id: str, size: int):
+        self.order.append(obj_id)
+
+    def remove(self, obj_id: str):
+        if obj_id in self.order:
+            self.order.remove(obj_id)
+
+    def pick_victim(self) -> Optional[str]:
+        return self.order.pop(0) if self.order else None
+
+
+@pytest.fixture
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(registry, "_FACTORIES", dict(registry._FACTORIES))
+    monkeypatch.setattr(registry, "_entry_points_loaded", False)
+    monkeypatch.setattr(registry, "entry_points", lambda group: [])
+
+
+def test_builtin_policies_implement_the_protocol(clean_registry):
+    assert {"confidence", "lru", "clockpro", "greedy"} <= set(registry.available_policies())
+    for name in registry.available_policies():
+        assert isinstance(registry.build_policy(name, SimulationConfig()), Policy)
+    with pytest.raises(ValueError):
+        registry.build_policy("missing", SimulationConfig())
+
+
+def test_registered_policy_runs_in_simulate(clean_registry):
+    registry.register_policy("fifo")(FifoPolicy)
+    trace = [{"t": t, "event": "alloc", "id": obj, "size": 64} for t, obj in enumerate("abc")]
+    trace += [
+        {"t": 3 + t, "event": "touch", "id": obj, "mu": 0.9, "sigma": 0.05}
+        for t, obj in enumerate("abac")
+    ]
+    config = SimulationConfig(miss_mode="demand", capacity=128, reserve=0)
+    fifo = simulate(trace, "fifo", config)
+    lru = simulate(trace, "lru", config)
+    assert fifo.stats["evict"] == lru.stats["evict"] == 1
+    # The second touch of "a" keeps it resident under LRU; FIFO still evicts it first.
+    assert sorted(block[2] for block in fifo.final_blocks) == ["b", "c"]
+    assert sorted(block[2] for block in lru.final_blocks) == ["a", "c"]
+
+
+def test_entry_point_policies_are_loaded_lazily(clean_registry, monkeypatch):
+    entry_points = [
+        EntryPoint(name="lru", value="policy.clockpro:ClockProPolicy", group="hbm_sim.policies"),
+        EntryPoint(name="plain_lru", value="policy.baselines:LRUPolicy", group="hbm_sim.policies"),
+    ]
+    monkeypatch.setattr(registry, "entry_points", lambda group: entry_points)
+    assert isinstance(registry.build_policy("plain_lru", SimulationConfig()), LRUPolicy)
+    # Built-in names win over entry points that try to shadow them.
+    assert isinstance(registry.build_policy("lru", SimulationConfig()), LRUPolicy)
+    assert registry.available_policies().count("lru") == 1
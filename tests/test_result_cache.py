@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, default_cache, simulate_trace, simulate_trace_many
+from run_sim import SimulationConfig, simulate
+
+
+@pytest.fixture
+def trace_file(tmp_path, minimal_trace):
+    path = tmp_path / "trace.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in minimal_trace) + "\n")
+    return path
+
+
+def test_cached_result_round_trips(tmp_path, trace_file, minimal_trace):
+    cache = ResultCache(tmp_path / "cache")
+    config = SimulationConfig(miss_mode="demand", capacity=96, reserve=0)
+    first = cache.simulate(trace_file, "lru", config)
+    second = cache.simulate(trace_file, "lru", config)
+    assert (cache.hits, cache.misses) == (1, 1)
+    expected = simulate(minimal_trace, "lru", config)
+    assert second.stats == expected.stats
+    assert second.final_blocks == expected.final_blocks
+    assert second.timeline.points() == first.timeline.points() == expected.timeline.points()
+
+
+def test_key_tracks_trace_contents_policy_and_config(tmp_path, trace_file):
+    cache = ResultCache(tmp_path / "cache")
+    config = SimulationConfig()
+    key = cache.key(trace_file, "lru", config)
+    assert cache.key(trace_file, "lru", SimulationConfig()) == key
+    assert cache.key(trace_file, "clockpro", config) != key
+    assert cache.key(trace_file, "lru", SimulationConfig(capacity=96)) != key
+    copy = tmp_path / "copy.jsonl"
+    copy.write_bytes(trace_file.read_bytes())
+    assert cache.key(copy, "lru", config) == key
+    with open(trace_file, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"t": 10, "event": "alloc", "id": "obj_d", "size": 8}) + "\n")
+    os.utime(trace_file, ns=(0, 1))
+    assert cache.key(trace_file, "lru", config) != key
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path, trace_file):
+    cache = ResultCache(tmp_path / "cache")
+    configs = [SimulationConfig(capacity=capacity) for capacity in (96, 128, 160)]
+    keys = [cache.key(trace_file, "lru", config) for config in configs]
+    for index, config in enumerate(configs[:2]):
+        cache.simulate(trace_file, "lru", config)
+        os.utime(cache._path(keys[index]), ns=(index, index))
+    entry_size = cache.size() // 2
+    # Reading the first entry makes the second one the oldest.
+    assert cache.get(keys[0]) is not None
+    cache.max_bytes = 2 * entry_size + entry_size // 2
+    cache.simulate(trace_file, "lru", configs[2])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_cache_can_be_disabled(monkeypatch, trace_file):
+    assert default_cache(enabled=False) is None
+    monkeypatch.setenv("HBM_SIM_NO_CACHE", "1")
+    assert default_cache() is None
+    monkeypatch.delenv("HBM_SIM_NO_CACHE")
+    assert isinstance(default_cache(), ResultCache)
+    assert simulate_trace(trace_file, "lru").stats == simulate_trace(
+        trace_file, "lru", cache=default_cache()
+    ).stats
+
+
+def test_lockstep_runs_only_simulate_cache_misses(tmp_path, trace_file, minimal_trace):
+    cache = ResultCache(tmp_path / "cache")
+    config = SimulationConfig(miss_mode="demand", capacity=96, reserve=0)
+    cache.simulate(trace_file, "lru", config)
+    runs = [("lru", config), ("clockpro", config), ("confidence", config)]
+    results = simulate_trace_many(trace_file, runs, cache)
+    assert (cache.hits, cache.misses) == (1, 3)
+    for (policy, _), result in zip(runs, results):
+        assert result.stats == simulate(minimal_trace, policy, config).stats
+    simulate_trace_many(trace_file, runs, cache)
+    assert cache.hits == 4
+
+
+def test_version_tracks_the_trace_decoder(tmp_path, monkeypatch):
+    for entry in result_cache.SIMULATOR_SOURCES:
+        source = result_cache.REPO_ROOT / entry
+        if source.is_dir():
+            shutil.copytree(source, tmp_path / entry)
+        else:
+            (tmp_path / entry).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(source, tmp_path / entry)
+    monkeypatch.setattr(result_cache, "REPO_ROOT", tmp_path)
+    monkeypatch.setattr(result_cache, "_source_digest", None)
+    before = result_cache.simulator_version()
+    with open(tmp_path / "trace_format.py", "a") as handle:
+        handle.write("\n# decoder change\n")
+    monkeypatch.setattr(result_cache, "_source_digest", None)
+    assert result_cache.simulator_version() != before
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+
+from memory.allocator import ContiguousAllocator
+from memory.buddy import BuddyAllocator
+from memory.paged import PagedAllocator
+from run_sim import SimulationConfig, simulate
+
+
+def _backends():
+    return [
+        ContiguousAllocator(1024),
+        BuddyAllocator(1024, min_block=16),
+        PagedAllocator(1024, page_size=16),
+    ]
+
+
+@pytest.mark.parametrize("allocator", _backends(), ids=["contiguous", "buddy", "paged"])
+def test_shared_block_is_freed_only_by_the_last_reference(allocator):
+    allocator.alloc_or_raise("prefix", 128)
+    used = allocator.used()
+    assert allocator.share("req_0", "prefix")
+    assert allocator.share("req_1", "req_0")
+    assert allocator.used() == used
+    assert allocator.refcount("req_1") == 3
+
+    allocator.free("prefix")
+    assert not allocator.in_mem("prefix")
+    assert allocator.in_mem("req_0") and allocator.in_mem("req_1")
+    assert allocator.used() == used
+    allocator.free("req_1")
+    assert allocator.refcount("req_0") == 1
+    allocator.free("req_0")
+    assert allocator.used() == 0
+
+
+@pytest.mark.parametrize("allocator", _backends(), ids=["contiguous", "buddy", "paged"])
+def test_growing_a_shared_reference_copies_on_write(allocator):
+    allocator.alloc_or_raise("prefix", 128)
+    allocator.share("beam_1", "prefix")
+    used = allocator.used()
+    assert allocator.grow("beam_1", 192) is not None
+    assert allocator.refcount("prefix") == 1
+    assert allocator.refcount("beam_1") == 1
+    assert allocator.used() > used
+
+
+def test_share_requires_a_resident_source_and_unshare_needs_room():
+    allocator = ContiguousAllocator(256)
+    assert not allocator.share("alias", "missing")
+    allocator.alloc_or_raise("a", 200)
+    allocator.share("alias", "a")
+    assert allocator.unshare("alias") is None
+    assert allocator.refcount("alias") == 2
+    allocator.compact()
+    assert allocator.spans() == [(0, 200, "a")]
+
+
+def test_simulate_counts_dedup_and_copy_on_write():
+    trace = [
+        {"t": 0, "event": "alloc", "id": "prefix", "size": 64},
+        {"t": 1, "event": "touch", "id": "prefix", "mu": 0.9, "sigma": 0.05},
+        {"t": 2, "event": "share", "id": "req_0", "src": "prefix"},
+        {"t": 3, "event": "fork", "id": "req_1", "src": "prefix"},
+        {"t": 4, "event": "touch", "id": "req_0", "mu": 0.9, "sigma": 0.05},
+        {"t": 5, "event": "touch", "id": "req_1", "mu": 0.9, "sigma": 0.05, "write": True},
+    ]
+    base = dict(miss_mode="demand", capacity=400, reserve=0, max_migration_bytes=1000)
+    shared = simulate(trace, "lru", SimulationConfig(**base))
+    assert shared.stats["share"] == 2
+    assert shared.stats["dedup_bytes"] == 128
+    assert shared.stats["cow"] == 1
+    assert shared.final_used == 128
+
+    private = simulate(trace, "lru", SimulationConfig(dedup=False, **base))
+    assert private.stats["share"] == 0
+    assert private.final_used == 192
+    assert private.stats["bytes_moved"] > shared.stats["bytes_moved"]
+
+
+def test_repeated_share_of_a_resident_id_is_not_counted_again():
+    trace = [
+        {"t": 0, "event": "alloc", "id": "prefix", "size": 64},
+        {"t": 1, "event": "touch", "id": "prefix", "mu": 0.9, "sigma": 0.05},
+        {"t": 2, "event": "share", "id": "req_0", "src": "prefix"},
+        {"t": 3, "event": "share", "id": "req_0", "src": "prefix"},
+        {"t": 4, "event": "fork", "id": "prefix", "src": "req_0"},
+    ]
+    base = dict(miss_mode="demand", capacity=400, reserve=0, max_migration_bytes=1000)
+    shared = simulate(trace, "lru", SimulationConfig(**base))
+    assert (shared.stats["share"], shared.stats["dedup_bytes"]) == (1, 64)
+    private = simulate(trace, "lru", SimulationConfig(dedup=False, **base))
+    assert (private.stats["migrations"], private.final_used) == (2, 128)
+
+
+@pytest.mark.parametrize("capacity, cow, cow_fail", [(400, 1, 0), (100, 0, 1)])
+def test_growing_a_shared_block_counts_copy_on_write_only_when_it_succeeds(capacity, cow, cow_fail):
+    trace = [
+        {"t": 0, "event": "alloc", "id": "prefix", "size": 64},
+        {"t": 1, "event": "touch", "id": "prefix", "mu": 0.9, "sigma": 0.05},
+        {"t": 2, "event": "share", "id": "req_0", "src": "prefix"},
+        {"t": 3, "event": "alloc", "id": "req_0", "size": 90},
+    ]
+    config = SimulationConfig(
+        miss_mode="demand", capacity=capacity, reserve=0, max_migration_bytes=1000
+    )
+    stats = simulate(trace, "lru", config).stats
+    assert (stats["grow"], stats["cow"], stats["cow_fail"]) == (1, cow, cow_fail)
+    assert stats["grow_fail"] == cow_fail
+    assert (stats["cow_bytes"] > 0) == bool(cow)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from run_sim import SimulationConfig, simulate, simulate_many
+
+RUNS = [
+    ("confidence", SimulationConfig(miss_mode="demand", capacity=96, reserve=0)),
+    ("lru", SimulationConfig(miss_mode="demand", capacity=96, reserve=0)),
+    ("clockpro", SimulationConfig(miss_mode="demand", capacity=128, allocator="paged")),
+    ("confidence", SimulationConfig(capacity=96, reserve=0, timeline_mode="sampled")),
+]
+
+
+def assert_same_run(result, expected):
+    assert result.config == expected.config
+    assert result.stats == expected.stats
+    assert result.final_blocks == expected.final_blocks
+    assert result.policy_metrics == expected.policy_metrics
+    assert result.peak_used == expected.peak_used
+    assert result.timeline.points() == expected.timeline.points()
+
+
+@pytest.mark.parametrize("window", [1, 3, 256])
+def test_lockstep_runs_match_separate_runs(minimal_trace, window):
+    results = simulate_many(iter(minimal_trace), RUNS, window=window)
+    assert len(results) == len(RUNS)
+    for (policy, config), result in zip(RUNS, results):
+        assert_same_run(result, simulate(minimal_trace, policy, config))
+
+
+def test_sharded_runs_stream_a_trace_file(tmp_path, minimal_trace):
+    path = tmp_path / "trace.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in minimal_trace) + "\n")
+    results = simulate_many(path, RUNS, shards=2, window=4)
+    for (policy, config), result in zip(RUNS, results):
+        assert_same_run(result, simulate(minimal_trace, policy, config))
+
+
+def test_simulate_many_edge_cases(minimal_trace):
+    assert simulate_many(minimal_trace, []) == []
+    (result,) = simulate_many(minimal_trace, [("lru", None)])
+    assert result.config == SimulationConfig()
+    with pytest.raises(ValueError, match="window"):
+        simulate_many(minimal_trace, RUNS, window=0)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import gzip
+import json
+import lzma
+import threading
+
+import pytest
+
+import trace_format
+from run_sim import (
+    SimulationConfig,
+    iter_trace,
+    load_trace,
+    main,
+    open_trace,
+    simulate,
+    simulate_iter,
+)
+from trace_format import read_ahead
+
+
+def test_stream_matches_simulate(minimal_trace):
+    config = SimulationConfig(miss_mode="demand", capacity=96, reserve=0)
+    expected = simulate(minimal_trace, "lru", config)
+    run = simulate_iter(minimal_trace, "lru", config)
+    assert list(run) == expected.timeline.points()
+    assert run.result.stats == expected.stats
+    assert run.result.final_blocks == expected.final_blocks
+    assert len(run.result.timeline) == 0
+    assert run.result.timeline_points == len(minimal_trace)
+
+
+def test_batches_cover_the_timeline_in_order(minimal_trace):
+    expected = simulate(minimal_trace, "confidence").timeline.points()
+    batches = list(simulate_iter(minimal_trace, "confidence", batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert [point for batch in batches for point in batch] == expected
+
+
+def test_events_are_pulled_one_at_a_time(minimal_trace):
+    pulled = []
+
+    def events():
+        for event in minimal_trace:
+            pulled.append(event)
+            yield event
+
+    run = simulate_iter(events(), "lru")
+    first = next(run)
+    assert first.t == 0
+    assert len(pulled) == 2
+    assert run.result is None
+    assert run.finish().timeline_points == len(minimal_trace)
+
+
+def test_cli_streams_json(tmp_path, minimal_trace):
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text("\n".join(json.dumps(event) for event in minimal_trace) + "\n")
+    assert list(iter_trace(trace)) == minimal_trace
+    out = tmp_path / "out.json"
+    main(["--trace", str(trace), "--policy", "lru", "--json", str(out)])
+    payload = json.loads(out.read_text())
+    assert len(payload["timeline"]) == len(minimal_trace)
+    assert payload["stats"] == simulate(minimal_trace, "lru").stats
+
+
+@pytest.mark.parametrize("opener", [gzip.open, lzma.open])
+def test_compressed_traces_are_read_transparently(tmp_path, minimal_trace, opener):
+    suffix = ".gz" if opener is gzip.open else ".xz"
+    trace = tmp_path / f"trace.jsonl{suffix}"
+    with opener(trace, "wt", encoding="utf-8") as handle:
+        handle.write("\n".join(json.dumps(event) for event in minimal_trace) + "\n\n")
+    assert list(iter_trace(trace)) == load_trace(trace) == minimal_trace
+    assert simulate(open_trace(trace), "lru").stats == simulate(minimal_trace, "lru").stats
+
+
+def test_zstd_traces_are_read_transparently(tmp_path, minimal_trace):
+    zstandard = pytest.importorskip("zstandard")
+    trace = tmp_path / "trace.jsonl.zst"
+    payload = "\n".join(json.dumps(event) for event in minimal_trace).encode("utf-8")
+    trace.write_bytes(zstandard.ZstdCompressor().compress(payload))
+    assert list(iter_trace(trace)) == minimal_trace
+
+
+def test_stdlib_json_fallback(monkeypatch, tmp_path, minimal_trace):
+    monkeypatch.setattr(trace_format, "_loads", json.loads)
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text("\n".join(json.dumps(event) for event in minimal_trace) + "\n")
+    assert list(iter_trace(trace)) == minimal_trace
+
+
+def test_read_ahead_preserves_order_and_errors():
+    assert list(read_ahead(range(5000), depth=2, batch=7)) == list(range(5000))
+
+    def broken():
+        yield from range(10)
+        raise ValueError("bad line")
+
+    events = read_ahead(broken(), depth=1, batch=4)
+    with pytest.raises(ValueError, match="bad line"):
+        list(events)
+
+
+# The SystemExit ends the reader thread, which is what the test is after.
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_read_ahead_does_not_hand_system_exit_to_the_consumer():
+    def exiting():
+        yield from range(10)
+        raise SystemExit(3)
+
+    with pytest.raises(RuntimeError, match="trace reader thread exited early"):
+        list(read_ahead(exiting(), depth=1, batch=4))
+
+
+def test_read_ahead_stops_when_closed_early(tmp_path, minimal_trace):
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text("\n".join(json.dumps(event) for event in minimal_trace * 500) + "\n")
+    events = iter_trace(trace, read_ahead_depth=1)
+    assert next(events) == minimal_trace[0]
+    events.close()
+    assert not any(thread.name == "trace-reader" for thread in threading.enumerate())
+    config = SimulationConfig(miss_mode="demand")
+    streamed = simulate(open_trace(trace, read_ahead_depth=2), "confidence", config)
+    assert streamed.stats == simulate(minimal_trace * 500, "confidence", config).stats
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from run_sim import SimulationConfig, simulate
+from sweep import expand_spec, load_results, main, run_sweep
+
+
+@pytest.fixture
+def trace_file(tmp_path, minimal_trace):
+    path = tmp_path / "trace.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in minimal_trace) + "\n")
+    return str(path)
+
+
+def test_grid_crosses_params_traces_and_policies(trace_file):
+    spec = {
+        "traces": [trace_file],
+        "policies": ["lru", "confidence"],
+        "base": {"reserve": 0},
+        "params": {"capacity": [96, "160"], "admit_lb": [0.5, 0.7]},
+    }
+    runs = expand_spec(spec)
+    assert len(runs) == 8
+    assert runs[0].params == {"reserve": 0, "admit_lb": 0.5, "capacity": 96}
+    assert len({run.run_id for run in runs}) == 8
+    assert [run.run_id for run in expand_spec(spec)] == [run.run_id for run in runs]
+    with pytest.raises(ValueError):
+        expand_spec({**spec, "params": {"tiers_typo": [1]}})
+
+
+def test_random_samples_are_seeded_and_in_range(trace_file):
+    spec = {
+        "traces": [trace_file],
+        "mode": "random",
+        "samples": 5,
+        "seed": 3,
+        "params": {"capacity": {"low": 64, "high": 256}, "evict_ub": [0.2, 0.3]},
+    }
+    runs = expand_spec(spec)
+    assert len(runs) == 5
+    assert all(64 <= run.params["capacity"] <= 256 for run in runs)
+    assert all(isinstance(run.params["capacity"], int) for run in runs)
+    assert [run.params for run in expand_spec(spec)] == [run.params for run in runs]
+
+
+def test_sweep_writes_columns_and_resumes(tmp_path, trace_file, minimal_trace):
+    spec = {
+        "traces": [trace_file],
+        "policies": ["lru"],
+        "base": {"reserve": 0},
+        "params": {"capacity": [96, 160]},
+    }
+    out = tmp_path / "out"
+    assert run_sweep(spec, out, workers=2, chunk_size=1) == 2
+    results = load_results(out)
+    order = np.argsort(results["capacity"])
+    assert results["capacity"][order].tolist() == [96, 160]
+    expected = simulate(
+        minimal_trace, "lru", SimulationConfig(miss_mode="demand", capacity=96, reserve=0)
+    )
+    assert results["faults"][order][0] == expected.stats["faults"]
+    # A wider spec only runs the points that are missing.
+    spec["params"]["capacity"].append(128)
+    assert run_sweep(spec, out, workers=1) == 1
+    assert sorted(load_results(out)["capacity"].tolist()) == [96, 128, 160]
+    assert run_sweep(spec, out, workers=1) == 0
+
+
+def test_cli_params_extend_the_spec(tmp_path, trace_file, capsys):
+    out = tmp_path / "cli"
+    main(["--trace", trace_file, "--param", "admit_lb=0.5,0.6", "--workers", "1", "--out", str(out)])
+    assert "2 runs" in capsys.readouterr().out
+    assert sorted(load_results(out)["admit_lb"].tolist()) == [0.5, 0.6]
+
+
+def test_sweep_refuses_a_spec_that_drops_stored_runs(tmp_path, trace_file):
+    spec = {"traces": [trace_file], "policies": ["lru"], "params": {"capacity": [96, 160]}}
+    out = tmp_path / "out"
+    assert run_sweep(spec, out, workers=1) == 2
+    other = {**spec, "params": {"capacity": [128]}}
+    with pytest.raises(ValueError, match="different sweep"):
+        run_sweep(other, out, workers=1)
+    assert json.loads((out / "spec.json").read_text()) == spec
+    assert run_sweep(other, out, workers=1, force=True) == 1
+    assert json.loads((out / "spec.json").read_text()) == other
+
+
+def test_new_chunks_number_past_the_highest_existing_one(tmp_path, trace_file):
+    spec = {"traces": [trace_file], "policies": ["lru"], "params": {"capacity": [96, 128, 160]}}
+    out = tmp_path / "out"
+    assert run_sweep(spec, out, workers=1, chunk_size=1) == 3
+    (out / "chunk-00000.npz").unlink()
+    # Rerunning the lost point must not overwrite the chunk that is now last.
+    assert run_sweep(spec, out, workers=1) == 1
+    assert sorted(path.name for path in out.glob("chunk-*.npz")) == [
+        "chunk-00001.npz",
+        "chunk-00002.npz",
+        "chunk-00003.npz",
+    ]
+    assert sorted(load_results(out)["capacity"].tolist()) == [96, 128, 160]
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import pytest
+
+from memory.tiers import Tier, TieredMemory, default_tiers, parse_tiers
+from run_sim import SimulationConfig, simulate
+
+
+def _two_tiers() -> TieredMemory:
+    return TieredMemory(
+        [Tier("dram", 100, 1000.0, 0.5), Tier("nvme", 150, 100.0, 2.0)],
+        hbm_bandwidth=10_000.0,
+    )
+
+
+def test_full_tier_pushes_least_recently_used_objects_down():
+    tiers = _two_tiers()
+    assert tiers.place("a", 60) == 0
+    assert tiers.place("b", 30) == 0
+    tiers.touch("a", 60, in_hbm=False)
+    assert tiers.place("c", 40) == 0
+    assert tiers.location == {"a": 0, "c": 0, "b": 1}
+    assert (tiers.used(0), tiers.used(1)) == (100, 30)
+
+
+def test_objects_pushed_out_of_the_last_tier_are_dropped():
+    tiers = _two_tiers()
+    for name in "abc":
+        tiers.place(name, 100)
+    tiers.place("d", 100)
+    assert tiers.dropped == 2
+    assert tiers.location == {"c": 1, "d": 0}
+
+
+def test_demotion_is_charged_at_the_tier_the_victim_reaches():
+    tiers = TieredMemory(
+        [Tier("dram", 200, 1000.0, 0.5), Tier("cxl", 50, 500.0, 1.0), Tier("nvme", 300, 100.0, 2.0)]
+    )
+    tiers.place("big", 150)
+    tiers.place("x", 100)
+    assert tiers.location == {"x": 0, "big": 2}
+    assert tiers.demotion_time == pytest.approx(2.0 + 150 / 100.0)
+    assert (tiers.demotions, tiers.demoted_bytes) == (1, 150)
+
+    tiers = TieredMemory([Tier("dram", 200, 1000.0, 0.5), Tier("nvme", 100, 100.0, 2.0)])
+    tiers.place("big", 150)
+    tiers.place("x", 100)
+    assert tiers.location == {"x": 0}
+    assert (tiers.dropped, tiers.demotion_time) == (1, 0.0)
+
+
+def test_demote_reports_bytes_pushed_down_by_a_full_tier():
+    tiers = _two_tiers()
+    tiers.place("a", 60)
+    assert tiers.demote("b", 70) == 70 + 60
+    assert tiers.location == {"b": 0, "a": 1}
+    assert (tiers.demotions, tiers.demoted_bytes) == (2, 130)
+
+
+def test_miss_stalls_for_the_transfer_from_its_tier():
+    tiers = _two_tiers()
+    tiers.place("a", 100, level=1)
+    tiers.touch("a", 100, in_hbm=False)
+    tiers.touch("a", 100, in_hbm=True)
+    assert tiers.stall_time == pytest.approx(2.0 + 100 / 100.0)
+    assert tiers.hbm_time == pytest.approx(2 * 100 / 10_000.0)
+    assert tiers.stats()["effective_throughput"] == pytest.approx(200 / (3.0 + 0.02))
+
+
+def test_parse_tiers_accepts_presets_and_relative_capacities():
+    assert parse_tiers("none", 800) == ()
+    assert parse_tiers("default", 800) == default_tiers(800)
+    (tier,) = parse_tiers("dram:2x:5e9:1e-6", 800)
+    assert tier == Tier("dram", 1600, 5e9, 1e-6)
+    with pytest.raises(ValueError):
+        parse_tiers("dram:2x", 800)
+
+
+def test_simulate_demotes_evicted_objects_and_reports_stall_time(minimal_trace):
+    config = SimulationConfig(
+        miss_mode="demand",
+        capacity=96,
+        reserve=0,
+        max_migration_bytes=10_000,
+        tiers=(Tier("dram", 1000, 1e3, 0.01),),
+    )
+    result = simulate(minimal_trace, "lru", config)
+    tiers = result.tier_stats
+    assert tiers["demotions"] >= 1
+    assert tiers["dropped"] == 0
+    assert tiers["stall_time_s"] > 0
+    assert 0 < tiers["effective_throughput"]
+    assert simulate(minimal_trace, "lru", SimulationConfig(miss_mode="demand")).tier_stats == {}
+
+
+def test_evicting_a_shared_reference_demotes_nothing():
+    trace = [
+        {"t": 0, "event": "alloc", "id": "prefix", "size": 64},
+        {"t": 1, "event": "touch", "id": "prefix", "mu": 0.9, "sigma": 0.05},
+        {"t": 2, "event": "share", "id": "req_0", "src": "prefix"},
+        # A confident forecast of no reuse evicts the alias.
+        {"t": 3, "event": "touch", "id": "req_0", "mu": 0.05, "sigma": 0.01},
+    ]
+    config = SimulationConfig(
+        miss_mode="demand",
+        capacity=400,
+        reserve=0,
+        max_migration_bytes=1000,
+        tiers=(Tier("dram", 1000, 1e3, 0.01),),
+    )
+    result = simulate(trace, "confidence", config)
+    assert result.stats["evict"] == 1
+    assert result.final_used == 64
+    tiers = result.tier_stats
+    assert (tiers["demotions"], tiers["demoted_bytes"], tiers["dram_used"]) == (0, 0, 0)
+    assert tiers["demotion_time_s"] == 0
+    assert result.stats["bytes_moved"] == 64
+
+
+def test_failed_growth_demotes_the_size_hbm_held():
+    trace = [
+        {"t": 0, "event": "alloc", "id": "kv", "size": 64},
+        {"t": 1, "event": "touch", "id": "kv", "mu": 0.9, "sigma": 0.05},
+        {"t": 2, "event": "alloc", "id": "kv", "size": 500},
+    ]
+    config = SimulationConfig(
+        miss_mode="demand",
+        capacity=100,
+        reserve=0,
+        max_migration_bytes=1000,
+        tiers=(Tier("dram", 1000, 1e3, 0.01),),
+    )
+    result = simulate(trace, "lru", config)
+    assert result.stats["grow_fail"] == 1
+    tiers = result.tier_stats
+    assert (tiers["demoted_bytes"], tiers["dram_used"]) == (64, 64)
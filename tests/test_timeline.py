@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from memory.allocator import ContiguousAllocator
+from run_sim import SimulationConfig, simulate
+from viz.timeline import (
+    KEYFRAME,
+    DeltaEncoder,
+    MapJournal,
+    Timeline,
+    TimelinePoint,
+    replay,
+    state_at,
+)
+
+
+def test_encoder_emits_keyframes_and_deltas():
+    allocator = ContiguousAllocator(100)
+    allocator.alloc("a", 10)
+    encoder = DeltaEncoder(keyframe_interval=2)
+    allocator.add_listener(encoder.journal)
+    assert encoder.encode(allocator) == (True, [(0, 10, "a")], [], [(10, 90)], [])
+    allocator.alloc("b", 5)
+    assert encoder.encode(allocator) == (
+        False,
+        [(10, 5, "b")],
+        [],
+        [(15, 85)],
+        [(10, 90)],
+    )
+    allocator.free("a")
+    keyframe, added, removed, _, _ = encoder.encode(allocator)
+    assert keyframe and added == [(10, 5, "b")] and removed == []
+    with pytest.raises(ValueError):
+        DeltaEncoder(keyframe_interval=0)
+
+
+def test_journal_nets_out_changes_that_undo_each_other():
+    allocator = ContiguousAllocator(100)
+    journal = MapJournal()
+    allocator.add_listener(journal)
+    journal.clear()
+    allocator.alloc("a", 10)
+    allocator.alloc("b", 10)
+    allocator.free("a")
+    allocator.grow("b", 30)
+    assert journal.drain() == (
+        [(10, 30, "b")],
+        [],
+        [(0, 10), (40, 60)],
+        [(0, 100)],
+    )
+    allocator.free("b")
+    allocator.alloc("b", 30)
+    assert journal.drain() == ([(0, 30, "b")], [(10, 30, "b")], [(30, 70)], [(0, 10), (40, 60)])
+
+
+@pytest.mark.parametrize("allocator", ["buddy", "paged"])
+def test_replay_matches_full_snapshots_on_every_backend(minimal_trace, allocator):
+    def maps(interval: int):
+        config = SimulationConfig(
+            miss_mode="demand",
+            capacity=160,
+            reserve=0,
+            allocator=allocator,
+            keyframe_interval=interval,
+        )
+        timeline = simulate(minimal_trace, "lru", config).timeline
+        return [memory_map for _, memory_map in replay(timeline)]
+
+    assert maps(1000) == maps(1)
+
+
+def test_replay_matches_full_snapshots(minimal_trace):
+    def maps(interval: int):
+        config = SimulationConfig(
+            miss_mode="demand", capacity=160, reserve=0, keyframe_interval=interval
+        )
+        timeline = simulate(minimal_trace, "lru", config).timeline
+        return [memory_map for _, memory_map in replay(timeline)]
+
+    full = maps(1)
+    assert full[-1].blocks == [(64, 32, "obj_c")]
+    assert maps(3) == full
+    assert maps(1000) == full
+
+
+def test_state_at_replays_from_the_nearest_keyframe(minimal_trace):
+    config = SimulationConfig(miss_mode="demand", capacity=160, reserve=0, keyframe_interval=4)
+    timeline = simulate(minimal_trace, "lru", config).timeline
+    assert [point.keyframe for point in timeline] == [True, False, False, False] * 2 + [True, False]
+    memory_map = state_at(timeline, 6)
+    assert memory_map.t == 6
+    assert memory_map.blocks == [(0, 64, "obj_a")]
+    assert memory_map.free_extents == [(64, 96)]
+    with pytest.raises(ValueError):
+        state_at(timeline, -1)
+    with pytest.raises(ValueError):
+        list(replay(timeline[1:]))
+
+
+def test_columnar_timeline_round_trips_points(minimal_trace):
+    config = SimulationConfig(miss_mode="demand", capacity=160, reserve=0, keyframe_interval=4)
+    points = simulate(minimal_trace, "lru", config).timeline.points()
+    timeline = Timeline(capacity=2)
+    timeline.extend(points)
+    assert len(timeline) == len(points)
+    assert list(timeline) == points
+    assert timeline[-1] == points[-1]
+    assert timeline.vocabulary("event") == ["alloc", "touch", "safe_window", "free"]
+    assert timeline.decoded("phase")[:3].tolist() == [None, None, "warmup"]
+    assert timeline.flag(KEYFRAME).tolist() == [point.keyframe for point in points]
+    assert timeline.column("faults").sum() == sum(point.faults for point in points)
+    bare = Timeline.from_points(points, maps=False)
+    assert bare[2].blocks_added == [] and bare[2].occupancy == points[2].occupancy
+
+
+def test_columns_and_slices_are_zero_copy_views(minimal_trace):
+    timeline = simulate(minimal_trace, "lru").timeline
+    occupancy = timeline.column("occupancy")
+    with pytest.raises(ValueError):
+        occupancy[0] = 1
+    window = timeline[2:8:2]
+    assert np.shares_memory(window.column("occupancy"), occupancy)
+    assert window.column("t").tolist() == [2, 4, 6]
+    assert list(window) == timeline.points()[2:8:2]
+    assert window.mask("event", "touch").tolist() == [True, False, False]
+    assert state_at(timeline, 6) == state_at(timeline.points(), 6)
+
+
+def test_aggregate_reduces_consecutive_windows():
+    timeline = Timeline.from_points(
+        TimelinePoint(index, "touch", "a", None, 0, 0.0, 0.0, 0, 0, faults, 0, 0, 0, False)
+        for index, faults in enumerate([1, 0, 2, 5, 3])
+    )
+    bounds = [0, 2, 2, 5]
+    assert timeline.aggregate("faults", bounds).tolist() == [1, 0, 10]
+    assert timeline.aggregate("faults", bounds, "max").tolist() == [1, 0, 5]
+    assert timeline.aggregate("faults", bounds, "min").tolist() == [0, 0, 2]
+    assert timeline.aggregate("faults", bounds, "mean").tolist() == [0.5, 0.0, 10 / 3]
+    with pytest.raises(ValueError):
+        timeline.aggregate("faults", [0, 3, 2])
+
+
+def test_timeline_modes_record_less_without_changing_the_run(minimal_trace):
+    base = {"miss_mode": "demand", "capacity": 160, "reserve": 0}
+    full = simulate(minimal_trace, "lru", SimulationConfig(**base))
+    none = simulate(minimal_trace, "lru", SimulationConfig(timeline_mode="none", **base))
+    sampled = simulate(
+        minimal_trace,
+        "lru",
+        SimulationConfig(timeline_mode="sampled", sample_every=4, sample_threshold=0.5, **base),
+    )
+    assert none.stats == sampled.stats == full.stats
+    assert len(none.timeline) == none.timeline_points == 0
+    assert none.peak_used == sampled.peak_used == full.timeline.column("occupancy").max() == 128
+    # Every 4th event, plus t=3 where occupancy jumps by more than half the capacity.
+    assert sampled.timeline.column("t").tolist() == [0, 3, 4, 8]
+    # Deltas of skipped events roll into the next sample; only the tail after t=8 is dropped.
+    assert sampled.timeline.column("faults").sum() == full.timeline.column("faults")[:9].sum()
+    assert [m.blocks for _, m in replay(sampled.timeline)] == [
+        m.blocks for _, m in replay(full.timeline) if m.t in (0, 3, 4, 8)
+    ]
+    with pytest.raises(ValueError):
+        simulate(minimal_trace, "lru", SimulationConfig(timeline_mode="every"))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import random
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+from run_sim import load_trace, open_trace
+from trace_analyze import _Fenwick, analyze_trace
+from trace_format import write_binary_trace
+from trace_tool import main as trace_main
+
+TRACE = Path(__file__).resolve().parents[1] / "traces" / "moe_expert_swap.jsonl"
+
+
+def random_trace(seed, touches=400, objects=30, frees=False):
+    rng = random.Random(seed)
+    sizes = {f"obj_{i}": rng.choice([8, 20, 64, 100]) for i in range(objects)}
+    events = [{"t": 0, "event": "alloc", "id": obj, "size": size} for obj, size in sizes.items()]
+    for t in range(1, touches + 1):
+        obj = rng.choice(list(sizes))
+        if frees and rng.random() < 0.05:
+            events.append({"t": t, "event": "free", "id": obj})
+            events.append({"t": t, "event": "alloc", "id": obj, "size": sizes[obj]})
+        else:
+            mu = round(rng.random(), 2)
+            events.append({"t": t, "event": "touch", "id": obj, "mu": mu, "sigma": 0.1})
+    return events
+
+
+def naive_lru_misses(events, capacity):
+    """Byte-capacity LRU that evicts from the cold end until the touched object fits."""
+    sizes, cache, used, misses = {}, OrderedDict(), 0, 0
+    for ev in events:
+        if ev["event"] == "alloc":
+            sizes[ev["id"]] = ev["size"]
+        elif ev["event"] == "touch":
+            obj = ev["id"]
+            if obj in cache:
+                cache.move_to_end(obj)
+                continue
+            misses += 1
+            while cache and used + sizes[obj] > capacity:
+                used -= cache.popitem(last=False)[1]
+            if sizes[obj] <= capacity:
+                cache[obj] = sizes[obj]
+                used += sizes[obj]
+    return misses
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_miss_ratio_curve_matches_a_simulated_lru_at_every_capacity(seed):
+    events = random_trace(seed)
+    lru = analyze_trace(events).lru
+    for capacity in [0, 50, 100, 200, 400, 800, 1600, 3000]:
+        assert lru.misses(capacity)[0] == naive_lru_misses(events, capacity)
+
+
+def test_fenwick_prefix_sums_survive_growth():
+    rng = random.Random(1)
+    fenwick = _Fenwick(4)
+    values = [rng.randrange(100) for _ in range(3000)]
+    for index, value in enumerate(values):
+        fenwick.add(index, value)
+    assert [fenwick.prefix(count) for count in (0, 5, 1025, 3000)] == [
+        sum(values[:count]) for count in (0, 5, 1025, 3000)
+    ]
+
+
+def test_working_set_counts_live_objects_touched_within_the_window():
+    events = random_trace(7, touches=200, frees=True)
+    analysis = analyze_trace(events, windows=[10])
+    curve = analysis.working_set[0]
+    sizes = {ev["id"]: ev["size"] for ev in events if ev["event"] == "alloc"}
+    # One touch per t here, so each curve point is the window ending at that touch.
+    live_bytes = []
+    for now in curve["t"]:
+        latest = {}
+        for ev in events:
+            if ev["t"] > now:
+                break
+            if ev["event"] == "touch":
+                latest[ev["id"]] = ev["t"]
+            elif ev["event"] == "free":
+                latest.pop(ev["id"], None)
+        live_bytes.append(sum(sizes[obj] for obj, t in latest.items() if now - t < 10))
+    assert curve["bytes"] == live_bytes
+    assert curve["peak"] == max(live_bytes)
+
+
+def test_calibration_scores_forecasts_against_the_next_touch():
+    events = [
+        {"t": 0, "event": "alloc", "id": "a", "size": 10},
+        {"t": 0, "event": "alloc", "id": "b", "size": 10},
+        {"t": 1, "event": "touch", "id": "a", "mu": 0.9, "sigma": 0.05},
+        {"t": 2, "event": "touch", "id": "b", "mu": 0.8, "sigma": 0.05},
+        {"t": 3, "event": "touch", "id": "a", "mu": 0.2, "sigma": 0.05},
+        {"t": 9, "event": "touch", "id": "b", "mu": 0.1, "sigma": 0.05},
+        {"t": 10, "event": "free", "id": "a"},
+    ]
+    calibration = analyze_trace(events).calibration
+    assert calibration["touches"] == 4
+    assert calibration["base_rate"] == 0.5
+    assert calibration["brier"] == pytest.approx((0.1**2 + 0.2**2 + 0.2**2 + 0.1**2) / 4)
+    # b's re-touch comes 7 t later, outside a horizon of 5.
+    assert analyze_trace(events, horizon=5).calibration["base_rate"] == 0.25
+
+
+def test_phase_sizes_and_reuse_histogram(minimal_trace):
+    analysis = analyze_trace(minimal_trace)
+    report = analysis.to_json()
+    assert report["touches"] == analysis.lru.touches
+    assert sum(report["reuse_distance"]["count"]) == analysis.touches - analysis.lru.cold
+    for summary in report["phase_sizes"].values():
+        assert summary["min"] <= summary["p50"] <= summary["p90"] <= summary["max"]
+        assert sum(summary["histogram"]["count"]) == summary["objects"]
+
+
+def test_binary_and_jsonl_traces_give_the_same_analysis(tmp_path):
+    path = tmp_path / "trace.hbmt"
+    write_binary_trace(load_trace(TRACE), path)
+    assert analyze_trace(open_trace(path)).to_json() == analyze_trace(load_trace(TRACE)).to_json()
+
+
+def test_analyze_cli(tmp_path, capsys):
+    out = tmp_path / "analysis.json"
+    trace_main(["analyze", str(TRACE), "-o", str(out), "--capacity", "0", "--capacity", "270"])
+    assert "68 events, 30 touches of 12 objects" in capsys.readouterr().out
+    report = json.loads(out.read_text())
+    assert report["lru_mrc"] == {
+        "capacity": [0, 270],
+        "miss_ratio": [1.0, 0.6],
+        "byte_miss_ratio": [1.0, 0.6],
+    }
+    assert {"reuse_distance", "working_set", "phase_sizes", "calibration"} <= report.keys()
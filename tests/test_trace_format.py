@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import pickle
+
+import pytest
+
+from run_sim import SimulationConfig, checkpoint, load_trace, main, simulate, simulate_many
+from trace_format import BinaryTrace, is_binary_trace, write_binary_trace
+from trace_tool import main as trace_main
+
+
+@pytest.fixture
+def sharing_trace(minimal_trace):
+    return minimal_trace + [
+        {"t": 10, "event": "share", "id": "obj_d", "src": "obj_c"},
+        {"t": 11, "event": "touch", "id": "obj_d", "mu": 0.8, "sigma": 0.1, "write": True},
+        {"t": 12, "event": "free", "id": "obj_d"},
+    ]
+
+
+def test_binary_trace_round_trips_events(tmp_path, sharing_trace):
+    path = tmp_path / "trace.hbmt"
+    assert write_binary_trace(sharing_trace, path) == len(sharing_trace)
+    trace = BinaryTrace(path)
+    assert is_binary_trace(path) and len(trace) == len(sharing_trace)
+    assert list(trace) == sharing_trace
+    assert trace.ids == ["obj_a", "obj_b", "obj_c", "obj_d"]
+    assert trace.columns["size"][:2].tolist() == [64, 64]
+    assert list(pickle.loads(pickle.dumps(trace))) == sharing_trace
+
+
+@pytest.mark.parametrize("policy", ["confidence", "lru", "clockpro"])
+def test_simulating_a_binary_trace_matches_jsonl(tmp_path, sharing_trace, policy):
+    path = tmp_path / "trace.hbmt"
+    write_binary_trace(sharing_trace, path)
+    config = SimulationConfig(miss_mode="demand", capacity=128, reserve=0)
+    expected = simulate(sharing_trace, policy, config)
+    result = simulate(load_trace(path), policy, config)
+    assert result.stats == expected.stats
+    assert result.final_blocks == expected.final_blocks
+    assert result.timeline.points() == expected.timeline.points()
+    saved = checkpoint(BinaryTrace(path), policy, 6, config)
+    assert simulate(BinaryTrace(path), policy, resume_from=saved).stats == expected.stats
+    (lockstep,) = simulate_many(path, [(policy, config)])
+    assert lockstep.stats == expected.stats
+
+
+def test_unsupported_events_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="event 1: unsupported event type 'resize'"):
+        write_binary_trace(
+            [{"t": 0, "event": "free", "id": "a"}, {"t": 1, "event": "resize"}],
+            tmp_path / "bad.hbmt",
+        )
+    assert not is_binary_trace(tmp_path / "missing.hbmt")
+
+
+def test_convert_cli(tmp_path, minimal_trace, capsys):
+    source = tmp_path / "trace.jsonl"
+    source.write_text("\n".join(json.dumps(event) for event in minimal_trace) + "\n")
+    trace_main(["convert", str(source)])
+    assert "Wrote 10 events" in capsys.readouterr().out
+    converted = tmp_path / "trace.hbmt"
+    assert list(BinaryTrace(converted)) == minimal_trace
+    out = tmp_path / "out.json"
+    main(["--trace", str(converted), "--policy", "lru", "--json", str(out)])
+    assert json.loads(out.read_text())["stats"]["alloc_events"] == 3
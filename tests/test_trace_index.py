@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from run_sim import (
+    SimulationConfig,
+    catalog_checkpoint,
+    checkpoint,
+    load_trace,
+    main,
+    simulate,
+)
+from trace_format import write_binary_trace
+from trace_index import TraceIndex, _Catalog, index_path
+from trace_tool import main as trace_main
+
+TRACES = Path(__file__).resolve().parents[1] / "traces"
+TRACE = TRACES / "moe_expert_swap.jsonl"
+
+
+def write_jsonl(path, events):
+    path.write_text("\n".join(json.dumps(event) for event in events) + "\n")
+    return path
+
+
+@pytest.fixture(params=["jsonl", "binary"])
+def trace_file(request, tmp_path):
+    events = load_trace(TRACE)
+    if request.param == "binary":
+        path = tmp_path / "trace.hbmt"
+        write_binary_trace(events, path)
+    else:
+        path = write_jsonl(tmp_path / "trace.jsonl", events)
+    return path, events
+
+
+def naive_window(events, start_t, end_t):
+    catalog = _Catalog()
+    event_t = 0
+    prefix = [ev for ev in events if ev["t"] < start_t]
+    for ev in prefix:
+        catalog.apply(ev["event"], ev.get("id"), ev.get("size"), ev.get("src"))
+        event_t = ev["t"]
+    inside = [ev for ev in events[len(prefix) :] if ev["t"] <= end_t]
+    return len(prefix), event_t, catalog, inside
+
+
+@pytest.mark.parametrize("stride", [1, 7, 64])
+def test_window_matches_a_fast_forward_from_the_start(trace_file, stride):
+    path, events = trace_file
+    index = TraceIndex.build(path, stride)
+    assert index.events == len(events)
+    last_t = events[-1]["t"]
+    for start_t, end_t in [(0, last_t), (last_t // 3, last_t // 2), (last_t // 2, last_t + 5)]:
+        window = index.window(start_t, end_t)
+        start, event_t, catalog, inside = naive_window(events, start_t, end_t)
+        assert (window.start, window.event_t) == (start, event_t)
+        assert (window.catalog, window.need, window.alloc_need) == (
+            catalog.sizes,
+            catalog.need,
+            catalog.alloc_need,
+        )
+        assert list(window.events) == inside
+
+
+def test_index_is_saved_and_rebuilt_when_the_trace_changes(tmp_path, minimal_trace):
+    path = write_jsonl(tmp_path / "trace.jsonl", minimal_trace)
+    TraceIndex.open(path, stride=4)
+    assert index_path(path).exists()
+    assert TraceIndex.load(path).stride == 4
+    write_jsonl(path, minimal_trace[:6])
+    os.utime(path, ns=(0, 0))
+    assert TraceIndex.load(path) is None
+    assert TraceIndex.open(path).events == 6
+
+
+def test_unsorted_and_compressed_traces_cannot_be_indexed(tmp_path, minimal_trace):
+    events = [minimal_trace[1], minimal_trace[0]]
+    with pytest.raises(ValueError, match="event 1: t=0 comes after t=1"):
+        TraceIndex.build(write_jsonl(tmp_path / "unsorted.jsonl", events))
+    with pytest.raises(ValueError, match="cannot seek in a compressed trace"):
+        TraceIndex.build(tmp_path / "trace.jsonl.gz")
+
+
+def test_windowed_cli_run(tmp_path, minimal_trace, capsys):
+    path = write_jsonl(tmp_path / "trace.jsonl", minimal_trace)
+    trace_main(["index", str(path), "--stride", "2"])
+    assert "Indexed 10 events (5 entries, every 2)" in capsys.readouterr().out
+    out = tmp_path / "out.json"
+    main(["--trace", str(path), "--policy", "lru", "--start-t", "5", "--json", str(out)])
+    stats = json.loads(out.read_text())["stats"]
+    # obj_c is allocated inside the window; obj_a's size comes from the skipped prefix.
+    assert stats["alloc_events"] == 1 and stats["free_events"] == 2
+    main(["--trace", str(path), "--policy", "lru", "--start-t", "0", "--json", str(out)])
+    expected = simulate(minimal_trace, "lru", SimulationConfig())
+    assert json.loads(out.read_text())["stats"] == expected.stats
+    with pytest.raises(SystemExit):
+        main(["--trace", str(path), "--policy", "lru", "--end-t", "3", "--resume-from", "x"])
+
+
+@pytest.mark.parametrize("policy", ["confidence", "lru"])
+def test_windowed_run_matches_a_full_replay_with_compaction(tmp_path, policy):
+    # At this capacity the confidence policy compacts during a safe window.
+    events = load_trace(TRACES / "fragmentation_stressor.jsonl")
+    # The CLI saves a sidecar index next to the trace, so keep it out of the source tree.
+    path = write_jsonl(tmp_path / "trace.jsonl", events)
+    config = SimulationConfig(capacity=300)
+    index = TraceIndex.build(path, stride=16)
+    out = tmp_path / "out.json"
+    for start_t in (10, 35, 60):
+        window = index.window(start_t)
+        full = checkpoint(events, policy, window.start, config).restore(policy, config)
+        forecast_driven = policy == "confidence"
+        assert window.catalog == full["obj_size"]
+        assert window.upcoming_need(forecast_driven) == full["upcoming_need"]
+        resumed = catalog_checkpoint(
+            policy,
+            config,
+            full["obj_size"],
+            full["upcoming_need"],
+            window.start,
+            window.event_t,
+        )
+        expected = simulate(events[window.start :], policy, config, resume_from=resumed)
+        main(
+            ["--trace", str(path), "--policy", policy, "--capacity", "300"]
+            + ["--start-t", str(start_t), "--json", str(out)]
+        )
+        assert json.loads(out.read_text())["stats"] == expected.stats
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from trace_format import write_binary_trace
+from trace_tool import main as trace_main
+from trace_validate import Schema, validate_trace
+
+TRACES = Path(__file__).resolve().parents[1] / "traces"
+
+BAD_LINES = [
+    '{"t": 0, "event": "alloc", "id": "a", "size": 64}',
+    '{"t": 1, "event": "alloc", "id": "b"}',
+    "",
+    '{"t": 2, "event": "touch", "id": "a", "mu": 1.4, "sigma": 0.1}',
+    '{"t": 2, "event": "touch", "id": "ghost"}',
+    "not json",
+    "[1, 2]",
+    '{"t": 1, "event": "free", "id": "a"}',
+    '{"t": 3, "event": "free", "id": "a"}',
+    '{"t": 4, "event": "resize", "id": "a"}',
+    '{"t": "5", "event": "touch", "id": "a"}',
+    '{"t": 7, "event": "share", "id": "c", "src": "a"}',
+    '{"t": 8, "event": "fork", "id": "d", "src": "nobody"}',
+    '{"event": "safe_window"}',
+]
+
+
+@pytest.fixture
+def bad_trace(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text("\n".join(BAD_LINES) + "\n")
+    return path
+
+
+@pytest.mark.parametrize("trace", sorted(TRACES.glob("*.jsonl")), ids=lambda path: path.name)
+def test_bundled_traces_are_valid(trace):
+    assert validate_trace(trace).ok
+
+
+def test_schema_reads_per_event_requirements():
+    schema = Schema.load()
+    assert schema.event_required["alloc"] == ("id", "size")
+    assert schema.event_required["share"] == ("id", "src")
+    assert schema.ranges["mu"] == (0, 1)
+    assert schema.ranges["size"] == (0, None)
+
+
+@pytest.mark.parametrize("chunk", [1, 4, 65536])
+def test_report_lists_offending_lines(bad_trace, chunk):
+    report = validate_trace(bad_trace, chunk=chunk)
+    assert not report.ok
+    assert report.events == len(BAD_LINES) - 1
+    assert report.counts == {
+        "required": 2,
+        "range": 1,
+        "unallocated": 2,
+        "json": 2,
+        "order": 1,
+        "double_free": 1,
+        "enum": 1,
+        "type": 1,
+        "freed_reference": 1,
+    }
+    issues = {(issue.location, issue.check) for issue in report.issues}
+    assert issues == {
+        (2, "required"),
+        (4, "range"),
+        (5, "unallocated"),
+        (6, "json"),
+        (7, "json"),
+        (8, "order"),
+        (9, "double_free"),
+        (10, "enum"),
+        (11, "type"),
+        (12, "freed_reference"),
+        (13, "unallocated"),
+        (14, "required"),
+    }
+    assert report.warnings == {"freed_reference": 1}
+
+
+def test_limit_keeps_the_first_issues_and_counts_the_rest(tmp_path):
+    events = [{"t": 0, "event": "touch", "id": f"obj_{i}"} for i in range(50)]
+    path = tmp_path / "trace.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in events) + "\n")
+    report = validate_trace(path, limit=3, chunk=16)
+    assert report.counts == {"unallocated": 50}
+    assert [issue.location for issue in report.issues] == [1, 2, 3]
+    assert report.issues[0].message == "touch of 'obj_0', which was never allocated"
+
+
+def test_binary_traces_get_the_same_checks(tmp_path):
+    # The lines of BAD_LINES that the binary format can represent.
+    events = [json.loads(BAD_LINES[i]) for i in (0, 3, 4, 7, 8, 11, 12)]
+    path = tmp_path / "bad.hbmt"
+    write_binary_trace(events, path)
+    report = validate_trace(path, chunk=3)
+    assert report.unit == "event"
+    assert report.counts == {
+        "range": 1,
+        "unallocated": 2,
+        "order": 1,
+        "double_free": 1,
+        "freed_reference": 1,
+    }
+    assert [issue.location for issue in report.issues] == [1, 2, 3, 4, 5, 6]
+
+
+def test_validate_cli(bad_trace, capsys):
+    trace_main(["validate", str(TRACES / "moe_expert_swap.jsonl")])
+    assert "0 errors, 0 warnings" in capsys.readouterr().out
+    with pytest.raises(SystemExit) as failed:
+        trace_main(["validate", str(bad_trace), "--max-issues", "1"])
+    assert failed.value.code == 1
+    out = capsys.readouterr().out
+    assert "line 9: [double_free] free of 'a', which is already freed" in out
+    assert "11 errors, 1 warnings" in out
+
+
+def test_negative_sizes_are_out_of_range(tmp_path):
+    events = [
+        {"t": 0, "event": "alloc", "id": "a", "size": -5},
+        {"t": 1, "event": "alloc", "id": "b", "size": 0},
+    ]
+    path = tmp_path / "negative.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in events) + "\n")
+    report = validate_trace(path)
+    assert report.counts == {"range": 1}
+    assert report.issues[0].message == "'size'=-5 outside [0, None]"
+    with pytest.raises(ValueError, match="event 0: negative size -5"):
+        write_binary_trace(events, tmp_path / "negative.hbmt")
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from run_sim import open_trace
+from trace_analyze import analyze_trace
+
+
+def plot_mrc(axis, report: dict):
+    curve = report["lru_mrc"]
+    # Capacity 0 cannot go on a log axis; the curve is flat below the first step anyway.
+    points = [point for point in zip(*curve.values()) if point[0] > 0]
+    if points:
+        capacity, ratio, byte_ratio = zip(*points)
+        axis.step(capacity, ratio, where="post", label="miss ratio")
+        axis.step(capacity, byte_ratio, where="post", label="byte miss ratio")
+        axis.set_xscale("log")
+        axis.legend()
+    axis.set_ylim(0, 1.02)
+    axis.set_title("LRU miss-ratio curve")
+    axis.set_xlabel("capacity (bytes)")
+
+
+def plot_reuse_distance(axis, report: dict):
+    histogram = report["reuse_distance"]
+    labels = ["0"] + [f"{edge}+" for edge in histogram["edges"][1:]]
+    positions = range(len(labels))
+    axis.bar(positions, histogram.get("bytes", histogram["count"]))
+    axis.set_xticks(list(positions), labels, rotation=60, fontsize=7)
+    axis.set_title("Reuse distance")
+    axis.set_xlabel("distinct bytes since the previous touch")
+    axis.set_ylabel("bytes re-touched")
+
+
+def plot_working_set(axis, report: dict):
+    for curve in report["working_set"]:
+        axis.plot(curve["t"], curve["bytes"], label=f"window {curve['window']}")
+    if report["working_set"]:
+        axis.legend()
+    axis.set_title("Working-set size")
+    axis.set_xlabel("t")
+    axis.set_ylabel("bytes")
+
+
+def plot_reliability(axis, report: dict):
+    rows = [row for row in report["calibration"].get("bins", []) if row["count"]]
+    axis.plot([0, 1], [0, 1], color="grey", linestyle="--", linewidth=1)
+    if rows:
+        mean_mu = [row["mean_mu"] for row in rows]
+        observed = [row["observed"] for row in rows]
+        sigma = [row["mean_sigma"] for row in rows]
+        axis.errorbar(mean_mu, observed, xerr=sigma, fmt="o", capsize=3)
+    axis.set_xlim(0, 1)
+    axis.set_ylim(0, 1)
+    axis.set_title("Forecast calibration")
+    axis.set_xlabel("mean mu (± sigma)")
+    axis.set_ylabel("observed re-touch rate")
+
+
+def plot_phase_sizes(axis, report: dict):
+    phases = report["phase_sizes"]
+    names = list(phases)
+    for offset, key in enumerate(("p50", "p90", "max")):
+        positions = [index + (offset - 1) * 0.27 for index in range(len(names))]
+        axis.bar(positions, [phases[name][key] for name in names], width=0.27, label=key)
+    axis.set_xticks(range(len(names)), names, rotation=30, fontsize=7, ha="right")
+    if names:
+        axis.legend()
+    axis.set_title("Object sizes by phase")
+    axis.set_ylabel("bytes")
+
+
+def plot_admission(axis, report: dict):
+    sweep = report["calibration"].get("admit_lb")
+    if sweep:
+        axis.plot(sweep["threshold"], sweep["admitted"], label="admitted")
+        precision = [
+            (threshold, value)
+            for threshold, value in zip(sweep["threshold"], sweep["precision"])
+            if value is not None
+        ]
+        if precision:
+            axis.plot(*zip(*precision), label="re-touched")
+        axis.legend()
+    axis.set_ylim(0, 1.02)
+    axis.set_title("Admitting on mu - z·sigma")
+    axis.set_xlabel("threshold")
+
+
+def save_figure(report: dict, out_path: Path, fmt: str, title: str):
+    figure, axes = plt.subplots(2, 3, figsize=(15, 8.5))
+    panels = (
+        plot_mrc,
+        plot_reuse_distance,
+        plot_working_set,
+        plot_reliability,
+        plot_phase_sizes,
+        plot_admission,
+    )
+    for axis, panel in zip(axes.flat, panels):
+        panel(axis, report)
+    figure.suptitle(title)
+    figure.tight_layout()
+    figure.savefig(out_path, dpi=160, format=fmt)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--trace", help="Path to a JSONL or binary trace to analyze")
+    source.add_argument("--analysis", help="JSON written by `hbm-trace analyze -o`")
+    parser.add_argument("--out", default="out_analysis.png", help="Output path")
+    parser.add_argument("--horizon", type=int, help="Re-touch horizon for forecast calibration")
+    parser.add_argument("--format", choices=["png", "svg", "pdf"], default="png")
+    args = parser.parse_args(argv)
+
+    if args.analysis:
+        report = json.loads(Path(args.analysis).read_text(encoding="utf-8"))
+        title = Path(args.analysis).name
+    else:
+        report = analyze_trace(open_trace(args.trace), horizon=args.horizon).to_json()
+        title = Path(args.trace).name
+
+    out_path = Path(args.out)
+    save_figure(report, out_path, args.format, title)
+    print(f"Wrote: {out_path.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,9 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from run_sim import SimulationConfig, load_trace, simulate
+from policy.registry import available_policies
+from run_sim import SimulationConfig, open_trace, simulate_iter
+from viz.timeline import replay
 
 
 def render_state(blocks: list[tuple[int, int, str]], capacity: int, width: int) -> np.ndarray:
@@ -29,20 +31,21 @@ def render_state(blocks: list[tuple[int, int, str]], capacity: int, width: int)
     return bins
 
 
-def build_heatmap(result, width: int, stride: int = 1) -> np.ndarray:
+def build_heatmap(points, capacity: int, width: int, stride: int = 1) -> np.ndarray:
+    """Render every ``stride``-th point of a timeline stream into one heatmap row."""
     frames = [
-        render_state(point.blocks, result.config.capacity, width)
-        for point in result.timeline[::stride]
+        render_state(memory_map.blocks, capacity, width)
+        for index, (_, memory_map) in enumerate(replay(points))
+        if index % stride == 0
     ]
     return np.stack(frames, axis=0) if frames else np.zeros((1, width), dtype=np.float32)
 
 
-def save_static_figure(results, out_path: Path, width: int, fmt: str):
-    figure, axes = plt.subplots(1, len(results), figsize=(12, 4.8), squeeze=False)
+def save_static_figure(heatmaps: dict[str, np.ndarray], out_path: Path, fmt: str):
+    figure, axes = plt.subplots(1, len(heatmaps), figsize=(12, 4.8), squeeze=False)
     axes = axes[0]
     max_value = 1.0
-    for axis, (policy, result) in zip(axes, results.items()):
-        heatmap = build_heatmap(result, width)
+    for axis, (policy, heatmap) in zip(axes, heatmaps.items()):
         axis.imshow(heatmap, aspect="auto", interpolation="nearest", vmin=0, vmax=max_value)
         axis.set_title(f"HBM Occupancy Heatmap ({policy})")
         axis.set_xlabel("HBM address (binned)")
@@ -51,12 +54,8 @@ def save_static_figure(results, out_path: Path, width: int, fmt: str):
     figure.savefig(out_path, dpi=220, format=fmt)
 
 
-def save_animation(result, out_path: Path, width: int):
+def save_animation(frames: np.ndarray, policy: str, out_path: Path):
     figure, axis = plt.subplots(figsize=(10.5, 4.6))
-    frames = [
-        render_state(point.blocks, result.config.capacity, width)
-        for point in result.timeline[::10]
-    ]
     image = axis.imshow(
         np.expand_dims(frames[0], axis=0),
         aspect="auto",
@@ -64,7 +63,7 @@ def save_animation(result, out_path: Path, width: int):
         vmin=0,
         vmax=1.0,
     )
-    axis.set_title(f"HBM Occupancy Animation ({result.policy})")
+    axis.set_title(f"HBM Occupancy Animation ({policy})")
     axis.set_xlabel("HBM address (binned)")
     axis.set_ylabel("frame")
 
@@ -79,12 +78,12 @@ def save_animation(result, out_path: Path, width: int):
 
 def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser()
-    parser.add_argument("--trace", required=True, help="Path to JSONL trace")
+    parser.add_argument("--trace", required=True, help="Path to a JSONL or binary trace")
     parser.add_argument("--out", default="out_fragmentation.png", help="Output path")
     parser.add_argument("--capacity", type=int, default=800, help="HBM capacity")
     parser.add_argument("--width", type=int, default=140, help="Heatmap width (bins)")
     parser.add_argument("--every", type=int, default=1, help="Record every N timeline points")
-    parser.add_argument("--policy", choices=["confidence", "lru", "clockpro"], default="confidence")
+    parser.add_argument("--policy", choices=available_policies(), default="confidence")
     parser.add_argument(
         "--compare",
         action="store_true",
@@ -97,23 +96,27 @@ def main(argv: list[str] | None = None):
     if args.compare and args.animate:
         raise SystemExit("--compare and --animate cannot be combined in the current visualizer.")
 
-    trace = load_trace(args.trace)
     config = SimulationConfig(miss_mode="demand", capacity=args.capacity)
-
-    if args.compare:
-        results = {
-            "confidence": simulate(trace, "confidence", config),
-            "lru": simulate(trace, "lru", config),
-        }
-    else:
-        results = {args.policy: simulate(trace, args.policy, config)}
+    policies = ["confidence", "lru"] if args.compare else [args.policy]
+    animate = args.animate or args.format == "gif"
+    # Each policy streams its own pass over the trace; only the binned rows are kept.
+    stride = 10 if animate else max(1, args.every)
+    heatmaps = {
+        policy: build_heatmap(
+            simulate_iter(open_trace(args.trace), policy, config),
+            args.capacity,
+            args.width,
+            stride,
+        )
+        for policy in policies
+    }
 
     out_path = Path(args.out)
-    if args.animate or args.format == "gif":
-        result = next(iter(results.values()))
-        save_animation(result, out_path, args.width)
+    if animate:
+        policy, frames = next(iter(heatmaps.items()))
+        save_animation(frames, policy, out_path)
     else:
-        save_static_figure(results, out_path, args.width, args.format)
+        save_static_figure(heatmaps, out_path, args.format)
     print(f"Wrote: {out_path.resolve()}")
 
 
@@ -10,7 +10,9 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from run_sim import SimulationConfig, load_trace, simulate
+from policy.registry import available_policies
+from run_sim import SimulationConfig, open_trace, simulate_iter
+from viz.timeline import Timeline
 
 
 EVENT_COLORS = {
@@ -23,17 +25,20 @@ EVENT_COLORS = {
 def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--trace", required=True)
-    parser.add_argument("--policy", choices=["confidence", "lru", "clockpro"], default="confidence")
+    parser.add_argument("--policy", choices=available_policies(), default="confidence")
     parser.add_argument("--out", required=True)
     args = parser.parse_args(argv)
 
-    result = simulate(load_trace(args.trace), args.policy, SimulationConfig(miss_mode="demand"))
-    if not result.timeline:
+    config = SimulationConfig(miss_mode="demand")
+    # Columnar and without memory maps: only the plotted scalars are kept.
+    timeline = Timeline.from_points(
+        simulate_iter(open_trace(args.trace), args.policy, config), maps=False
+    )
+    if not len(timeline):
         raise SystemExit("No timeline points available for plotting.")
-
-    x_values = [point.t for point in result.timeline]
-    occupancy = [point.occupancy for point in result.timeline]
-    frag = [point.external_frag for point in result.timeline]
+    x_values = timeline.column("t")
+    occupancy = timeline.column("occupancy")
+    frag = timeline.column("external_frag")
 
     figure, axes = plt.subplots(3, 1, figsize=(12, 8.5), sharex=True)
 
@@ -44,14 +49,14 @@ def main(argv: list[str] | None = None):
 
     axes[1].plot(x_values, frag, color="#E8593C", linewidth=2.0, label="external_frag")
     axes[1].axhline(
-        result.config.admit_lb,
+        config.admit_lb,
         color="#1F3A7A",
         linestyle="--",
         linewidth=1.2,
         label="LB threshold",
     )
     axes[1].axhline(
-        result.config.evict_ub,
+        config.evict_ub,
         color="#7B849A",
         linestyle="--",
         linewidth=1.2,
@@ -61,19 +66,13 @@ def main(argv: list[str] | None = None):
     axes[1].set_ylim(0, 1)
     axes[1].legend(loc="upper right")
 
-    for point in result.timeline:
-        if point.event in EVENT_COLORS:
-            axes[2].axvline(
-                point.t,
-                color=EVENT_COLORS[point.event],
-                ymin=0.1,
-                ymax=0.45,
-                alpha=0.75,
-            )
-        if point.event == "safe_window":
-            axes[2].axvspan(point.t - 0.5, point.t + 0.5, color="#BDC3C7", alpha=0.45)
-        if point.compaction:
-            axes[2].axvline(point.t, color="#F39C12", ymin=0.55, ymax=0.95, linewidth=2.0)
+    for event, color in EVENT_COLORS.items():
+        for t in x_values[timeline.mask("event", event)]:
+            axes[2].axvline(t, color=color, ymin=0.1, ymax=0.45, alpha=0.75)
+    for t in x_values[timeline.mask("event", "safe_window")]:
+        axes[2].axvspan(t - 0.5, t + 0.5, color="#BDC3C7", alpha=0.45)
+    for t in x_values[timeline.column("compaction") > 0]:
+        axes[2].axvline(t, color="#F39C12", ymin=0.55, ymax=0.95, linewidth=2.0)
     axes[2].set_yticks([])
     axes[2].set_ylabel("Events")
     axes[2].set_xlabel("Timestamp")
@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+
+from trace_format import BinaryTrace, trace_records
+
+# Size the simulator assumes for an object it has seen no alloc for.
+DEFAULT_SIZE = 20
+NO_PHASE = "(none)"
+# Longest curve written to JSON; working-set curves are downsampled to this many points.
+MAX_POINTS = 512
+
+
+class _Fenwick:
+    """Prefix sums over a growable array of ints, O(log n) per update and query."""
+
+    def __init__(self, size: int = 1024):
+        self.values = [0] * size
+        self.tree = [0] * (size + 1)
+
+    def _grow(self, needed: int):
+        size = len(self.values)
+        while size <= needed:
+            size *= 2
+        self.values.extend([0] * (size - len(self.values)))
+        # Linear-time rebuild: each node pushes its sum to its parent.
+        tree = [0, *self.values]
+        for index in range(1, size + 1):
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self.tree = tree
+
+    def add(self, index: int, delta: int):
+        if index >= len(self.values):
+            self._grow(index)
+        self.values[index] += delta
+        tree = self.tree
+        size = len(tree)
+        index += 1
+        while index < size:
+            tree[index] += delta
+            index += index & -index
+
+    def prefix(self, count: int) -> int:
+        """Sum of the first ``count`` values."""
+        tree = self.tree
+        total = 0
+        while count > 0:
+            total += tree[count]
+            count &= count - 1
+        return total
+
+
+def _log2_histogram(values: np.ndarray, weights: np.ndarray | None = None) -> dict[str, list]:
+    """Counts (and weight sums) in bins ``[0, 1), [1, 2), [2, 4), [4, 8), ...``."""
+    values = np.asarray(values, dtype=np.int64)
+    bins = np.zeros(len(values), dtype=np.int64)
+    positive = values > 0
+    bins[positive] = np.floor(np.log2(values[positive])).astype(np.int64) + 1
+    count = int(bins.max()) + 1 if len(bins) else 1
+    edges = [0] + [1 << power for power in range(count - 1)]
+    histogram = {"edges": edges, "count": np.bincount(bins, minlength=count).tolist()}
+    if weights is not None:
+        histogram["bytes"] = np.bincount(bins, weights, minlength=count).astype(np.int64).tolist()
+    return histogram
+
+
+@dataclass
+class LruCurve:
+    """Misses of an LRU cache of every byte capacity, from one pass of stack distances.
+
+    An access hits a cache of ``capacity`` bytes when the distinct bytes
+    touched since the object's previous access, plus its own size, fit in it
+    (Mattson's inclusion property, weighted by bytes). This is an idealized
+    cache: no fragmentation, reserve or safety budgets, and a freed object
+    leaves the stack, so what was below it moves up.
+    """
+
+    touches: int
+    touched_bytes: int
+    cold: int
+    cold_bytes: int
+    required: np.ndarray  # sorted bytes needed for each warm access to hit
+    required_bytes: np.ndarray  # cumulative size of those accesses, in the same order
+
+    def misses(self, capacity: int) -> tuple[int, int]:
+        """``(misses, bytes missed)`` for a cache of ``capacity`` bytes."""
+        fits = int(np.searchsorted(self.required, capacity, side="right"))
+        hit_bytes = int(self.required_bytes[fits - 1]) if fits else 0
+        warm_bytes = self.touched_bytes - self.cold_bytes
+        return self.cold + len(self.required) - fits, self.cold_bytes + warm_bytes - hit_bytes
+
+    def miss_ratio(self, capacity: int) -> float:
+        return self.misses(capacity)[0] / self.touches if self.touches else 0.0
+
+    def byte_miss_ratio(self, capacity: int) -> float:
+        return self.misses(capacity)[1] / self.touched_bytes if self.touched_bytes else 0.0
+
+    def default_capacities(self, points: int = 64) -> list[int]:
+        """Every capacity where the miss ratio changes, or ``points`` log-spaced ones."""
+        breaks = np.unique(self.required)
+        if len(breaks) > points:
+            low = max(int(breaks[0]), 1)
+            breaks = np.unique(np.geomspace(low, breaks[-1], points).round().astype(np.int64))
+        return [0] + breaks.tolist()
+
+
+@dataclass
+class TraceAnalysis:
+    events: int
+    touches: int
+    objects: int
+    peak_stack_bytes: int
+    lru: LruCurve
+    reuse_distance: dict[str, Any]
+    working_set: list[dict[str, Any]]
+    phase_sizes: dict[str, dict[str, Any]]
+    calibration: dict[str, Any]
+    capacities: list[int] = field(default_factory=list)
+
+    def to_json(self) -> dict[str, Any]:
+        lru = self.lru
+        capacities = self.capacities or lru.default_capacities()
+        return {
+            "events": self.events,
+            "touches": self.touches,
+            "objects": self.objects,
+            "touched_bytes": lru.touched_bytes,
+            "peak_stack_bytes": self.peak_stack_bytes,
+            "cold_misses": {"count": lru.cold, "bytes": lru.cold_bytes},
+            "reuse_distance": self.reuse_distance,
+            "lru_mrc": {
+                "capacity": capacities,
+                "miss_ratio": [lru.miss_ratio(capacity) for capacity in capacities],
+                "byte_miss_ratio": [lru.byte_miss_ratio(capacity) for capacity in capacities],
+            },
+            "working_set": self.working_set,
+            "phase_sizes": self.phase_sizes,
+            "calibration": self.calibration,
+        }
+
+
+def _downsample(length: int, points: int = MAX_POINTS) -> np.ndarray:
+    if length <= points:
+        return np.arange(length)
+    return np.unique(np.linspace(0, length - 1, points).round().astype(np.int64))
+
+
+def _working_set(t: np.ndarray, sizes: np.ndarray, end: np.ndarray, window: int) -> dict[str, Any]:
+    """Bytes of live objects touched within ``window`` of each touch.
+
+    Touch ``j`` counts towards touch ``i`` while it is still its object's
+    latest (``i < end[j]``) and ``t[i] - t[j] < window``. Each touch is an
+    interval of touches, so one difference array gives the whole curve.
+    """
+    n = len(t)
+    stop = np.minimum(end, np.searchsorted(t, t + window, side="left"))
+    diff = np.bincount(np.arange(n), sizes, n + 1) - np.bincount(stop, sizes, n + 1)
+    curve = np.cumsum(diff[:n]).round().astype(np.int64)
+    keep = _downsample(n)
+    return {
+        "window": int(window),
+        "mean": float(curve.mean()) if n else 0.0,
+        "peak": int(curve.max()) if n else 0,
+        "t": t[keep].tolist(),
+        "bytes": curve[keep].tolist(),
+    }
+
+
+def _phase_sizes(phases: dict[str, dict[str, int]]) -> dict[str, dict[str, Any]]:
+    summary = {}
+    for phase, objects in phases.items():
+        sizes = np.fromiter(objects.values(), np.int64, len(objects))
+        p50, p90 = np.percentile(sizes, [50, 90]).tolist()
+        summary[phase] = {
+            "objects": len(sizes),
+            "bytes": int(sizes.sum()),
+            "min": int(sizes.min()),
+            "p50": p50,
+            "p90": p90,
+            "max": int(sizes.max()),
+            "histogram": _log2_histogram(sizes),
+        }
+    return summary
+
+
+def _calibration(
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    reused: np.ndarray,
+    horizon: Optional[int],
+    z: float,
+    bins: int,
+) -> dict[str, Any]:
+    """How well touch forecasts predict an actual re-touch within ``horizon``."""
+    summary: dict[str, Any] = {"horizon": horizon, "z": z, "touches": len(mu)}
+    if not len(mu):
+        return summary
+    lb = np.clip(mu - z * sigma, 0.0, 1.0)
+    ub = np.clip(mu + z * sigma, 0.0, 1.0)
+    which = np.clip((mu * bins).astype(np.int64), 0, bins - 1)
+    rows = []
+    ece = 0.0
+    covered = 0
+    for index in range(bins):
+        members = which == index
+        count = int(members.sum())
+        row: dict[str, Any] = {"lo": index / bins, "hi": (index + 1) / bins, "count": count}
+        if count:
+            observed = float(reused[members].mean())
+            mean_mu = float(mu[members].mean())
+            within = bool(lb[members].mean() <= observed <= ub[members].mean())
+            row.update(
+                mean_mu=mean_mu,
+                mean_sigma=float(sigma[members].mean()),
+                observed=observed,
+                within_interval=within,
+            )
+            ece += count * abs(observed - mean_mu)
+            covered += count if within else 0
+        rows.append(row)
+    thresholds = np.linspace(0.0, 1.0, 21)
+    admitted = [lb >= threshold for threshold in thresholds]
+    summary.update(
+        base_rate=float(reused.mean()),
+        brier=float(np.mean((mu - reused) ** 2)),
+        ece=ece / len(mu),
+        coverage=covered / len(mu),
+        bins=rows,
+        admit_lb={
+            "threshold": thresholds.round(2).tolist(),
+            "admitted": [float(mask.mean()) for mask in admitted],
+            "precision": [float(reused[mask].mean()) if mask.any() else None for mask in admitted],
+        },
+    )
+    return summary
+
+
+def analyze_trace(
+    trace_events: Iterable[dict[str, Any]] | BinaryTrace,
+    windows: Sequence[int] | None = None,
+    horizon: Optional[int] = None,
+    capacities: Sequence[int] | None = None,
+    z: float = 1.0,
+    calibration_bins: int = 10,
+) -> TraceAnalysis:
+    """Workload characteristics of a trace, in one pass over its events.
+
+    Produces byte-weighted reuse distances and the LRU miss-ratio curve for
+    every capacity (Mattson's stack algorithm over a Fenwick tree of bytes by
+    last-touch position, O(n log n)), working-set size over sliding ``windows``
+    of ``t`` (default: 1/64, 1/16 and 1/4 of the trace's span), the sizes of
+    the objects each phase touches, and how well touch forecasts predict a
+    re-touch of the same object within ``horizon`` (before it is freed, when
+    None). ``z`` is the confidence multiplier used for the forecast bounds.
+
+    A ``share`` / ``fork`` reference counts as a separate object of its
+    source's size, as with ``--no-dedup``.
+    """
+    # One slot per touch; a list or binary trace bounds the count up front.
+    fenwick = _Fenwick(max(len(trace_events), 1) if hasattr(trace_events, "__len__") else 1024)
+    values = fenwick.values
+    sizes: dict[Any, int] = {}
+    position: dict[Any, int] = {}  # last touch of each live object that has been touched
+    stack_bytes = 0
+    peak_stack_bytes = 0
+    touch_t = array("q")
+    touch_size = array("q")
+    distance = array("q")  # -1 for a cold miss
+    end = array("q")  # first touch at which this touch is no longer its object's latest
+    pending: dict[Any, tuple[int, int]] = {}  # object -> (forecast index, t)
+    mu_values = array("d")
+    sigma_values = array("d")
+    reused = bytearray()
+    phases: dict[str, dict[Any, int]] = {}
+    events = 0
+    for t, event, obj, size, src, _, mu, sigma, phase in trace_records(trace_events):
+        events += 1
+        if event == "touch":
+            touch = len(touch_t)
+            obj_size = sizes.get(obj, DEFAULT_SIZE)
+            previous = position.get(obj)
+            if previous is None:
+                distance.append(-1)
+            else:
+                distance.append(stack_bytes - fenwick.prefix(previous + 1))
+                stacked = values[previous]
+                fenwick.add(previous, -stacked)
+                stack_bytes -= stacked
+                end[previous] = touch
+            fenwick.add(touch, obj_size)
+            stack_bytes += obj_size
+            if stack_bytes > peak_stack_bytes:
+                peak_stack_bytes = stack_bytes
+            position[obj] = touch
+            touch_t.append(t)
+            touch_size.append(obj_size)
+            end.append(-1)
+            forecast = pending.pop(obj, None)
+            if forecast is not None and (horizon is None or t - forecast[1] <= horizon):
+                reused[forecast[0]] = 1
+            if mu is not None and sigma is not None:
+                pending[obj] = (len(reused), t)
+                mu_values.append(mu)
+                sigma_values.append(sigma)
+                reused.append(0)
+            phases.setdefault(NO_PHASE if phase is None else phase, {}).setdefault(obj, obj_size)
+        elif event == "alloc":
+            sizes[obj] = int(size)
+            stacked = position.get(obj)
+            if stacked is not None:
+                # Growth of a touched object changes the bytes everything below it sees.
+                delta = int(size) - values[stacked]
+                fenwick.add(stacked, delta)
+                stack_bytes += delta
+        elif event == "free":
+            sizes.pop(obj, None)
+            pending.pop(obj, None)
+            stacked = position.pop(obj, None)
+            if stacked is not None:
+                freed = values[stacked]
+                fenwick.add(stacked, -freed)
+                stack_bytes -= freed
+                end[stacked] = len(touch_t)
+        elif event in ("share", "fork"):
+            sizes[obj] = sizes.get(src, DEFAULT_SIZE)
+
+    touches = len(touch_t)
+    # Sliding windows need non-decreasing t; an out-of-order touch is clamped forward.
+    t = np.maximum.accumulate(np.asarray(touch_t, dtype=np.int64)) if touches else np.zeros(0, int)
+    size_array = np.asarray(touch_size, dtype=np.int64)
+    distances = np.asarray(distance, dtype=np.int64)
+    ends = np.asarray(end, dtype=np.int64)
+    ends[ends < 0] = touches
+
+    warm = distances >= 0
+    required = distances[warm] + size_array[warm]
+    order = np.argsort(required, kind="stable")
+    lru = LruCurve(
+        touches=touches,
+        touched_bytes=int(size_array.sum()),
+        cold=int((~warm).sum()),
+        cold_bytes=int(size_array[~warm].sum()),
+        required=required[order],
+        required_bytes=np.cumsum(size_array[warm][order]),
+    )
+    if windows is None:
+        span = int(t[-1] - t[0]) if touches else 0
+        windows = sorted({max(span // divisor, 1) for divisor in (64, 16, 4)})
+    return TraceAnalysis(
+        events=events,
+        touches=touches,
+        objects=len({obj for objects in phases.values() for obj in objects}),
+        peak_stack_bytes=peak_stack_bytes,
+        lru=lru,
+        reuse_distance=_log2_histogram(distances[warm], size_array[warm]),
+        working_set=[
+            _working_set(t, size_array.astype(np.float64), ends, window) for window in windows
+        ],
+        phase_sizes=_phase_sizes(phases),
+        calibration=_calibration(
+            np.asarray(mu_values, dtype=np.float64),
+            np.asarray(sigma_values, dtype=np.float64),
+            np.asarray(reused, dtype=np.float64),
+            horizon,
+            z,
+            calibration_bins,
+        ),
+        capacities=list(capacities or []),
+    )
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import copy
+import gzip
+import io
+import json
+import lzma
+import mmap
+import queue
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, TypeVar
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+# Parser for JSONL lines (bytes); orjson when installed, else the stdlib.
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Every simulator event, in the order its binary event code is assigned.
+EVENT_TYPES = ("alloc", "free", "touch", "safe_window", "share", "fork")
+
+MAGIC = b"HBMTRACE"
+FORMAT_VERSION = 1
+BINARY_SUFFIX = ".hbmt"
+# magic, version, header length; the JSON header follows, then the aligned columns.
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+_CHUNK = 65536
+
+# Column name -> dtype. Strings are codes into the header's tables (-1 = absent),
+# a missing size is -1 and a missing mu or sigma is NaN.
+COLUMNS = {
+    "t": "<i8",
+    "event": "u1",
+    "id": "<i4",
+    "src": "<i4",
+    "size": "<i8",
+    "write": "u1",
+    "mu": "<f8",
+    "sigma": "<f8",
+    "phase": "<i4",
+}
+
+# What the simulator's event loop consumes, one tuple per event, in this field order.
+Record = tuple
+RECORD_FIELDS = ("t", "event", "id", "size", "src", "write", "mu", "sigma", "phase")
+
+
+def event_records(trace_events: Iterable[dict[str, Any]]) -> Iterator[Record]:
+    """Decode JSON trace events into records; absent optional fields become None."""
+    for ev in trace_events:
+        get = ev.get
+        yield (
+            get("t"),
+            ev["event"],
+            get("id"),
+            get("size"),
+            get("src"),
+            get("write", False),
+            get("mu"),
+            get("sigma"),
+            get("phase"),
+        )
+
+
+COMPRESSED_SUFFIXES = (".gz", ".xz", ".zst")
+
+
+def open_trace_file(path: str | Path) -> BinaryIO:
+    """Open a trace for reading bytes, decompressing ``.gz``, ``.xz`` and ``.zst`` on the fly."""
+    suffix = Path(path).suffix
+    if suffix == ".gz":
+        return gzip.open(path, "rb")
+    if suffix == ".xz":
+        return lzma.open(path, "rb")
+    if suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                f"reading {path} needs the zstandard package (pip install zstandard)"
+            ) from None
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")))
+    return open(path, "rb")
+
+
+def read_jsonl(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Parse a (possibly compressed) JSONL trace one line at a time."""
+    loads = _loads
+    with open_trace_file(path) as handle:
+        for line in handle:
+            if line.strip():
+                yield loads(line)
+
+
+def parse_json_lines(lines: list[bytes]) -> list[Any]:
+    """Parse a batch of JSONL lines with a single parser call; raises ValueError on any bad line."""
+    return _loads(b"[" + b",".join(lines) + b"]")
+
+
+def scan_jsonl(path: str | Path, offset: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Parse an uncompressed JSONL trace from byte ``offset``, yielding ``(offset, event)``."""
+    if Path(path).suffix in COMPRESSED_SUFFIXES:
+        raise ValueError(
+            f"{path}: cannot seek in a compressed trace; decompress it or convert it with "
+            "hbm-trace convert"
+        )
+    loads = _loads
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        for line in handle:
+            if line.strip():
+                yield offset, loads(line)
+            offset += len(line)
+
+
+Item = TypeVar("Item")
+
+
+def read_ahead(items: Iterable[Item], depth: int = 16, batch: int = 1024) -> Iterator[Item]:
+    """Iterate ``items`` on a background thread, at most ``depth`` batches ahead.
+
+    Decompression and parsing then overlap with whatever consumes the
+    iterator, while memory stays bounded by ``depth * batch`` items. An
+    exception raised while reading is re-raised in the consumer, and closing
+    the iterator early stops the thread.
+    """
+    if depth < 1:
+        raise ValueError(f"depth must be >= 1, got {depth}")
+    batches: queue.Queue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        outcome: object = None
+        try:
+            chunk = []
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= batch:
+                    if not put(chunk):
+                        return
+                    chunk = []
+            if chunk and not put(chunk):
+                return
+            outcome = done
+        except Exception as error:
+            outcome = error
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+            # SystemExit or KeyboardInterrupt ends the thread; the consumer must not wait on it.
+            put(RuntimeError("trace reader thread exited early") if outcome is None else outcome)
+
+    reader = threading.Thread(target=produce, name="trace-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            chunk = batches.get()
+            if chunk is done:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield from chunk
+    finally:
+        stopped.set()
+        reader.join()
+
+
+def is_binary_trace(path: str | Path) -> bool:
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _Interner:
+    def __init__(self):
+        self.codes: dict[str, int] = {}
+
+    def __call__(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    def table(self) -> list[str]:
+        return list(self.codes)
+
+
+def write_binary_trace(trace_events: Iterable[dict[str, Any]], path: str | Path) -> int:
+    """Write JSON trace events to ``path`` in the binary columnar format; returns the count.
+
+    Fields outside ``traces/schema.json`` are dropped, and ``"write": false`` is
+    stored the same as an absent ``write``.
+    """
+    event_codes = {name: code for code, name in enumerate(EVENT_TYPES)}
+    ids = _Interner()
+    phases = _Interner()
+    columns = {
+        "t": array("q"),
+        "event": array("B"),
+        "id": array("i"),
+        "src": array("i"),
+        "size": array("q"),
+        "write": array("B"),
+        "mu": array("d"),
+        "sigma": array("d"),
+        "phase": array("i"),
+    }
+    nan = float("nan")
+    for position, ev in enumerate(trace_events):
+        event = ev.get("event")
+        if event not in event_codes:
+            raise ValueError(f"event {position}: unsupported event type {event!r}")
+        if "t" not in ev:
+            raise ValueError(f"event {position}: missing 't'")
+        size = ev.get("size")
+        if size is not None and int(size) < 0:
+            # -1 marks a missing size, so a negative one cannot be stored.
+            raise ValueError(f"event {position}: negative size {size}")
+        mu = ev.get("mu")
+        sigma = ev.get("sigma")
+        columns["t"].append(int(ev["t"]))
+        columns["event"].append(event_codes[event])
+        columns["id"].append(ids(ev.get("id")))
+        columns["src"].append(ids(ev.get("src")))
+        columns["size"].append(-1 if size is None else int(size))
+        columns["write"].append(1 if ev.get("write") else 0)
+        columns["mu"].append(nan if mu is None else float(mu))
+        columns["sigma"].append(nan if sigma is None else float(sigma))
+        columns["phase"].append(phases(ev.get("phase")))
+    count = len(columns["t"])
+
+    layout = {}
+    offset = 0
+    for name, dtype in COLUMNS.items():
+        layout[name] = {"dtype": dtype, "offset": offset}
+        offset += -(-count * np.dtype(dtype).itemsize // _ALIGN) * _ALIGN
+    header = json.dumps(
+        {
+            "events": count,
+            "event_types": list(EVENT_TYPES),
+            "ids": ids.table(),
+            "phases": phases.table(),
+            "columns": layout,
+        }
+    ).encode("utf-8")
+    with open(path, "wb") as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        handle.write(header)
+        handle.write(b"\0" * (-handle.tell() % _ALIGN))
+        data_start = handle.tell()
+        for name, dtype in COLUMNS.items():
+            handle.seek(data_start + layout[name]["offset"])
+            handle.write(np.asarray(columns[name], dtype=dtype).tobytes())
+        handle.truncate(data_start + offset)
+    return count
+
+
+class BinaryTrace:
+    """A binary columnar trace, memory-mapped read-only.
+
+    ``records()`` feeds the simulator straight from the columns, decoding a
+    chunk at a time into record tuples, so no per-event dict is built.
+    ``simulate()`` and friends accept a ``BinaryTrace`` wherever they take
+    trace events; iterating it directly yields JSON-style event dicts for
+    tools that want them. ``view()`` narrows it to a range of events without
+    copying. Pickling stores only the path and that range.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            magic, version, header_len = _PREAMBLE.unpack(handle.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a binary trace")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{self.path}: unsupported binary trace version {version}")
+            header = json.loads(handle.read(header_len))
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        data_start = _PREAMBLE.size + header_len
+        data_start += -data_start % _ALIGN
+        self.events = header["events"]
+        self.event_types = header["event_types"]
+        self.first = 0
+        self.columns = {
+            name: np.frombuffer(
+                self._map,
+                dtype=spec["dtype"],
+                count=self.events,
+                offset=data_start + spec["offset"],
+            )
+            for name, spec in header["columns"].items()
+        }
+        # Tables end with None so that code -1 (absent) decodes to None.
+        self.ids = header["ids"]
+        self.phases = header["phases"]
+        self._event_names = np.array(header["event_types"], dtype=object)
+        self._id_names = np.array(self.ids + [None], dtype=object)
+        self._phase_names = np.array(self.phases + [None], dtype=object)
+
+    def __len__(self) -> int:
+        return self.events
+
+    def __getstate__(self):
+        return {"path": self.path, "first": self.first, "events": self.events}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+        first, events = state["first"], state["events"]
+        if (first, events) != (0, self.events):
+            self.__dict__.update(self.view(first, first + events).__dict__)
+
+    def view(self, start: int, stop: int) -> BinaryTrace:
+        """Events ``start`` up to (not including) ``stop``, sharing this trace's mapping."""
+        window = copy.copy(self)
+        window.events = max(0, min(stop, self.events) - start)
+        window.first = self.first + start
+        window.columns = {
+            name: column[start : start + window.events] for name, column in self.columns.items()
+        }
+        return window
+
+    def records(self, start: int = 0, stop: int | None = None) -> Iterator[Record]:
+        stop = self.events if stop is None else min(stop, self.events)
+        cols = self.columns
+        for begin in range(start, stop, _CHUNK):
+            end = min(begin + _CHUNK, stop)
+            size = cols["size"][begin:end].astype(object)
+            size[size < 0] = None
+            mu = cols["mu"][begin:end]
+            sigma = cols["sigma"][begin:end]
+            mu_values = mu.astype(object)
+            mu_values[np.isnan(mu)] = None
+            sigma_values = sigma.astype(object)
+            sigma_values[np.isnan(sigma)] = None
+            yield from zip(
+                cols["t"][begin:end].tolist(),
+                self._event_names[cols["event"][begin:end]].tolist(),
+                self._id_names[cols["id"][begin:end]].tolist(),
+                size.tolist(),
+                self._id_names[cols["src"][begin:end]].tolist(),
+                cols["write"][begin:end].astype(bool).tolist(),
+                mu_values.tolist(),
+                sigma_values.tolist(),
+                self._phase_names[cols["phase"][begin:end]].tolist(),
+            )
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for record in self.records():
+            yield {
+                name: value
+                for name, value in zip(RECORD_FIELDS, record)
+                if value is not None and not (name == "write" and not value)
+            }
+
+
+def trace_records(trace_events: Iterable[dict[str, Any]] | BinaryTrace) -> Iterator[Record]:
+    if isinstance(trace_events, BinaryTrace):
+        return trace_events.records()
+    return event_records(trace_events)
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import os
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+from trace_format import BinaryTrace, Record, event_records, is_binary_trace, scan_jsonl
+
+INDEX_SUFFIX = ".idx.npz"
+INDEX_VERSION = 2
+DEFAULT_STRIDE = 65536
+
+
+def index_path(trace_path: str | Path) -> Path:
+    return Path(f"{trace_path}{INDEX_SUFFIX}")
+
+
+class _Catalog:
+    """Object sizes as the simulator's catalog tracks them, without any HBM state.
+
+    Every alloc raises the simulator's ``upcoming_need``. A forecast-driven
+    policy hands it to ``request_compaction()`` and clears it on every touch
+    (the scheduler never skips that step); a recency policy never reaches it,
+    so it only grows. ``need`` and ``alloc_need`` follow those two cases.
+    """
+
+    def __init__(self, sizes: Optional[dict[str, int]] = None, need: int = 0, alloc_need: int = 0):
+        self.sizes = dict(sizes or {})
+        self.need = need
+        self.alloc_need = alloc_need
+
+    def apply(self, event: str, obj: Optional[str], size: Any, src: Optional[str]):
+        if event == "alloc":
+            size = int(size)
+            self.sizes[obj] = size
+            self.need = max(self.need, size)
+            self.alloc_need = max(self.alloc_need, size)
+        elif event == "free":
+            self.sizes.pop(obj, None)
+        elif event in ("share", "fork"):
+            self.sizes[obj] = self.sizes.get(src, 20)
+        elif event == "touch":
+            self.need = 0
+
+
+def _scan(
+    path: Path, binary: Optional[BinaryTrace], ordinal: int = 0, offset: int = 0
+) -> Iterator[tuple[int, int, Record]]:
+    """Yield ``(ordinal, offset, record)`` from event ``ordinal`` (at byte ``offset`` in JSONL)."""
+    if binary is not None:
+        for position, record in enumerate(binary.records(ordinal), ordinal):
+            yield position, position, record
+        return
+    current = [offset]
+
+    def events():
+        for line_offset, event in scan_jsonl(path, offset):
+            current[0] = line_offset
+            yield event
+
+    # event_records pulls one event per record, so ``current`` holds that event's offset.
+    for position, record in enumerate(event_records(events()), ordinal):
+        yield position, current[0], record
+
+
+@dataclass
+class TraceWindow:
+    """The events of a trace with ``t`` in a range, plus the catalog built from the prefix."""
+
+    events: Iterable[dict[str, Any]] | BinaryTrace
+    start: int  # ordinal of the first event in the window
+    event_t: int  # ``t`` of the event just before it (0 at the start of the trace)
+    catalog: dict[str, int]
+    need: int
+    alloc_need: int
+
+    def upcoming_need(self, forecast_driven: bool) -> int:
+        """The simulator's ``upcoming_need`` after the prefix, for the policy's touch path."""
+        return self.need if forecast_driven else self.alloc_need
+
+
+@dataclass
+class TraceIndex:
+    """Sidecar index of a trace sorted by ``t``.
+
+    Every ``stride``-th event gets an entry with its ordinal, ``t``, byte offset
+    (row number for binary traces) and the object catalog just before it: the
+    sizes of live objects as alloc/free/share bookkeeping leaves them. Opening a
+    window then costs a binary search, a seek and replaying at most ``stride``
+    events of bookkeeping, however long the trace is.
+    """
+
+    trace: Path
+    stride: int
+    events: int
+    ordinal: np.ndarray
+    t: np.ndarray
+    offset: np.ndarray
+    event_t: np.ndarray
+    need: np.ndarray
+    alloc_need: np.ndarray
+    catalog_start: np.ndarray
+    catalog_ids: np.ndarray
+    catalog_sizes: np.ndarray
+    ids: np.ndarray
+
+    @classmethod
+    def build(cls, trace_path: str | Path, stride: int = DEFAULT_STRIDE) -> TraceIndex:
+        if stride < 1:
+            raise ValueError(f"stride must be >= 1, got {stride}")
+        path = Path(trace_path)
+        binary = BinaryTrace(path) if is_binary_trace(path) else None
+        entries = {
+            name: array("q") for name in ("ordinal", "t", "offset", "event_t", "need", "alloc_need")
+        }
+        catalog_start = array("q", [0])
+        catalog_ids = array("q")
+        catalog_sizes = array("q")
+        codes: dict[str, int] = {}
+        catalog = _Catalog()
+        event_t = 0
+        events = 0
+        for ordinal, offset, record in _scan(path, binary):
+            t = record[0]
+            if t is None:
+                raise ValueError(f"event {ordinal}: missing 't'")
+            t = int(t)
+            if ordinal and t < event_t:
+                raise ValueError(
+                    f"event {ordinal}: t={t} comes after t={event_t}; "
+                    "time-range replay needs a trace sorted by t"
+                )
+            if ordinal % stride == 0:
+                values = (ordinal, t, offset, event_t, catalog.need, catalog.alloc_need)
+                for name, value in zip(entries, values):
+                    entries[name].append(value)
+                for obj, size in catalog.sizes.items():
+                    catalog_ids.append(codes.setdefault(obj, len(codes)))
+                    catalog_sizes.append(size)
+                catalog_start.append(len(catalog_ids))
+            catalog.apply(record[1], record[2], record[3], record[4])
+            event_t = t
+            events = ordinal + 1
+        return cls(
+            trace=path,
+            stride=stride,
+            events=events,
+            **{name: np.asarray(values, dtype=np.int64) for name, values in entries.items()},
+            catalog_start=np.asarray(catalog_start, dtype=np.int64),
+            catalog_ids=np.asarray(catalog_ids, dtype=np.int64),
+            catalog_sizes=np.asarray(catalog_sizes, dtype=np.int64),
+            ids=np.asarray(list(codes), dtype=str),
+        )
+
+    @staticmethod
+    def _source(trace_path: Path) -> np.ndarray:
+        stat = os.stat(trace_path)
+        return np.asarray([INDEX_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def save(self, path: str | Path | None = None) -> Path:
+        path = Path(path) if path is not None else index_path(self.trace)
+        partial = path.with_suffix(".tmp")
+        arrays = {
+            name: getattr(self, name)
+            for name in (
+                "ordinal",
+                "t",
+                "offset",
+                "event_t",
+                "need",
+                "alloc_need",
+                "catalog_start",
+                "catalog_ids",
+                "catalog_sizes",
+                "ids",
+            )
+        }
+        with open(partial, "wb") as handle:
+            np.savez(
+                handle,
+                source=self._source(self.trace),
+                shape=np.asarray([self.stride, self.events], dtype=np.int64),
+                **arrays,
+            )
+        os.replace(partial, path)
+        return path
+
+    @classmethod
+    def load(cls, trace_path: str | Path) -> Optional[TraceIndex]:
+        """The trace's saved index, or None if it is missing or older than the trace."""
+        trace = Path(trace_path)
+        try:
+            data = np.load(index_path(trace), allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        with data:
+            if not np.array_equal(data["source"], cls._source(trace)):
+                return None
+            stride, events = data["shape"].tolist()
+            fields = {name: data[name] for name in data.files if name not in ("source", "shape")}
+        return cls(trace=trace, stride=stride, events=events, **fields)
+
+    @classmethod
+    def open(cls, trace_path: str | Path, stride: int = DEFAULT_STRIDE) -> TraceIndex:
+        """Load the sidecar index, building and saving it first if it is missing or stale."""
+        index = cls.load(trace_path)
+        if index is None:
+            index = cls.build(trace_path, stride)
+            try:
+                index.save()
+            except OSError:
+                pass  # A read-only trace directory only costs a rebuild next time.
+        return index
+
+    def _catalog(self, entry: int) -> _Catalog:
+        begin, end = self.catalog_start[entry], self.catalog_start[entry + 1]
+        names = self.ids[self.catalog_ids[begin:end]].tolist()
+        sizes = self.catalog_sizes[begin:end].tolist()
+        return _Catalog(dict(zip(names, sizes)), int(self.need[entry]), int(self.alloc_need[entry]))
+
+    def window(self, start_t: Optional[int] = None, end_t: Optional[int] = None) -> TraceWindow:
+        """Events with ``start_t <= t <= end_t`` (either bound may be None)."""
+        binary = BinaryTrace(self.trace) if is_binary_trace(self.trace) else None
+        if start_t is None or not len(self.t):
+            start, event_t, catalog, offset = 0, 0, _Catalog(), 0
+        else:
+            # The last entry before start_t; the events between it and start_t only
+            # update the catalog.
+            entry = max(int(np.searchsorted(self.t, start_t, side="left")) - 1, 0)
+            catalog = self._catalog(entry)
+            event_t = int(self.event_t[entry])
+            start = offset = self.events
+            for ordinal, line_offset, record in _scan(
+                self.trace, binary, int(self.ordinal[entry]), int(self.offset[entry])
+            ):
+                if int(record[0]) >= start_t:
+                    start, offset = ordinal, line_offset
+                    break
+                catalog.apply(record[1], record[2], record[3], record[4])
+                event_t = int(record[0])
+        if binary is not None:
+            stop = self.events
+            if end_t is not None:
+                stop = max(int(np.searchsorted(binary.columns["t"], end_t, side="right")), start)
+            events = binary.view(start, stop)
+        else:
+            events = self._jsonl_events(offset, end_t) if start < self.events else iter(())
+        return TraceWindow(events, start, event_t, catalog.sizes, catalog.need, catalog.alloc_need)
+
+    def _jsonl_events(self, offset: int, end_t: Optional[int]) -> Iterator[dict[str, Any]]:
+        for _, event in scan_jsonl(self.trace, offset):
+            if end_t is not None and event["t"] > end_t:
+                return
+            yield event
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from run_sim import iter_trace, open_trace
+from trace_analyze import analyze_trace
+from trace_format import BINARY_SUFFIX, write_binary_trace
+from trace_index import DEFAULT_STRIDE, TraceIndex
+from trace_validate import DEFAULT_CHUNK, SCHEMA_PATH, Schema, validate_trace
+
+
+def _convert(args: argparse.Namespace):
+    source = Path(args.input)
+    output = Path(args.output) if args.output else source.with_suffix(BINARY_SUFFIX)
+    started = time.perf_counter()
+    try:
+        count = write_binary_trace(iter_trace(source), output)
+    except ValueError as error:
+        raise SystemExit(f"{source}: {error}")
+    elapsed = time.perf_counter() - started
+    size = output.stat().st_size
+    ratio = size / max(source.stat().st_size, 1)
+    print(
+        f"Wrote {count} events to {output} ({size} bytes, {ratio:.0%} of the JSONL) "
+        f"in {elapsed:.2f}s"
+    )
+
+
+def _index(args: argparse.Namespace):
+    started = time.perf_counter()
+    try:
+        index = TraceIndex.build(args.trace, args.stride)
+    except ValueError as error:
+        raise SystemExit(f"{args.trace}: {error}")
+    path = index.save()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Indexed {index.events} events ({len(index.ordinal)} entries, every {index.stride}) "
+        f"-> {path} in {elapsed:.2f}s"
+    )
+
+
+def _validate(args: argparse.Namespace):
+    started = time.perf_counter()
+    report = validate_trace(args.trace, Schema.load(args.schema), args.max_issues, args.chunk)
+    elapsed = time.perf_counter() - started
+    for issue in sorted(report.issues, key=lambda issue: issue.location):
+        print(f"{report.unit} {issue.location}: [{issue.check}] {issue.message}")
+    for title, counts in (("errors", report.errors), ("warnings", report.warnings)):
+        if counts:
+            print(f"{title}:")
+            for check, count in sorted(counts.items()):
+                print(f"  {check:<16} {count}")
+    rate = report.events / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{report.path}: {report.events} events, {sum(report.errors.values())} errors, "
+        f"{sum(report.warnings.values())} warnings ({elapsed:.2f}s, {rate:,.0f} events/s)"
+    )
+    if not report.ok:
+        raise SystemExit(1)
+
+
+def _analyze(args: argparse.Namespace):
+    started = time.perf_counter()
+    analysis = analyze_trace(
+        open_trace(args.trace),
+        windows=args.window,
+        horizon=args.horizon,
+        capacities=args.capacity,
+        z=args.z,
+    )
+    report = analysis.to_json()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.trace}: {analysis.events} events, {analysis.touches} touches of "
+        f"{analysis.objects} objects, peak stack {analysis.peak_stack_bytes} bytes ({elapsed:.2f}s)"
+    )
+    curve = report["lru_mrc"]
+    step = max(len(curve["capacity"]) // 8, 1)
+    print("LRU capacity -> miss ratio (byte miss ratio):")
+    for capacity, ratio, byte_ratio in list(
+        zip(curve["capacity"], curve["miss_ratio"], curve["byte_miss_ratio"])
+    )[::step]:
+        print(f"  {capacity:>12}  {ratio:.3f} ({byte_ratio:.3f})")
+    for working_set in report["working_set"]:
+        print(
+            f"Working set over {working_set['window']} t: mean {working_set['mean']:.0f}, "
+            f"peak {working_set['peak']} bytes"
+        )
+    calibration = report["calibration"]
+    if calibration["touches"]:
+        print(
+            f"Forecasts: {calibration['touches']} touches, re-touch rate "
+            f"{calibration['base_rate']:.3f}, Brier {calibration['brier']:.3f}, "
+            f"ECE {calibration['ece']:.3f}"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Trace file utilities.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser(
+        "convert", help="Convert a JSONL trace to the memory-mappable binary format."
+    )
+    convert.add_argument("input", help="JSONL trace to read.")
+    convert.add_argument(
+        "-o", "--output", help=f"Binary trace to write (default: input with {BINARY_SUFFIX})."
+    )
+    convert.set_defaults(handler=_convert)
+    index = commands.add_parser(
+        "index", help="Build the sidecar index used by run_sim.py --start-t/--end-t."
+    )
+    index.add_argument("trace", help="Uncompressed JSONL or binary trace, sorted by t.")
+    index.add_argument(
+        "--stride",
+        type=int,
+        default=DEFAULT_STRIDE,
+        help="Events between index entries; opening a window replays at most this many.",
+    )
+    index.set_defaults(handler=_index)
+    validate = commands.add_parser(
+        "validate", help="Check a trace against traces/schema.json and event lifetimes."
+    )
+    validate.add_argument("trace", help="JSONL (possibly compressed) or binary trace.")
+    validate.add_argument("--schema", default=SCHEMA_PATH, help="JSON schema to check against.")
+    validate.add_argument(
+        "--max-issues",
+        type=int,
+        default=10,
+        help="Offending lines to list per check; every issue is still counted.",
+    )
+    validate.add_argument(
+        "--chunk", type=int, default=DEFAULT_CHUNK, help="Events checked per vectorized pass."
+    )
+    validate.set_defaults(handler=_validate)
+    analyze = commands.add_parser(
+        "analyze",
+        help="Reuse distances, LRU miss-ratio curve, working sets and forecast calibration.",
+    )
+    analyze.add_argument("trace", help="JSONL (possibly compressed) or binary trace.")
+    analyze.add_argument("-o", "--output", help="Write the full analysis as JSON.")
+    analyze.add_argument(
+        "--window",
+        type=int,
+        action="append",
+        help="Working-set window in t units; repeatable (default: 1/64, 1/16, 1/4 of the span).",
+    )
+    analyze.add_argument(
+        "--capacity",
+        type=int,
+        action="append",
+        help="Capacity to report on the miss-ratio curve; repeatable (default: every step).",
+    )
+    analyze.add_argument(
+        "--horizon",
+        type=int,
+        help="A forecast counts as right if the object is touched again within this many t "
+        "(default: any time before it is freed).",
+    )
+    analyze.add_argument(
+        "--z", type=float, default=1.0, help="Confidence multiplier for forecast bounds."
+    )
+    analyze.set_defaults(handler=_analyze)
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
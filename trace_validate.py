@@ -0,0 +1,467 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from itertools import islice, repeat
+from operator import is_
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from trace_format import (
+    EVENT_TYPES,
+    BinaryTrace,
+    is_binary_trace,
+    open_trace_file,
+    parse_json_lines,
+)
+
+SCHEMA_PATH = Path(__file__).resolve().parent / "traces" / "schema.json"
+DEFAULT_CHUNK = 65536
+
+# Checks whose findings the simulator tolerates; they are reported but do not fail a trace.
+WARNINGS = frozenset({"freed_reference"})
+
+# JSON value type codes. A field missing from an event reads as _ABSENT.
+_ABSENT = object()
+_INVALID = object()
+_MISSING, _INT, _FLOAT, _STR, _BOOL, _OTHER = range(6)
+_TYPE_CODES = {object: _MISSING, int: _INT, float: _FLOAT, str: _STR, bool: _BOOL}
+_SCHEMA_TYPES = {
+    "integer": frozenset({_INT}),
+    "number": frozenset({_INT, _FLOAT}),
+    "string": frozenset({_STR}),
+    "boolean": frozenset({_BOOL}),
+}
+_JSON_NAMES = {int: "integer", float: "number", str: "string", bool: "boolean", type(None): "null"}
+_JSON_NAMES.update({list: "array", dict: "object"})
+
+# Lifetime operations: what an event does to an object id, and what it asks of it.
+_LIVE, _FREED = 1, 2
+_TOUCH, _FREE, _SOURCE = 1, 2, 3
+_ALLOC, _FREE_EVENT, _TOUCH_EVENT, _, _SHARE, _FORK = range(len(EVENT_TYPES))
+
+
+@dataclass(frozen=True)
+class Schema:
+    """The parts of ``traces/schema.json`` the validator enforces.
+
+    Besides top-level ``required``, property ``type`` / ``enum`` / ``minimum`` /
+    ``maximum``, it reads the ``allOf`` rules of the form ``if event is X then
+    required [...]``.
+    """
+
+    types: dict[str, tuple[str, frozenset[int]]]
+    required: tuple[str, ...]
+    enums: dict[str, tuple[Any, ...]]
+    ranges: dict[str, tuple[Optional[float], Optional[float]]]
+    event_required: dict[str, tuple[str, ...]]
+
+    @classmethod
+    def load(cls, path: str | Path = SCHEMA_PATH) -> Schema:
+        spec = json.loads(Path(path).read_text())
+        types = {}
+        enums = {}
+        ranges = {}
+        for name, prop in spec.get("properties", {}).items():
+            if prop.get("type") in _SCHEMA_TYPES:
+                types[name] = (prop["type"], _SCHEMA_TYPES[prop["type"]])
+            if "enum" in prop:
+                enums[name] = tuple(prop["enum"])
+            if "minimum" in prop or "maximum" in prop:
+                ranges[name] = (prop.get("minimum"), prop.get("maximum"))
+        event_required: dict[str, tuple[str, ...]] = {}
+        for rule in spec.get("allOf", []):
+            event = rule.get("if", {}).get("properties", {}).get("event", {}).get("const")
+            if event is not None:
+                required = tuple(rule.get("then", {}).get("required", ()))
+                event_required[event] = event_required.get(event, ()) + required
+        return cls(types, tuple(spec.get("required", ())), enums, ranges, event_required)
+
+
+@dataclass
+class Issue:
+    check: str
+    location: int
+    message: str
+
+
+@dataclass
+class ValidationReport:
+    """Counts of every failed check, plus the first ``limit`` offending events of each.
+
+    ``unit`` says what ``Issue.location`` counts: 1-based lines of a JSONL
+    trace, or 0-based events of a binary one.
+    """
+
+    path: Path
+    unit: str
+    limit: int
+    events: int = 0
+    counts: dict[str, int] = field(default_factory=dict)
+    issues: list[Issue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> dict[str, int]:
+        return {check: n for check, n in self.counts.items() if check not in WARNINGS}
+
+    @property
+    def warnings(self) -> dict[str, int]:
+        return {check: n for check, n in self.counts.items() if check in WARNINGS}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def record(
+        self,
+        check: str,
+        mask: np.ndarray,
+        locations: np.ndarray,
+        describe: Callable[[int], str],
+    ):
+        """Count the events where ``mask`` is set and keep messages for the first few."""
+        hits = np.flatnonzero(mask)
+        if not len(hits):
+            return
+        seen = self.counts.get(check, 0)
+        self.counts[check] = seen + len(hits)
+        for i in hits[: max(self.limit - seen, 0)].tolist():
+            self.issues.append(Issue(check, int(locations[i]), describe(i)))
+
+
+class _Validator:
+    def __init__(self, schema: Schema, report: ValidationReport):
+        self.schema = schema
+        self.report = report
+        self.event_codes = {name: code for code, name in enumerate(EVENT_TYPES)}
+        # Python types each field may parse to; ``object`` is the type of _ABSENT.
+        self.python_types = {
+            name: {kind for kind, code in _TYPE_CODES.items() if code in allowed} | {object}
+            for name, (_, allowed) in schema.types.items()
+        }
+        self.id_codes: dict[Any, int] = {}
+        self.id_names: list[Any] = []
+        self.status = np.zeros(0, dtype=np.int8)  # per id: 0 never allocated, _LIVE, _FREED
+        self.last_t: Optional[int] = None
+
+    def jsonl_chunk(self, lines: list[bytes], locations: np.ndarray):
+        report = self.report
+        schema = self.schema
+        events = _parse(lines)
+        objects = np.fromiter(map(dict.__instancecheck__, events), bool, len(events))
+        report.record(
+            "json",
+            ~objects,
+            locations,
+            lambda i: "not valid JSON" if events[i] is _INVALID else "not a JSON object",
+        )
+        if not objects.all():
+            events = [ev for ev, ok in zip(events, objects.tolist()) if ok]
+            locations = locations[objects]
+        n = len(events)
+        valid = np.ones(n, dtype=bool)
+        present = {}
+        columns = {}
+        for name, (type_name, allowed) in schema.types.items():
+            values = list(map(dict.get, events, repeat(name), repeat(_ABSENT)))
+            types = set(map(type, values))
+            if types <= self.python_types[name]:
+                # Every value is well typed: only presence needs a per-event pass.
+                wrong = np.zeros(n, dtype=bool)
+                if object in types:
+                    missing = np.fromiter(map(is_, values, repeat(_ABSENT)), bool, n)
+                else:
+                    missing = wrong.copy()
+            else:
+                codes = np.fromiter(
+                    map(_TYPE_CODES.get, map(type, values), repeat(_OTHER)), np.int8, n
+                )
+                missing = codes == _MISSING
+                wrong = ~missing & ~np.isin(codes, list(allowed))
+
+            def describe(i, values=values, name=name, type_name=type_name):
+                actual = _JSON_NAMES.get(type(values[i]), type(values[i]).__name__)
+                return f"'{name}' must be {type_name}, got {actual}"
+
+            report.record("type", wrong, locations, describe)
+            if wrong.any():
+                valid &= ~wrong
+                values = [_ABSENT if bad else v for v, bad in zip(values, wrong.tolist())]
+                missing |= wrong
+            present[name] = ~missing
+            columns[name] = values
+        for name in schema.required:
+            absent = ~present[name] & valid
+            report.record("required", absent, locations, lambda i, f=name: f"missing '{f}'")
+            valid &= ~absent
+        for name, allowed in schema.enums.items():
+            values = columns[name]
+            known = np.fromiter(map(frozenset(allowed).__contains__, values), bool, n)
+            unknown = present[name] & ~known
+            report.record(
+                "enum", unknown, locations, lambda i, v=values, f=name: f"unknown {f} {v[i]!r}"
+            )
+            valid &= ~unknown
+        self._check(
+            locations,
+            valid,
+            present,
+            np.fromiter(map(self.event_codes.get, columns["event"], repeat(-1)), np.int8, n),
+            _numbers(columns["t"], present["t"], np.int64),
+            self._intern(columns["id"]),
+            self._intern(columns["src"]),
+            {name: _numbers(columns[name], present[name]) for name in schema.ranges},
+        )
+
+    def binary(self, trace: BinaryTrace, chunk: int):
+        event_map = np.array(
+            [EVENT_TYPES.index(name) if name in EVENT_TYPES else -1 for name in trace.event_types],
+            dtype=np.int8,
+        )
+        # Binary ids are already interned; remap them onto the validator's codes once.
+        id_map = self._intern(trace.ids + [_ABSENT])
+        names = trace.event_types
+        for start in range(0, len(trace), chunk):
+            stop = min(start + chunk, len(trace))
+            cols = {name: column[start:stop] for name, column in trace.columns.items()}
+            locations = np.arange(start, stop, dtype=np.int64)
+            codes = cols["event"]
+            event = event_map[codes]
+            unknown = event < 0
+            self.report.record(
+                "enum", unknown, locations, lambda i, c=codes: f"unknown event code {c[i]} {names}"
+            )
+            # -1 is the missing-size marker; anything below it is a negative size.
+            size = cols["size"].astype(np.float64)
+            size[cols["size"] == -1] = np.nan
+            numbers = {"size": size, "mu": cols["mu"], "sigma": cols["sigma"]}
+            present = {
+                "t": np.ones(stop - start, dtype=bool),
+                "event": ~unknown,
+                "id": cols["id"] >= 0,
+                "src": cols["src"] >= 0,
+                "size": cols["size"] != -1,
+                "write": cols["write"] != 0,
+                "mu": ~np.isnan(cols["mu"]),
+                "sigma": ~np.isnan(cols["sigma"]),
+                "phase": cols["phase"] >= 0,
+            }
+            self._check(
+                locations,
+                ~unknown,
+                present,
+                event,
+                cols["t"],
+                id_map[cols["id"]],
+                id_map[cols["src"]],
+                {name: numbers[name] for name in self.schema.ranges if name in numbers},
+            )
+
+    def _intern(self, values: list[Any]) -> np.ndarray:
+        codes = self.id_codes
+        names = self.id_names
+        for value in dict.fromkeys(values):
+            if value not in codes and value is not _ABSENT:
+                codes[value] = len(names)
+                names.append(value)
+        return np.fromiter(map(codes.get, values, repeat(-1)), np.int64, len(values))
+
+    def _check(
+        self,
+        locations: np.ndarray,
+        valid: np.ndarray,
+        present: dict[str, np.ndarray],
+        event: np.ndarray,
+        t: np.ndarray,
+        ids: np.ndarray,
+        srcs: np.ndarray,
+        numbers: dict[str, np.ndarray],
+    ):
+        report = self.report
+        for kind, fields in self.schema.event_required.items():
+            is_kind = valid & (event == self.event_codes.get(kind, -2))
+            for name in fields:
+                absent = is_kind & ~present[name]
+                report.record(
+                    "required", absent, locations, lambda i, k=kind, f=name: f"{k} missing '{f}'"
+                )
+                valid &= ~absent
+        for name, (low, high) in self.schema.ranges.items():
+            values = numbers.get(name)
+            if values is None:
+                continue
+            with np.errstate(invalid="ignore"):
+                outside = np.zeros(len(values), dtype=bool)
+                if low is not None:
+                    outside |= values < low
+                if high is not None:
+                    outside |= values > high
+            report.record(
+                "range",
+                outside,
+                locations,
+                lambda i, v=values, f=name, lo=low, hi=high: f"'{f}'={v[i]:g} outside [{lo}, {hi}]",
+            )
+
+        # Ordering and lifetimes only look at events that passed the schema checks.
+        keep = np.flatnonzero(valid)
+        locations, event, t = locations[keep], event[keep], t[keep]
+        ids, srcs = ids[keep], srcs[keep]
+        if not len(keep):
+            return
+        previous = np.empty_like(t)
+        previous[0] = t[0] if self.last_t is None else self.last_t
+        previous[1:] = t[:-1]
+        report.record(
+            "order",
+            t < previous,
+            locations,
+            lambda i: f"t decreases from {previous[i]} to {t[i]}",
+        )
+        self.last_t = int(t[-1])
+        self._lifetimes(locations, event, ids, srcs)
+
+    def _lifetimes(
+        self, locations: np.ndarray, event: np.ndarray, ids: np.ndarray, srcs: np.ndarray
+    ):
+        """Vectorized replay of which ids are live.
+
+        Every event becomes at most two operations on an id (a share reads its
+        source before it sets its own id live). Sorting the operations by id,
+        then position, and forward-filling the last state change within each id
+        gives the state every operation sees without a per-event loop.
+        """
+        positions = np.arange(len(event), dtype=np.int64)
+        sets = np.zeros(len(event), dtype=np.int8)
+        sets[(event == _ALLOC) | (event == _SHARE) | (event == _FORK)] = _LIVE
+        sets[event == _FREE_EVENT] = _FREED
+        queries = np.zeros(len(event), dtype=np.int8)
+        queries[event == _TOUCH_EVENT] = _TOUCH
+        queries[event == _FREE_EVENT] = _FREE
+        shares = np.flatnonzero(((event == _SHARE) | (event == _FORK)) & (srcs >= 0))
+        keys = np.concatenate([ids, srcs[shares]])
+        order_key = np.concatenate([2 * positions + 1, 2 * shares])
+        sets = np.concatenate([sets, np.zeros(len(shares), dtype=np.int8)])
+        queries = np.concatenate([queries, np.full(len(shares), _SOURCE, dtype=np.int8)])
+        events = np.concatenate([positions, shares])
+        active = (keys >= 0) & ((sets > 0) | (queries > 0))
+        keys, order_key = keys[active], order_key[active]
+        sets, queries, events = sets[active], queries[active], events[active]
+        if not len(keys):
+            return
+        if len(self.status) < len(self.id_names):
+            grown = np.zeros(max(len(self.id_names), 2 * len(self.status)), dtype=np.int8)
+            grown[: len(self.status)] = self.status
+            self.status = grown
+
+        order = np.lexsort((order_key, keys))
+        keys, sets, queries, events = keys[order], sets[order], queries[order], events[order]
+        index = np.arange(len(keys))
+        first_of_key = np.ones(len(keys), dtype=bool)
+        first_of_key[1:] = keys[1:] != keys[:-1]
+        group_start = np.maximum.accumulate(np.where(first_of_key, index, 0))
+        last_set = np.maximum.accumulate(np.where(sets > 0, index, -1))
+        previous_set = np.concatenate([[-1], last_set[:-1]])
+        state = np.where(previous_set >= group_start, sets[previous_set], self.status[keys])
+
+        setters = np.flatnonzero(sets > 0)
+        last_of_key = np.ones(len(setters), dtype=bool)
+        last_of_key[:-1] = keys[setters[1:]] != keys[setters[:-1]]
+        self.status[keys[setters[last_of_key]]] = sets[setters[last_of_key]]
+
+        # Back to trace order, so the first issues of each check are the ones kept.
+        chrono = np.argsort(order_key[order])
+        keys, queries, events, state = keys[chrono], queries[chrono], events[chrono], state[chrono]
+
+        names = self.id_names
+        where = locations[events]
+        kinds = event[events]
+
+        def describe(action: str) -> Callable[[int], str]:
+            def message(i: int) -> str:
+                obj = names[keys[i]]
+                if queries[i] == _SOURCE:
+                    return f"{EVENT_TYPES[kinds[i]]} from '{obj}'{action}"
+                return f"{EVENT_TYPES[kinds[i]]} of '{obj}'{action}"
+
+            return message
+
+        never = describe(", which was never allocated")
+        report = self.report
+        report.record("unallocated", (queries > 0) & (state == 0), where, never)
+        freed = describe(", which is already freed")
+        report.record("double_free", (queries == _FREE) & (state == _FREED), where, freed)
+        report.record(
+            "freed_reference",
+            ((queries == _TOUCH) | (queries == _SOURCE)) & (state == _FREED),
+            where,
+            describe(" after it was freed"),
+        )
+
+
+def _parse(lines: list[bytes]) -> list[Any]:
+    """Parse a chunk of lines in one call, falling back to line by line if any is malformed."""
+    try:
+        events = parse_json_lines(lines)
+        if len(events) == len(lines) and set(map(type, events)) <= {dict}:
+            return events
+    except ValueError:
+        pass
+    events = []
+    for line in lines:
+        try:
+            (event,) = parse_json_lines([line])
+        except ValueError:
+            event = _INVALID
+        events.append(event)
+    return events
+
+
+def _numbers(values: list[Any], present: np.ndarray, dtype: Any = np.float64) -> np.ndarray:
+    """``values`` as an array, with NaN (or 0 for integers) where they are absent."""
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    column[~present] = np.nan if np.dtype(dtype).kind == "f" else 0
+    return column.astype(dtype)
+
+
+def validate_trace(
+    path: str | Path,
+    schema: Schema | None = None,
+    limit: int = 10,
+    chunk: int = DEFAULT_CHUNK,
+) -> ValidationReport:
+    """Check a JSONL (possibly compressed) or binary trace against ``traces/schema.json``.
+
+    Beyond the schema it checks that ``t`` never decreases, that touched,
+    freed and shared ids were allocated first, and that nothing is freed
+    twice. The trace is read ``chunk`` events at a time and each check runs
+    over a whole chunk at once.
+    """
+    if chunk < 1:
+        raise ValueError(f"chunk must be >= 1, got {chunk}")
+    path = Path(path)
+    schema = schema or Schema.load()
+    binary = is_binary_trace(path)
+    report = ValidationReport(path, "event" if binary else "line", limit)
+    validator = _Validator(schema, report)
+    if binary:
+        trace = BinaryTrace(path)
+        validator.binary(trace, chunk)
+        report.events = len(trace)
+        return report
+    with open_trace_file(path) as handle:
+        first = 1
+        while lines := list(islice(handle, chunk)):
+            kept = list(filter(bytes.strip, lines))
+            if len(kept) == len(lines):
+                locations = np.arange(first, first + len(lines), dtype=np.int64)
+            else:
+                locations = np.flatnonzero(list(map(bytes.strip, lines))) + first
+            first += len(lines)
+            if kept:
+                validator.jsonl_chunk(kept, locations)
+                report.events += len(kept)
+    return report
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Span = Tuple[int, int, str]
+Extent = Tuple[int, int]
+
+
+@dataclass
+class TimelinePoint:
+    t: int
+    event: str
+    obj_id: str | None
+    phase: str | None
+    occupancy: int
+    external_frag: float
+    entropy: float
+    lfe: int
+    holes: int
+    faults: int
+    migrations: int
+    bytes_moved: int
+    compaction: int
+    in_safe_window: bool
+    internal_frag: int = 0
+    # Memory-map changes since the previous point; on a keyframe the ``added``
+    # lists hold the whole map. Rebuild full maps with ``replay`` / ``state_at``.
+    keyframe: bool = False
+    blocks_added: list[tuple[int, int, str]] = field(default_factory=list)
+    blocks_removed: list[tuple[int, int, str]] = field(default_factory=list)
+    extents_added: list[tuple[int, int]] = field(default_factory=list)
+    extents_removed: list[tuple[int, int]] = field(default_factory=list)
+
+
+@dataclass
+class MemoryMap:
+    """Resident blocks and free extents after the event at ``t``, both sorted by address."""
+
+    t: int
+    blocks: List[Span]
+    free_extents: List[Extent]
+
+
+class MapJournal:
+    """Net memory-map changes since the last ``drain``, fed by allocator callbacks.
+
+    Register it with an allocator's ``add_listener``. An addition cancels a
+    pending removal of the same block or extent and vice versa, so a drain
+    holds exactly the difference between the maps at the two drains. While
+    ``paused`` every callback is ignored.
+    """
+
+    def __init__(self):
+        self.paused = False
+        self._blocks: tuple[set[Span], set[Span]] = (set(), set())
+        self._extents: tuple[set[Extent], set[Extent]] = (set(), set())
+
+    @staticmethod
+    def _note(pending: tuple[set, set], item, added: bool):
+        gained, lost = pending if added else pending[::-1]
+        if item in lost:
+            lost.discard(item)
+        else:
+            gained.add(item)
+
+    def block_added(self, start: int, size: int, obj_id: str):
+        if not self.paused:
+            self._note(self._blocks, (start, size, obj_id), True)
+
+    def block_removed(self, start: int, size: int, obj_id: str):
+        if not self.paused:
+            self._note(self._blocks, (start, size, obj_id), False)
+
+    def extent_added(self, start: int, size: int):
+        if not self.paused:
+            self._note(self._extents, (start, size), True)
+
+    def extent_removed(self, start: int, size: int):
+        if not self.paused:
+            self._note(self._extents, (start, size), False)
+
+    def clear(self):
+        for pending in self._blocks + self._extents:
+            pending.clear()
+
+    def drain(self) -> tuple[list[Span], list[Span], list[Extent], list[Extent]]:
+        """Returns and forgets ``(blocks_added, blocks_removed, extents_added, extents_removed)``."""
+        out = tuple(sorted(pending) for pending in self._blocks + self._extents)
+        self.clear()
+        return out
+
+
+class DeltaEncoder:
+    """Turns an allocator's memory-map changes into keyframes and deltas.
+
+    Every ``keyframe_interval``-th snapshot (starting with the first) reads
+    the full block and extent lists off the allocator; the rest drain the
+    ``journal`` registered on it, so a delta costs only what changed. An
+    interval of 1 stores every snapshot in full.
+    """
+
+    def __init__(self, keyframe_interval: int = 64, journal: MapJournal | None = None):
+        if keyframe_interval < 1:
+            raise ValueError(f"keyframe_interval must be >= 1, got {keyframe_interval}")
+        self.keyframe_interval = keyframe_interval
+        self.journal = MapJournal() if journal is None else journal
+        self._count = 0
+
+    def encode(self, allocator) -> tuple[bool, list[Span], list[Span], list[Extent], list[Extent]]:
+        """Returns ``(keyframe, blocks_added, blocks_removed, extents_added, extents_removed)``.
+
+        A keyframe lists the whole map under the ``added`` fields and nothing as removed.
+        """
+        keyframe = self._count % self.keyframe_interval == 0
+        self._count += 1
+        if keyframe:
+            # Deltas after a keyframe count from it, whatever the journal held before.
+            self.journal.clear()
+            self.journal.paused = False
+            return True, allocator.spans(), [], allocator.extents_free(), []
+        return (False, *self.journal.drain())
+
+
+def replay(points: Iterable) -> Iterator[tuple[object, MemoryMap]]:
+    """Yield ``(point, map)`` for each timeline point, applying its delta as it streams by.
+
+    The first point must be a keyframe.
+    """
+    blocks: set[Span] = set()
+    extents: set[Extent] = set()
+    started = False
+    for point in points:
+        if point.keyframe:
+            blocks = set(point.blocks_added)
+            extents = set(point.extents_added)
+            started = True
+        elif not started:
+            raise ValueError("timeline does not start at a keyframe")
+        else:
+            blocks.difference_update(point.blocks_removed)
+            blocks.update(point.blocks_added)
+            extents.difference_update(point.extents_removed)
+            extents.update(point.extents_added)
+        yield point, MemoryMap(point.t, sorted(blocks), sorted(extents))
+
+
+def state_at(points: Sequence, t: int) -> MemoryMap:
+    """Memory map after the last event at or before ``t``.
+
+    Replays forward from the nearest keyframe, so the cost is bounded by the
+    keyframe interval rather than the timeline length.
+    """
+    if isinstance(points, Timeline):
+        index = int(np.searchsorted(points.column("t"), t, side="right")) - 1
+    else:
+        index = bisect_right(points, t, key=lambda point: point.t) - 1
+    if index < 0:
+        raise ValueError(f"no timeline point at or before t={t}")
+    start = index
+    while start > 0 and not points[start].keyframe:
+        start -= 1
+    state = None
+    for _, state in replay(points[start:index + 1]):
+        pass
+    return state
+
+
+INT_COLUMNS = (
+    "t",
+    "occupancy",
+    "lfe",
+    "holes",
+    "faults",
+    "migrations",
+    "bytes_moved",
+    "compaction",
+    "internal_frag",
+)
+FLOAT_COLUMNS = ("external_frag", "entropy")
+STRING_COLUMNS = ("event", "phase", "obj_id")
+SAFE_WINDOW = 1
+KEYFRAME = 2
+
+
+class Timeline:
+    """Columnar timeline: one NumPy array per ``TimelinePoint`` field.
+
+    Numeric fields live in preallocated arrays that double when full; the
+    ``in_safe_window`` and ``keyframe`` booleans share a ``flags`` bit column;
+    ``event``, ``phase`` and ``obj_id`` are stored as int32 codes into a
+    per-column vocabulary (-1 for None). Memory-map deltas stay per-row Python
+    lists, and are not kept at all when ``maps=False``.
+
+    ``column()`` and ``arrays()`` hand out read-only views without copying,
+    slicing returns a ``Timeline`` over views of the same arrays, and
+    indexing or iterating rebuilds ``TimelinePoint`` objects for code that
+    still expects a list of points.
+    """
+
+    def __init__(self, capacity: int = 1024, maps: bool = True):
+        self.maps = maps
+        self._len = 0
+        self._cols: Dict[str, np.ndarray] = {}
+        for name in INT_COLUMNS:
+            self._cols[name] = np.zeros(capacity, dtype=np.int64)
+        for name in FLOAT_COLUMNS:
+            self._cols[name] = np.zeros(capacity, dtype=np.float64)
+        for name in STRING_COLUMNS:
+            self._cols[name] = np.zeros(capacity, dtype=np.int32)
+        self._cols["flags"] = np.zeros(capacity, dtype=np.uint8)
+        self._vocab: Dict[str, List[str]] = {name: [] for name in STRING_COLUMNS}
+        self._codes: Dict[str, Dict[str, int]] = {name: {} for name in STRING_COLUMNS}
+        self._maps: List[tuple] = []
+
+    @classmethod
+    def from_points(cls, points: Iterable[TimelinePoint], maps: bool = True) -> Timeline:
+        timeline = cls(maps=maps)
+        timeline.extend(points)
+        return timeline
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getstate__(self):
+        # Pickle only the filled rows, not the spare capacity.
+        state = self.__dict__.copy()
+        state["_cols"] = {name: column[: self._len] for name, column in self._cols.items()}
+        return state
+
+    def _encode(self, name: str, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self._vocab[name].append(value)
+        return code
+
+    def _grow(self):
+        size = max(16, 2 * len(self._cols["t"]))
+        for name, column in self._cols.items():
+            grown = np.zeros(size, dtype=column.dtype)
+            grown[: self._len] = column[: self._len]
+            self._cols[name] = grown
+
+    def append(self, point: TimelinePoint):
+        if self._len == len(self._cols["t"]):
+            self._grow()
+        row = self._len
+        cols = self._cols
+        for name in INT_COLUMNS:
+            cols[name][row] = getattr(point, name)
+        cols["external_frag"][row] = point.external_frag
+        cols["entropy"][row] = point.entropy
+        cols["event"][row] = self._encode("event", point.event)
+        cols["phase"][row] = self._encode("phase", point.phase)
+        cols["obj_id"][row] = self._encode("obj_id", point.obj_id)
+        cols["flags"][row] = (SAFE_WINDOW if point.in_safe_window else 0) | (
+            KEYFRAME if point.keyframe else 0
+        )
+        if self.maps:
+            self._maps.append(
+                (
+                    point.blocks_added,
+                    point.blocks_removed,
+                    point.extents_added,
+                    point.extents_removed,
+                )
+            )
+        self._len += 1
+
+    def extend(self, points: Iterable[TimelinePoint]):
+        for point in points:
+            self.append(point)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one column; string columns return their int32 codes."""
+        view = self._cols[name][: self._len]
+        view.flags.writeable = False
+        return view
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: self.column(name) for name in self._cols}
+
+    def vocabulary(self, name: str) -> List[str]:
+        return list(self._vocab[name])
+
+    def decoded(self, name: str, missing: Optional[str] = None) -> np.ndarray:
+        """Object array of the strings in a dictionary-encoded column, ``missing`` for None."""
+        lookup = np.array(self._vocab[name] + [missing], dtype=object)
+        return lookup[self.column(name)]
+
+    def mask(self, name: str, value: str) -> np.ndarray:
+        """Boolean mask of rows whose string column ``name`` equals ``value``."""
+        code = self._codes[name].get(value)
+        if code is None:
+            return np.zeros(self._len, dtype=bool)
+        return self.column(name) == code
+
+    def flag(self, bit: int) -> np.ndarray:
+        return (self.column("flags") & bit) != 0
+
+    def aggregate(self, name: str, bounds: Sequence[int], how: str = "sum") -> np.ndarray:
+        """Reduce column ``name`` over consecutive row windows ``[bounds[i], bounds[i + 1])``.
+
+        ``bounds`` must be non-decreasing. ``how`` is ``sum``, ``mean``, ``max``
+        or ``min``; empty windows give 0.
+        """
+        edges = np.asarray(bounds, dtype=np.int64)
+        if len(edges) < 2 or np.any(np.diff(edges) < 0) or edges[0] < 0 or edges[-1] > self._len:
+            raise ValueError("bounds must be non-decreasing row indexes within the timeline")
+        values = self.column(name)[: edges[-1]]
+        starts, counts = edges[:-1], np.diff(edges)
+        if how in ("sum", "mean"):
+            prefix = np.concatenate(([0], np.cumsum(values)))
+            sums = prefix[edges[1:]] - prefix[starts]
+            if how == "sum":
+                return sums
+            return np.divide(sums, counts, out=np.zeros(len(counts)), where=counts > 0)
+        if how in ("max", "min"):
+            ufunc = np.maximum if how == "max" else np.minimum
+            out = np.zeros(len(counts), dtype=values.dtype)
+            nonempty = counts > 0
+            if nonempty.any():
+                # Windows are contiguous, so each non-empty one runs to the next non-empty start.
+                out[nonempty] = ufunc.reduceat(values, starts[nonempty])
+            return out
+        raise ValueError(f"unsupported aggregation: {how}")
+
+    def _view(self, key: slice) -> Timeline:
+        view = Timeline.__new__(Timeline)
+        view.maps = self.maps
+        view._cols = {name: column[: self._len][key] for name, column in self._cols.items()}
+        view._len = len(view._cols["t"])
+        # Views share the vocabularies, so codes stay comparable with the parent.
+        view._vocab = self._vocab
+        view._codes = self._codes
+        view._maps = self._maps[key] if self.maps else []
+        return view
+
+    def copy(self) -> Timeline:
+        """A timeline with its own arrays, vocabularies and map lists."""
+        clone = self._view(slice(None))
+        clone._cols = {name: column.copy() for name, column in clone._cols.items()}
+        clone._vocab = {name: list(words) for name, words in self._vocab.items()}
+        clone._codes = {name: dict(codes) for name, codes in self._codes.items()}
+        clone._maps = list(clone._maps)
+        return clone
+
+    def _point(self, row: int) -> TimelinePoint:
+        cols = self._cols
+        vocab = self._vocab
+        strings = {}
+        for name in STRING_COLUMNS:
+            code = int(cols[name][row])
+            strings[name] = vocab[name][code] if code >= 0 else None
+        flags = int(cols["flags"][row])
+        point = TimelinePoint(
+            **{name: int(cols[name][row]) for name in INT_COLUMNS},
+            external_frag=float(cols["external_frag"][row]),
+            entropy=float(cols["entropy"][row]),
+            in_safe_window=bool(flags & SAFE_WINDOW),
+            keyframe=bool(flags & KEYFRAME),
+            **strings,
+        )
+        if self.maps:
+            point.blocks_added, point.blocks_removed, point.extents_added, point.extents_removed = (
+                self._maps[row]
+            )
+        return point
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._view(key)
+        row = range(self._len)[key]
+        return self._point(row)
+
+    def __iter__(self) -> Iterator[TimelinePoint]:
+        for row in range(self._len):
+            yield self._point(row)
+
+    def points(self) -> List[TimelinePoint]:
+        return list(self)
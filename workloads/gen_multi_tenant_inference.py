@@ -5,6 +5,11 @@ from pathlib import Path
 
 OUT_PATH = Path(__file__).resolve().parents[1] / "traces" / "multi_tenant_inference.jsonl"
 MB = 1024 * 1024
+# Tenants A and B prepend a common system prompt to every request. Its KV blocks
+# are shared by reference; each request only allocates its private suffix.
+PREFIX_SIZES = {"tenant_A": MB // 2, "tenant_B": MB}
+# Every Nth tenant B request forks a second sample that diverges (copy-on-write).
+SAMPLE_FORK_EVERY = 10
 
 
 def generate_events():
@@ -13,9 +18,23 @@ def generate_events():
     tenant_b_objects = []
     tenant_c_objects = []
 
+    for tenant, size in PREFIX_SIZES.items():
+        events.append({"t": t, "event": "alloc", "id": f"{tenant}_prefix", "size": size, "phase": tenant})
+        t += 1
+        events.append(
+            {"t": t, "event": "touch", "id": f"{tenant}_prefix", "mu": 0.95, "sigma": 0.02, "phase": tenant}
+        )
+        t += 1
+
     for round_index in range(70):
         burst_id = f"tenant_A_req_{round_index}"
-        events.append({"t": t, "event": "alloc", "id": burst_id, "size": MB, "phase": "tenant_A"})
+        events.append(
+            {"t": t, "event": "share", "id": f"{burst_id}_prefix", "src": "tenant_A_prefix", "phase": "tenant_A"}
+        )
+        t += 1
+        events.append(
+            {"t": t, "event": "alloc", "id": burst_id, "size": MB - PREFIX_SIZES["tenant_A"], "phase": "tenant_A"}
+        )
         t += 1
         events.append(
             {
@@ -29,12 +48,21 @@ def generate_events():
         )
         t += 1
         if round_index % 2 == 1:
-            events.append({"t": t, "event": "free", "id": burst_id, "phase": "tenant_A"})
-            t += 1
+            for obj_id in (burst_id, f"{burst_id}_prefix"):
+                events.append({"t": t, "event": "free", "id": obj_id, "phase": "tenant_A"})
+                t += 1
 
         steady_id = f"tenant_B_cache_{round_index}"
         events.append(
-            {"t": t, "event": "alloc", "id": steady_id, "size": 2 * MB, "phase": "tenant_B"}
+            {"t": t, "event": "share", "id": f"{steady_id}_prefix", "src": "tenant_B_prefix", "phase": "tenant_B"}
+        )
+        t += 1
+        events.append(
+            {"t": t, "event": "alloc", "id": steady_id, "size": 2 * MB - PREFIX_SIZES["tenant_B"], "phase": "tenant_B"}
+        )
+        t += 1
+        events.append(
+            {"t": t, "event": "touch", "id": "tenant_B_prefix", "mu": 0.95, "sigma": 0.02, "phase": "tenant_B"}
         )
         t += 1
         tenant_b_objects.append(steady_id)
@@ -50,11 +78,29 @@ def generate_events():
             }
         )
         t += 1
-        if round_index % 6 == 5 and tenant_b_objects:
+        if round_index % SAMPLE_FORK_EVERY == SAMPLE_FORK_EVERY - 1:
+            sample_id = f"{touch_target}_sample"
+            events.append({"t": t, "event": "fork", "id": sample_id, "src": touch_target, "phase": "tenant_B"})
+            t += 1
             events.append(
-                {"t": t, "event": "free", "id": tenant_b_objects.pop(0), "phase": "tenant_B"}
+                {
+                    "t": t,
+                    "event": "touch",
+                    "id": sample_id,
+                    "mu": 0.60,
+                    "sigma": 0.10,
+                    "write": True,
+                    "phase": "tenant_B",
+                }
             )
             t += 1
+            events.append({"t": t, "event": "free", "id": sample_id, "phase": "tenant_B"})
+            t += 1
+        if round_index % 6 == 5 and tenant_b_objects:
+            oldest = tenant_b_objects.pop(0)
+            for obj_id in (oldest, f"{oldest}_prefix"):
+                events.append({"t": t, "event": "free", "id": obj_id, "phase": "tenant_B"})
+                t += 1
 
         heavy_id = f"tenant_C_tensor_{round_index}"
         events.append(
@@ -4,13 +4,16 @@ import json
 from pathlib import Path
 
 OUT_PATH = Path(__file__).resolve().parents[1] / "traces" / "transformer_prefill_decode.jsonl"
+GROWTH_OUT_PATH = Path(__file__).resolve().parents[1] / "traces" / "transformer_decode_growth.jsonl"
 MB = 1024 * 1024
+KV_GROWTH_EVERY = 3
 
 
-def generate_events():
+def generate_events(kv_growth: bool = False):
     events = []
     t = 0
     kv_ids = [f"kv_{index}" for index in range(10)]
+    kv_sizes = {kv_id: 16 * MB for kv_id in kv_ids}
 
     for kv_id in kv_ids:
         events.append({"t": t, "event": "alloc", "id": kv_id, "size": 16 * MB, "phase": "prefill"})
@@ -31,6 +34,20 @@ def generate_events():
     t += 1
 
     for step in range(18):
+        if kv_growth and step % KV_GROWTH_EVERY == KV_GROWTH_EVERY - 1:
+            # Decoded tokens extend each sequence's KV cache: re-issue alloc with the new size.
+            for kv_id in kv_ids:
+                kv_sizes[kv_id] += MB
+                events.append(
+                    {
+                        "t": t,
+                        "event": "alloc",
+                        "id": kv_id,
+                        "size": kv_sizes[kv_id],
+                        "phase": "decode",
+                    }
+                )
+                t += 1
         for kv_id in kv_ids:
             events.append(
                 {
@@ -66,8 +83,9 @@ def generate_events():
 
 
 def main():
-    events = generate_events()
-    OUT_PATH.write_text("\n".join(json.dumps(event) for event in events) + "\n", encoding="utf-8")
+    for path, kv_growth in ((OUT_PATH, False), (GROWTH_OUT_PATH, True)):
+        events = generate_events(kv_growth=kv_growth)
+        path.write_text("\n".join(json.dumps(event) for event in events) + "\n", encoding="utf-8")
 
 
 if __name__ == "__main__":